@@ -0,0 +1,242 @@
+"""
+串口数据采集（不依赖 Qt）
+
+负责从串口读取原始数据、解码、按数据格式（schema.Schema）解析出样本并交给回调与记录器。
+界面中的 SerialThread 和无界面命令行（python -m headless）共用这里的逻辑。
+"""
+import time
+from array import array
+from collections import deque
+
+from schema import BASIC
+from tracing import tracer
+
+
+def decode_text(raw_data):
+    """把原始数据解码为用于显示的文本：依次尝试 utf-8、gbk，失败时返回十六进制"""
+    try:
+        return raw_data.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return raw_data.decode('gbk')
+        except UnicodeDecodeError:
+            return ' '.join([f'{b:02X}' for b in raw_data])
+
+
+def parse_sample(raw_data, schema=BASIC):
+    """
+    从一行原始数据中按数据格式解析出各通道的值，无法解析时返回 None
+
+    文本格式为逗号分隔的数值，默认格式为 "航向角,红外方位角[,...]"；
+    无法解码为文本时，尝试把开头的字节按若干个 float 解析。
+    """
+    try:
+        line = raw_data.decode('utf-8').strip()
+    except UnicodeDecodeError:
+        try:
+            line = raw_data.decode('gbk').strip()
+        except UnicodeDecodeError:
+            return schema.parse_binary(raw_data)
+
+    parts = line.split(',')
+    if len(parts) < schema.required:
+        return None
+    return schema.parse_fields(parts)
+
+
+class AcquisitionStats:
+    """采集统计：样本数、解析错误数、最近值与采样率"""
+
+    def __init__(self, rate_window=256):
+        self.lines = 0
+        self.samples = 0
+        self.parse_errors = 0
+        self.bytes = 0
+        self.last_heading = None
+        self.last_ir = None
+        # 最近若干次读取的 (时间戳, 累计样本数)，用于估计采样率
+        self._marks = deque(maxlen=rate_window)
+
+    def add_batch(self, timestamps, headings, irs):
+        if not headings:
+            return
+        self.samples += len(headings)
+        self.last_heading = headings[-1]
+        self.last_ir = irs[-1]
+        self._marks.append((timestamps[-1], self.samples))
+
+    def rate(self):
+        """最近一段时间的采样率（Hz）"""
+        if len(self._marks) < 2:
+            return 0.0
+        (t0, n0), (t1, n1) = self._marks[0], self._marks[-1]
+        return (n1 - n0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def summary(self):
+        """单行统计文本"""
+        heading = '-' if self.last_heading is None else f"{self.last_heading:.1f}"
+        ir = '-' if self.last_ir is None else f"{self.last_ir:.1f}"
+        return (f"样本: {self.samples}  速率: {self.rate():.1f} Hz  "
+                f"航向角: {heading}  红外方位角: {ir}  "
+                f"解析错误: {self.parse_errors}  字节: {self.bytes}")
+
+
+class Acquisition:
+    """
+    串口采集器
+
+    每次 poll() 读取串口中已到达的全部数据，按行切分、按数据格式 schema 解析，
+    把本次得到的样本作为一批交给 on_batch(timestamps, columns)
+    （timestamps 为 array('d')，columns 为 {通道名: 等长的 array('d')}，按 schema 的通道顺序），
+    并写入记录器（如果有，列顺序与 schema 相同）。
+
+    设置了报警引擎（alarms.AlarmEngine，数据格式应与 schema 相同）时每批样本都会经过规则检查，
+    产生的报警事件写入记录器的事件文件并交给 on_alarm(event)。
+    """
+
+    # 两次读取间隔超过该值时不再在其间插值时间戳（秒）
+    MAX_SPREAD = 1.0
+
+    def __init__(self, ser=None, on_batch=None, on_text=None, recorder=None,
+                 verbose=False, alarms=None, on_alarm=None, schema=BASIC):
+        self.ser = ser
+        self.schema = schema
+        self.on_batch = on_batch
+        self.on_text = on_text
+        self.recorder = recorder
+        self.alarms = alarms
+        self.on_alarm = on_alarm
+        self.verbose = verbose
+        self.stats = AcquisitionStats()
+        # 尚未遇到换行符的残留数据
+        self._pending = b''
+        self._last_timestamp = None
+
+    def set_serial(self, ser):
+        """设置串口对象"""
+        self.ser = ser
+        self._pending = b''
+
+    def poll(self):
+        """读取并处理当前已到达的数据，返回本次解析出的样本数"""
+        ser = self.ser
+        if not ser or not ser.is_open:
+            return 0
+        waiting = ser.in_waiting
+        if not waiting:
+            # 没有数据时也要检查“长时间无数据”类的报警
+            if self.alarms is not None:
+                self._handle_alarms(self.alarms.poll(time.time()))
+            return 0
+
+        t_read = tracer.now()
+        chunk = ser.read(waiting)
+        return self.feed(chunk, time.time(), t_read)
+
+    def feed(self, data, timestamp=None, t_read=None):
+        """处理一段原始数据（可包含多行），返回解析出的样本数"""
+        if timestamp is None:
+            timestamp = time.time()
+        if t_read is None:
+            t_read = tracer.now()
+        t_parse = tracer.now()
+        self.stats.bytes += len(data)
+
+        lines = (self._pending + data).split(b'\n')
+        # 最后一段没有换行符，留到下次与新数据拼接
+        self._pending = lines.pop()
+
+        columns = [array('d') for _ in self.schema.channels]
+        appends = [column.append for column in columns]
+        for raw_data in lines:
+            sample = self._parse_line(raw_data + b'\n')
+            if sample is not None:
+                for append, value in zip(appends, sample):
+                    append(value)
+
+        count = len(columns[0])
+        if count == 0:
+            # 收到的都是无法解析的行（例如缺少红外字段）时，“长时间无有效值”类的报警照样要检查
+            if self.alarms is not None:
+                self._handle_alarms(self.alarms.poll(timestamp))
+            return 0
+        timestamps = self._spread_timestamps(timestamp, count)
+        headings, irs = columns[0], columns[1]
+        self.stats.add_batch(timestamps, headings, irs)
+        if self.recorder is not None:
+            self.recorder.extend(timestamps, *columns)
+        if self.alarms is not None:
+            self._handle_alarms(self.alarms.process(timestamps, *columns))
+        self._deliver(timestamps, dict(zip(self.schema.names, columns)), t_read, t_parse)
+        return count
+
+    def _parse_line(self, raw_data):
+        """处理一行原始数据，返回按通道顺序的数值元组或 None"""
+        self.stats.lines += 1
+        if self.verbose:
+            print(f"接收到原始数据: {raw_data}")
+
+        if self.on_text is not None:
+            text = decode_text(raw_data)
+            if text.strip():
+                self.on_text(text)
+
+        try:
+            sample = parse_sample(raw_data, self.schema)
+        except (ValueError, IndexError) as e:
+            self.stats.parse_errors += 1
+            if self.verbose:
+                print(f"数据解析错误: {e}, 原始数据: {raw_data}")
+            return None
+        # 字段数不足的行（空行除外）同样算作解析错误
+        if sample is None and raw_data.strip():
+            self.stats.parse_errors += 1
+            if self.verbose:
+                print(f"数据解析错误: 字段不足, 原始数据: {raw_data}")
+        return sample
+
+    def _handle_alarms(self, events):
+        """记录并转发报警事件"""
+        for event in events:
+            if self.recorder is not None:
+                self.recorder.write_event(event)
+            if self.on_alarm is not None:
+                self.on_alarm(event)
+
+    def _spread_timestamps(self, timestamp, count):
+        """
+        为同一次读取到的 count 个样本分配时间戳
+
+        这些样本是在上次读取之后陆续到达的，在两次读取时间之间均匀分布；
+        第一次读取或间隔过长时全部使用本次读取时间。
+        """
+        last = self._last_timestamp
+        self._last_timestamp = timestamp
+        if last is None or not 0 < timestamp - last <= self.MAX_SPREAD:
+            return array('d', [timestamp]) * count
+        step = (timestamp - last) / count
+        return array('d', [last + step * (i + 1) for i in range(count)])
+
+    def _deliver(self, timestamps, columns, t_read, t_parse):
+        """把一批样本交给回调，抽中的样本记录读取、解析和发送阶段"""
+        if self.on_batch is None:
+            return
+        count = len(timestamps)
+        first = tracer.next_samples(count)
+        if first is None:
+            self.on_batch(timestamps, columns)
+            return
+        t_emit = tracer.now()
+        self.on_batch(timestamps, columns)
+        t_done = tracer.now()
+        for sid in tracer.sampled_ids(first, count):
+            tracer.span('read', sid, t_read, t_parse)
+            tracer.span('parse', sid, t_parse, t_emit, batch=count)
+            tracer.span('emit', sid, t_emit, t_done)
+            tracer.flow(sid, 's', t_read)
+
+    def run(self, is_running, interval=0.01):
+        """循环采集，直到 is_running() 返回 False"""
+        while is_running():
+            self.poll()
+            time.sleep(interval)
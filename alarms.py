@@ -0,0 +1,253 @@
+"""
+报警规则引擎（不依赖 Qt）
+
+规则写在 JSON 配置文件中（见 alarms.json），例如：
+
+    {"rules": [
+        {"name": "转向过快", "type": "rate_above", "channel": "heading",
+         "threshold": 10, "duration": 2, "clear": 8},
+        {"name": "红外丢失", "type": "missing", "channel": "ir", "duration": 5},
+        {"name": "航向跳变", "type": "jump", "channel": "heading", "threshold": 30}
+    ]}
+
+规则类型：
+    above / below   数值高于 / 低于 threshold
+    rate_above      变化速率（度/秒，按最短弧计算）的绝对值高于 threshold
+    jump            相邻两个样本的最短弧角差绝对值高于 threshold
+    missing         超过 duration 秒没有有效值（NaN 或完全没有数据；从未收到有效值时从第一次检查开始计时）
+
+channel 可以是数据格式（见 schema.py）中的任一通道，创建引擎时按当前数据格式检查。
+
+条件持续 duration 秒后触发，之后信号回到 clear（默认等于 threshold）以内并持续
+clear_duration 秒后解除（迟滞）。持续时间的起点在批次之间保存。
+
+加载时每条规则被编译为 “信号 > 阈值” 的形式（below 对信号取负），同一信号只计算一次，
+每批数据对全部规则做一次二维（规则 × 样本）比较，只有出现状态变化的规则才逐条处理。
+"""
+import json
+import time
+
+import numpy as np
+
+from interpolation import shortest_arc
+from schema import BASIC
+
+RULE_TYPES = ('above', 'below', 'rate_above', 'jump', 'missing')
+
+
+class AlarmRule:
+    """一条报警规则"""
+
+    def __init__(self, name, type, channel='heading', threshold=None, duration=0.0,
+                 clear=None, clear_duration=None, level='warning', message=None):
+        if type not in RULE_TYPES:
+            raise ValueError(f"报警规则 {name!r} 的类型 {type!r} 无效，可用类型: {', '.join(RULE_TYPES)}")
+        if type == 'missing':
+            # 没有有效值的时长本身就是信号，阈值即 duration
+            threshold = duration
+            duration = 0.0
+        elif threshold is None:
+            raise ValueError(f"报警规则 {name!r} 缺少 threshold")
+        if clear_duration is None:
+            # 跳变是瞬时事件，默认 1 秒内没有再次跳变才解除
+            clear_duration = 1.0 if type == 'jump' else 0.0
+        self.name = name
+        self.type = type
+        self.channel = channel
+        self.threshold = float(threshold)
+        self.duration = float(duration)
+        self.clear = float(threshold if clear is None else clear)
+        self.clear_duration = float(clear_duration)
+        self.level = level
+        self.message = message or name
+
+    @property
+    def signal(self):
+        """规则使用的信号名"""
+        return {'above': 'value', 'below': 'value', 'rate_above': 'rate',
+                'jump': 'jump', 'missing': 'stale'}[self.type] + ':' + self.channel
+
+
+def load_rules(path):
+    """从 JSON 配置文件读取规则列表"""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    return [AlarmRule(**rule) for rule in config.get('rules', [])]
+
+
+def format_event(event):
+    """单行报警文本"""
+    state = "触发" if event['state'] == 'raised' else "解除"
+    stamp = time.strftime("%H:%M:%S", time.localtime(event['time']))
+    return f"{stamp} [{event['level']}] {event['rule']} {state}: {event['message']} (值 {event['value']:.1f})"
+
+
+def _sustained(t, cond, carried, duration):
+    """
+    条件连续成立达到 duration 的位置
+
+    cond 形状为 (规则数, 样本数)，carried 为上一批末尾仍在持续的起始时间（没有则为 NaN）。
+    返回 (是否满足, 本批末尾仍在持续的起始时间)。
+    """
+    n = cond.shape[1]
+    previous = np.concatenate((~np.isnan(carried)[:, None], cond[:, :-1]), axis=1)
+    rise = cond & ~previous
+    index = np.maximum.accumulate(np.where(rise, np.arange(n), -1), axis=1)
+    start = np.where(index >= 0, t[np.maximum(index, 0)], carried[:, None])
+    ok = cond & (t - start >= duration[:, None])
+    return ok, np.where(cond[:, -1], start[:, -1], np.nan)
+
+
+class AlarmEngine:
+    """
+    按批检查全部报警规则
+
+    规则的通道必须属于数据格式 schema；process() 的各列按 schema 的通道顺序给出。
+    process() 和 poll() 返回本次产生的事件列表，每个事件是一个 dict：
+    {'type': 'alarm', 'time', 'rule', 'state': 'raised' / 'cleared', 'level', 'value', 'message'}
+    """
+
+    def __init__(self, rules, schema=BASIC):
+        self.rules = list(rules)
+        self.schema = schema
+        for rule in self.rules:
+            if rule.channel not in schema:
+                raise ValueError(f"报警规则 {rule.name!r} 的通道 {rule.channel!r} 不在数据格式 {schema.name} 中，"
+                                 f"可用通道: {', '.join(schema.names)}")
+        self.signals = sorted({rule.signal for rule in self.rules})
+        signal_index = {signal: i for i, signal in enumerate(self.signals)}
+        self._rows = np.array([signal_index[rule.signal] for rule in self.rules], dtype=np.intp)
+        # below 规则对信号取负，统一为 “信号 > 阈值” 触发、“信号 <= 解除值” 解除
+        sign = np.array([-1.0 if rule.type == 'below' else 1.0 for rule in self.rules])
+        self._sign = sign
+        self._raise_at = sign * np.array([rule.threshold for rule in self.rules])
+        self._clear_at = sign * np.array([rule.clear for rule in self.rules])
+        self._duration = np.array([rule.duration for rule in self.rules])
+        self._clear_duration = np.array([rule.clear_duration for rule in self.rules])
+
+        count = len(self.rules)
+        self.active = np.zeros(count, dtype=bool)
+        self._raise_start = np.full(count, np.nan)
+        self._clear_start = np.full(count, np.nan)
+        # 每个通道上一批的最后一个值、时间、速率和最后一次有效值的时间
+        channels = schema.names
+        self._last = {channel: None for channel in channels}
+        self._last_t = None
+        self._last_rate = {channel: 0.0 for channel in channels}
+        self._last_valid = {channel: None for channel in channels}
+        # 第一次检查（process 或 poll）的时间，从未收到有效值时 missing 规则从这里开始计时
+        self._since = None
+        self._missing = [i for i, rule in enumerate(self.rules) if rule.type == 'missing']
+
+    @classmethod
+    def from_config(cls, path, schema=BASIC):
+        return cls(load_rules(path), schema=schema)
+
+    def active_rules(self):
+        """当前处于报警状态的规则"""
+        return [rule for rule, active in zip(self.rules, self.active) if active]
+
+    def _signals(self, t, columns):
+        """计算本批用到的信号，返回形状为 (信号数, 样本数) 的数组"""
+        out = np.empty((len(self.signals), len(t)))
+        for row, signal in enumerate(self.signals):
+            kind, channel = signal.split(':')
+            values = columns[channel]
+            if kind == 'value':
+                out[row] = values
+            elif kind in ('jump', 'rate'):
+                last = self._last[channel]
+                previous = np.concatenate(([values[0] if last is None else last], values[:-1]))
+                step = np.abs(shortest_arc(previous, values))
+                if kind == 'jump':
+                    out[row] = step
+                    continue
+                last_t = t[0] if self._last_t is None else self._last_t
+                dt = np.diff(t, prepend=last_t)
+                rate = np.where(dt > 0, step / np.where(dt > 0, dt, 1.0), np.nan)
+                # 时间戳相同（同一次读取）的样本沿用前一个速率
+                index = np.maximum.accumulate(np.where(np.isnan(rate), -1, np.arange(len(t))))
+                out[row] = np.where(index >= 0, rate[np.maximum(index, 0)],
+                                    self._last_rate[channel])
+            else:
+                valid = ~np.isnan(values)
+                last_valid = self._last_valid[channel]
+                if last_valid is None:
+                    last_valid = self._since
+                seen = np.maximum.accumulate(np.where(valid, t, -np.inf))
+                out[row] = t - np.maximum(seen, last_valid)
+        return out
+
+    def process(self, timestamps, *columns):
+        """检查一批样本（columns 按数据格式的通道顺序给出），返回产生的事件"""
+        t = np.asarray(timestamps, dtype=np.float64)
+        if len(t) == 0 or not self.rules:
+            return []
+        if self._since is None:
+            self._since = float(t[0])
+        columns = {channel: np.asarray(values, dtype=np.float64)
+                   for channel, values in zip(self.schema.names, columns)}
+        signals = self._signals(t, columns)
+        values = signals[self._rows] * self._sign[:, None]
+        raise_ok, self._raise_start = _sustained(
+            t, values > self._raise_at[:, None], self._raise_start, self._duration)
+        clear_ok, self._clear_start = _sustained(
+            t, values <= self._clear_at[:, None], self._clear_start, self._clear_duration)
+
+        events = []
+        candidates = np.flatnonzero(np.where(self.active, clear_ok.any(axis=1), raise_ok.any(axis=1)))
+        for i in candidates.tolist():
+            events.extend(self._transitions(i, t, signals[self._rows[i]], raise_ok[i], clear_ok[i]))
+        events.sort(key=lambda event: event['time'])
+
+        self._remember(t, columns, signals)
+        return events
+
+    def _transitions(self, i, t, signal, raise_ok, clear_ok):
+        """逐个处理规则 i 在本批中的触发/解除"""
+        events = []
+        pos = 0
+        n = len(t)
+        while pos < n:
+            hits = np.flatnonzero((clear_ok if self.active[i] else raise_ok)[pos:])
+            if len(hits) == 0:
+                break
+            pos += int(hits[0])
+            self.active[i] = not self.active[i]
+            events.append(self._event(i, float(t[pos]), float(signal[pos])))
+            pos += 1
+        return events
+
+    def _event(self, i, time, value):
+        rule = self.rules[i]
+        return {'type': 'alarm', 'time': time, 'rule': rule.name,
+                'state': 'raised' if self.active[i] else 'cleared',
+                'level': rule.level, 'value': value, 'message': rule.message}
+
+    def _remember(self, t, columns, signals):
+        for channel, values in columns.items():
+            self._last[channel] = float(values[-1])
+            valid = np.flatnonzero(~np.isnan(values))
+            if len(valid):
+                self._last_valid[channel] = float(t[valid[-1]])
+        for row, signal in enumerate(self.signals):
+            kind, channel = signal.split(':')
+            if kind == 'rate':
+                self._last_rate[channel] = float(signals[row, -1])
+        self._last_t = float(t[-1])
+
+    def poll(self, now):
+        """没有数据到达时调用：检查 missing 规则是否因长时间无数据而触发"""
+        if self._since is None:
+            self._since = float(now)
+        events = []
+        for i in self._missing:
+            rule = self.rules[i]
+            if self.active[i]:
+                continue
+            last_valid = self._last_valid[rule.channel]
+            stale = now - (self._since if last_valid is None else last_valid)
+            if stale > rule.threshold:
+                self.active[i] = True
+                events.append(self._event(i, float(now), float(stale)))
+        return events
@@ -0,0 +1,181 @@
+"""
+绘制性能测试
+
+在 offscreen 平台下把 ShipAttitudeWidget 和 AttitudePlot 渲染到 QImage，测量不同窗口尺寸、
+不同历史长度下每帧的耗时（中位数，毫秒）和每帧的内存分配峰值（tracemalloc，KiB）。
+每帧先写入一小批新样本，保证曲线图确实需要重绘。可与基准文件比较，超过阈值时返回非零退出码：
+
+    python bench_render.py --save bench_render.json
+    python bench_render.py --baseline bench_render.json --tolerance 0.2
+    python bench_render.py --quick
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication, QWidget
+
+SHIP_SIZES = [(300, 300), (600, 600), (1200, 1200)]
+PLOT_SIZES = [(640, 360), (1280, 720), (1920, 1080)]
+HISTORY_LENGTHS = [1000, 100000, 1000000]
+# 模拟的采样率（Hz）与每帧新到达的样本数
+SAMPLE_RATE = 100.0
+BATCH = 2
+
+
+def _history(n, start=1000.0):
+    """n 个样本的模拟历史 (时间戳, 航向角, 红外方位角)"""
+    t = start + np.arange(n) / SAMPLE_RATE
+    heading = (np.arange(n) * 0.7) % 360.0
+    ir = (180.0 + 40.0 * np.sin(np.arange(n) / 500.0)) % 360.0
+    return t, heading, ir
+
+
+def _measure(frame, frames):
+    """执行 frames 帧，返回 (每帧耗时中位数 ms, 每帧分配峰值 KiB)"""
+    # 预热：缓存、金字塔等在第一帧建立
+    for _ in range(3):
+        frame()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        frame()
+        times.append((time.perf_counter() - start) * 1000)
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(frames, 10)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        frame()
+        peaks.append((tracemalloc.get_traced_memory()[1] - base) / 1024)
+    tracemalloc.stop()
+    return statistics.median(times), statistics.median(peaks)
+
+
+def bench_ship(size, frames, trail=False):
+    """船体姿态组件：每帧更新角度后完整渲染一次"""
+    from visualization import ShipAttitudeWidget, AttitudePlot
+    import pyqtgraph as pg
+
+    widget = ShipAttitudeWidget()
+    widget.resize(*size)
+    image = QImage(size[0], size[1], QImage.Format_ARGB32_Premultiplied)
+    state = {'i': 0, 't': 1000.0}
+    plot = None
+    if trail:
+        # 轨迹读取曲线图的样本缓冲，先写入 10 分钟的历史
+        plot = AttitudePlot(pg.PlotWidget(), data_length=100000)
+        t, heading, ir = _history(60000)
+        plot.extend(t, heading, ir)
+        state['t'] = t[-1]
+        widget.set_trail(plot.ring, seconds=30.0)
+
+    def frame():
+        state['i'] += 1
+        i = state['i']
+        state['t'] += 1 / SAMPLE_RATE
+        if plot is not None:
+            plot.extend([state['t']], [i * 0.7 % 360.0], [i * 1.3 % 360.0])
+        widget.update_angles(i * 0.7 % 360.0, i * 1.3 % 360.0)
+        widget.render(image)
+
+    return _measure(frame, frames)
+
+
+def bench_plot(size, history, frames):
+    """曲线图：每帧写入 BATCH 个新样本，update_plot 后完整渲染一次"""
+    import pyqtgraph as pg
+    from visualization import AttitudePlot
+
+    plot_widget = pg.PlotWidget()
+    plot_widget.resize(*size)
+    plot = AttitudePlot(plot_widget, data_length=100000)
+    t, heading, ir = _history(history)
+    plot.extend(t, heading, ir)
+    image = QImage(size[0], size[1], QImage.Format_ARGB32_Premultiplied)
+    state = {'t': t[-1], 'i': history}
+
+    def frame():
+        i = state['i']
+        timestamps = state['t'] + (np.arange(BATCH) + 1) / SAMPLE_RATE
+        values = (np.arange(i, i + BATCH) * 0.7) % 360.0
+        plot.extend(timestamps, values, values)
+        state['t'] = timestamps[-1]
+        state['i'] = i + BATCH
+        plot.update_plot()
+        # GraphicsView.render 是场景渲染（参数为 QPainter），这里要的是整个窗口部件
+        QWidget.render(plot_widget, image)
+
+    return _measure(frame, frames)
+
+
+def run(frames, quick=False):
+    """运行全部用例，返回 {用例名: {'ms': ..., 'alloc_kib': ...}}"""
+    ship_sizes = SHIP_SIZES[:1] if quick else SHIP_SIZES
+    plot_sizes = PLOT_SIZES[:1] if quick else PLOT_SIZES
+    histories = HISTORY_LENGTHS[:2] if quick else HISTORY_LENGTHS
+
+    results = {}
+    for size in ship_sizes:
+        for trail in (False, True):
+            name = f"ship {size[0]}x{size[1]}" + (" trail" if trail else "")
+            results[name] = bench_ship(size, frames, trail)
+    for size in plot_sizes:
+        for history in histories:
+            name = f"plot {size[0]}x{size[1]} n={history}"
+            results[name] = bench_plot(size, history, frames)
+    return {name: {'ms': ms, 'alloc_kib': alloc} for name, (ms, alloc) in results.items()}
+
+
+def compare(summary, baseline, tolerance):
+    """与基准比较每帧耗时，返回退化的用例列表"""
+    regressed = []
+    for name, value in summary.items():
+        if name not in baseline:
+            continue
+        limit = baseline[name]['ms'] * (1 + tolerance)
+        if value['ms'] > limit:
+            regressed.append(name)
+            print(f"性能退化: {name} {value['ms']:.2f} ms > {limit:.2f} ms")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="绘制性能测试")
+    parser.add_argument('--frames', type=int, default=50, help="每个用例的帧数（默认 50）")
+    parser.add_argument('--quick', action='store_true', help="只测最小尺寸和较短历史")
+    parser.add_argument('--save', metavar='FILE', help="把结果保存为基准文件")
+    parser.add_argument('--baseline', metavar='FILE', help="与基准文件比较")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="允许的相对退化（默认 0.2，即 20%%）")
+    args = parser.parse_args(argv)
+
+    # 离屏渲染同样需要 QApplication；保持引用到测试结束，否则会被回收
+    app = QApplication.instance() or QApplication(sys.argv)
+    app.setApplicationName("bench_render")
+    summary = run(args.frames, args.quick)
+    for name, value in summary.items():
+        print(f"{name:>28}: {value['ms']:8.2f} ms/帧   分配 {value['alloc_kib']:8.1f} KiB/帧")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if compare(summary, baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
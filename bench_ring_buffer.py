@@ -0,0 +1,78 @@
+"""
+环形缓冲性能测试
+
+对比原来每个样本两次 np.roll 的做法与 SampleRing 的单样本插入耗时、
+取绘图视图的耗时，以及稳定状态下的内存分配：
+
+    python bench_ring_buffer.py
+    python bench_ring_buffer.py --sizes 1000 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from sample_store import SampleRing
+
+
+def bench_roll(size):
+    """原实现：每个样本对两个数组各做一次 np.roll"""
+    heading = np.zeros(size)
+    ir = np.zeros(size)
+    iterations = max(3, min(2000, 20000000 // size))
+    start = time.perf_counter()
+    for i in range(iterations):
+        heading = np.roll(heading, -1)
+        heading[-1] = i
+        ir = np.roll(ir, -1)
+        ir[-1] = i
+    return (time.perf_counter() - start) / iterations
+
+
+def bench_ring(size, iterations=100000):
+    """SampleRing：返回 (单样本插入耗时, 取视图耗时, 稳定状态分配字节数)"""
+    ring = SampleRing(size, channels=('heading', 'ir'))
+    values = [float(i % 360) for i in range(1000)]
+
+    # 先写满一圈（大容量时只写一部分，插入耗时与是否回绕无关）
+    for i in range(min(size, 200000)):
+        ring.append(values[i % 1000], values[i % 1000])
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        v = values[i % 1000]
+        ring.append(v, v)
+    append_time = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        ring.view('heading', len(ring))
+        ring.view('ir', len(ring))
+    view_time = (time.perf_counter() - start) / 1000
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(10000):
+        v = values[i % 1000]
+        ring.append(v, v)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return append_time, view_time, allocated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="环形缓冲性能测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 10000000])
+    args = parser.parse_args(argv)
+
+    print(f"{'容量':>10} {'np.roll/样本':>14} {'环形/样本':>12} {'取视图':>10} {'稳定分配':>10}")
+    for size in args.sizes:
+        roll = bench_roll(size)
+        append_time, view_time, allocated = bench_ring(size)
+        print(f"{size:>10} {roll * 1e6:>12.2f}us {append_time * 1e6:>10.2f}us "
+              f"{view_time * 1e6:>8.2f}us {allocated:>9}B")
+
+
+if __name__ == "__main__":
+    main()
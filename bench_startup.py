@@ -0,0 +1,109 @@
+"""
+界面冷启动性能测试
+
+多次以子进程方式启动 main.py，测量：
+    进程启动到第一次绘制（first_paint）
+    进程启动到可视化组件创建完成（viz_ready）
+并报告中位数与最小值。可与基准文件比较，超过阈值时返回非零退出码：
+
+    python bench_startup.py --runs 10 --save bench_startup.json
+    python bench_startup.py --runs 10 --baseline bench_startup.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROBE_PREFIX = 'NAVE_STARTUP '
+
+
+def install_probe(app, window, start):
+    """在 main.py 中安装测量探针：记录第一次绘制和可视化就绪的时间后退出"""
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+
+    result = {'import_ms': (time.perf_counter() - start) * 1000}
+
+    def report_when_ready():
+        if window.attitude_plot is None:
+            QTimer.singleShot(1, report_when_ready)
+            return
+        result['viz_ready_ms'] = (time.perf_counter() - start) * 1000
+        # 一次写入整行，避免与其他线程的输出交错
+        sys.stdout.write(PROBE_PREFIX + json.dumps(result) + '\n')
+        sys.stdout.flush()
+        app.quit()
+
+    class FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and 'first_paint_ms' not in result:
+                result['first_paint_ms'] = (time.perf_counter() - start) * 1000
+                app.removeEventFilter(self)
+                QTimer.singleShot(0, report_when_ready)
+            return False
+
+    window._startup_probe = FirstPaintFilter()
+    app.installEventFilter(window._startup_probe)
+
+
+def run_once(script):
+    """启动一次 main.py，返回测量结果（毫秒）"""
+    env = dict(os.environ, NAVE_STARTUP_PROBE='1')
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    proc = subprocess.Popen([sys.executable, script], env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True)
+    result = None
+    for line in proc.stdout:
+        index = line.find(PROBE_PREFIX)
+        if index >= 0:
+            result, _ = json.JSONDecoder().raw_decode(line[index + len(PROBE_PREFIX):])
+    proc.wait(timeout=30)
+    if result is None:
+        raise RuntimeError("main.py 未报告启动时间")
+    return result
+
+
+def summarize(runs):
+    keys = runs[0].keys()
+    return {key: {'median': statistics.median(r[key] for r in runs),
+                  'min': min(r[key] for r in runs)} for key in keys}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="界面冷启动性能测试")
+    parser.add_argument('--runs', type=int, default=5, help="启动次数（默认 5）")
+    parser.add_argument('--script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'))
+    parser.add_argument('--save', metavar='FILE', help="把结果保存为基准文件")
+    parser.add_argument('--baseline', metavar='FILE', help="与基准文件比较")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="允许的相对退化（默认 0.2，即 20%%）")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.script) for _ in range(args.runs)]
+    summary = summarize(runs)
+    for key, value in summary.items():
+        print(f"{key:>24}: 中位数 {value['median']:8.1f} ms   最小 {value['min']:8.1f} ms")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressed = False
+        for key, value in summary.items():
+            if key not in baseline:
+                continue
+            limit = baseline[key]['median'] * (1 + args.tolerance)
+            if value['median'] > limit:
+                print(f"性能退化: {key} {value['median']:.1f} ms > {limit:.1f} ms")
+                regressed = True
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
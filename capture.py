@@ -0,0 +1,267 @@
+"""
+界面截图与录像
+
+按固定帧率把船体姿态组件和曲线图离屏渲染到同一张 QImage 中（在界面线程中，每帧几毫秒），
+编码和写文件在后台线程中完成：PNG 图片序列，或者通过管道交给本机的 ffmpeg 编码为 MP4。
+帧队列有上限，编码跟不上时不再提交新的画面（并计数），不会阻塞界面；写入时用上一帧补齐这些帧，
+录像时长仍与实际时间一致。采集在串口线程中进行，与录像无关，不会丢失样本。
+
+只录制两个组件而不是整个桌面，帧小、CPU 占用低，文件也小得多。
+"""
+import os
+import queue
+import shutil
+import subprocess
+import time
+
+from PyQt5.QtCore import QObject, QPoint, Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QWidget
+
+
+def find_ffmpeg():
+    """本机 ffmpeg 的路径（可用环境变量 NAVE_FFMPEG 指定），没有时返回 None"""
+    return shutil.which(os.environ.get('NAVE_FFMPEG') or 'ffmpeg')
+
+
+def render_panels(widgets):
+    """把若干组件从左到右离屏渲染到一张图片中，宽高取偶数（视频编码要求）"""
+    width = sum(widget.width() for widget in widgets)
+    height = max(widget.height() for widget in widgets)
+    image = QImage(width + width % 2, height + height % 2, QImage.Format_RGB32)
+    image.fill(QColor(255, 255, 255))
+    painter = QPainter(image)
+    x = 0
+    for widget in widgets:
+        # pyqtgraph 的 GraphicsView 重载了 render()，这里统一使用 QWidget 的实现
+        QWidget.render(widget, painter, QPoint(x, 0))
+        x += widget.width()
+    painter.end()
+    return image
+
+
+class PngSequenceWriter:
+    """写入 PNG 图片序列 frame_000001.png, frame_000002.png, ...（编号从 first 开始）"""
+
+    def __init__(self, directory, first=1):
+        self.path = directory
+        self.first = first
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, image):
+        path = os.path.join(self.path, f"frame_{self.first + self.count:06d}.png")
+        self.count += 1
+        if not image.save(path, 'PNG'):
+            raise OSError(f"无法写入 {path}")
+
+    def close(self):
+        pass
+
+
+class ImageFileWriter:
+    """单张截图"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def write(self, image):
+        if not image.save(self.path):
+            raise OSError(f"无法写入 {self.path}")
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class FfmpegWriter:
+    """把原始帧通过管道交给 ffmpeg 编码为 H.264 视频；帧尺寸以第一帧为准，之后的帧缩放到该尺寸"""
+
+    def __init__(self, path, fps, ffmpeg=None):
+        self.path = path
+        self.fps = fps
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+        if self.ffmpeg is None:
+            raise OSError("没有找到 ffmpeg")
+        self.count = 0
+        self.size = None
+        self._process = None
+
+    def _start(self, size):
+        self.size = size
+        self._process = subprocess.Popen(
+            [self.ffmpeg, '-y', '-loglevel', 'error',
+             '-f', 'rawvideo', '-pix_fmt', 'bgra',
+             '-s', f"{size.width()}x{size.height()}", '-r', str(self.fps), '-i', '-',
+             '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', self.path],
+            stdin=subprocess.PIPE)
+
+    def write(self, image):
+        if self._process is None:
+            self._start(image.size())
+        if image.size() != self.size:
+            image = image.scaled(self.size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        # Format_RGB32 在内存中按 B, G, R, 0xFF 排列，每行没有填充
+        image = image.convertToFormat(QImage.Format_RGB32)
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        try:
+            self._process.stdin.write(bytes(bits))
+        except BrokenPipeError:
+            raise OSError("ffmpeg 已退出") from None
+        self.count += 1
+
+    def close(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self._process.wait() != 0:
+            raise OSError(f"ffmpeg 退出码 {self._process.returncode}")
+
+
+class CaptureWriterThread(QThread):
+    """
+    在后台线程中把帧交给写入器（PNG / ffmpeg）
+
+    队列已满时丢弃的帧不会从录像中消失：写入时用之前最后一个被接受的帧补上，帧数不变。
+    """
+    finished_capture = pyqtSignal(str, int, int)  # 输出路径, 帧数, 用上一帧补齐的帧数
+    failed = pyqtSignal(str)
+
+    def __init__(self, writer, max_pending=30, parent=None):
+        super().__init__(parent)
+        self.writer = writer
+        # 队列元素为 (之前需要重复上一帧的次数, 图片)
+        self.frames = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        # 上次被接受之后丢弃的帧数（只在提交帧的线程中修改）
+        self._owed = 0
+        self._stopping = False
+
+    def submit(self, image):
+        """提交一帧；队列已满时丢弃并返回 False（写入时用上一帧补齐），不会阻塞调用者"""
+        try:
+            self.frames.put_nowait((self._owed, image))
+        except queue.Full:
+            self.dropped += 1
+            self._owed += 1
+            return False
+        self._owed = 0
+        return True
+
+    def finish(self):
+        """写完已提交的帧后结束线程"""
+        self._stopping = True
+
+    def run(self):
+        # 编码不如采集和界面紧急
+        self.setPriority(QThread.LowPriority)
+        last = None
+        try:
+            try:
+                while not (self._stopping and self.frames.empty()):
+                    try:
+                        owed, image = self.frames.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    self._repeat(last, owed)
+                    self.writer.write(image)
+                    last = image
+                # finish() 之后不再提交，最后丢弃的帧用最后一帧补齐
+                self._repeat(last, self._owed)
+            finally:
+                self.writer.close()
+        except OSError as e:
+            self.failed.emit(f"录制失败: {e}")
+            return
+        self.finished_capture.emit(self.writer.path, self.writer.count, self.dropped)
+
+    def _repeat(self, image, count):
+        if image is not None:
+            for _ in range(count):
+                self.writer.write(image)
+
+
+class PanelRecorder(QObject):
+    """
+    按固定帧率录制若干组件
+
+    界面线程中只做离屏渲染；某一帧来晚了（界面繁忙）时重复提交上一帧补齐，
+    编码跟不上而被丢弃的帧由写入线程补齐，录像的时长与实际时间一致。
+    """
+
+    def __init__(self, widgets, fps=10, parent=None):
+        super().__init__(parent)
+        self.widgets = list(widgets)
+        self.fps = fps
+        self.thread = None
+        self.frames = 0
+        self._started = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self.capture)
+
+    def is_recording(self):
+        return self._timer.isActive()
+
+    def start(self, path, ffmpeg=None):
+        """
+        开始录制，返回实际的输出路径
+
+        有 ffmpeg 时写入 path + '.mp4'，否则写入 PNG 序列目录 path；ffmpeg='' 时总是写入 PNG 序列。
+        """
+        if ffmpeg is None:
+            ffmpeg = find_ffmpeg()
+        if ffmpeg:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            writer = FfmpegWriter(path + '.mp4', self.fps, ffmpeg)
+        else:
+            writer = PngSequenceWriter(path)
+        self.thread = CaptureWriterThread(writer, max_pending=2 * self.fps, parent=self)
+        self.thread.start()
+        self.frames = 0
+        self._started = time.monotonic()
+        self._timer.start(int(1000 / self.fps))
+        self.capture()
+        return writer.path
+
+    def stop(self):
+        """停止录制，返回后台线程（写完剩余帧后发出 finished_capture）"""
+        self._timer.stop()
+        thread = self.thread
+        if thread is not None:
+            thread.finish()
+        return thread
+
+    def capture(self):
+        """渲染一帧并提交；定时器提前触发时跳过，落后时重复提交同一帧（最多补一秒）"""
+        due = int((time.monotonic() - self._started) * self.fps) + 1
+        repeat = min(due - self.frames, self.fps)
+        if repeat <= 0:
+            return
+        image = render_panels(self.widgets)
+        for _ in range(repeat):
+            self.thread.submit(image)
+        self.frames += repeat
+
+
+def save_screenshot(widgets, path, parent=None):
+    """把若干组件的截图在后台线程中保存为图片，返回写入线程"""
+    thread = CaptureWriterThread(ImageFileWriter(path), max_pending=1, parent=parent)
+    thread.submit(render_panels(widgets))
+    thread.finish()
+    thread.start()
+    return thread
+
+
+def default_capture_path(prefix):
+    """截图/录像的默认路径：环境变量 NAVE_CAPTURE_DIR（默认为程序目录下的 captures）下按时间命名"""
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'captures')
+    directory = os.environ.get('NAVE_CAPTURE_DIR') or default
+    return os.path.join(directory, time.strftime(f"{prefix}-%Y%m%d-%H%M%S"))
+
@@ -0,0 +1,289 @@
+"""
+最小/最大值降采样金字塔
+
+长时间的历史数据不可能每帧把全部点交给 pyqtgraph。金字塔最底层每 base 个样本
+合并为一个桶，往上每层再把 factor 个桶合并为一个，每个桶保存时间范围和各通道的
+最小/最大值。绘图时按可见范围选择每个像素约一个桶的层级，尖峰永远不会丢失。
+缺失的样本（NaN）不参与最小/最大值（np.fmin/np.fmax），只有整个桶都缺失时桶才是 NaN。
+
+每层数据按 (起点, 终点) / (最小值, 最大值) 交错保存，取某一段直接是连续切片，
+可以不复制地交给 pyqtgraph。金字塔随样本到达增量构建，新样本只触及每层末尾。
+"""
+import numpy as np
+
+
+def minmax_decimate(x, columns, max_points):
+    """
+    对一段原始数据临时做最小/最大值降采样，使点数不超过约 max_points
+
+    columns 为 {通道: 数组}；点数本来就不多时原样返回。
+    """
+    n = len(x)
+    if n <= max_points:
+        return x, columns
+    size = -(-n // max(1, max_points // 2))
+    buckets = n // size
+    full = buckets * size
+    # 不足一个桶的剩余部分单独作为最后一个桶
+    tail = 1 if full < n else 0
+    out_x = np.empty(2 * (buckets + tail))
+    blocks = np.asarray(x[:full]).reshape(buckets, size)
+    out_x[0:2 * buckets:2] = blocks[:, 0]
+    out_x[1:2 * buckets:2] = blocks[:, -1]
+    if tail:
+        out_x[-2:] = x[full], x[n - 1]
+    out = {}
+    for channel, values in columns.items():
+        blocks = np.asarray(values[:full]).reshape(buckets, size)
+        reduced = np.empty(len(out_x))
+        reduced[0:2 * buckets:2] = np.fmin.reduce(blocks, axis=1)
+        reduced[1:2 * buckets:2] = np.fmax.reduce(blocks, axis=1)
+        if tail:
+            rest = values[full:]
+            reduced[-2:] = np.fmin.reduce(rest), np.fmax.reduce(rest)
+        out[channel] = reduced
+    return out_x, out
+
+
+class _GrowArray:
+    """容量按倍数增长的一维数组，view() 返回已写入部分的视图"""
+
+    def __init__(self, capacity=1024, dtype=np.float64):
+        self._data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        n = len(values)
+        if self.size + n > len(self._data):
+            capacity = max(len(self._data) * 2, self.size + n)
+            data = np.empty(capacity, dtype=self._data.dtype)
+            data[:self.size] = self._data[:self.size]
+            self._data = data
+        self._data[self.size:self.size + n] = values
+        self.size += n
+
+    def view(self, start=0, stop=None):
+        stop = self.size if stop is None else min(stop, self.size)
+        return self._data[start:stop]
+
+
+class _Level:
+    """金字塔的一层：交错保存的桶时间范围与各通道最小/最大值"""
+
+    def __init__(self, bucket_size, channels):
+        self.bucket_size = bucket_size
+        self.x = _GrowArray()
+        self.y = {channel: _GrowArray() for channel in channels}
+
+    def __len__(self):
+        return self.x.size // 2
+
+    def add(self, x_pairs, y_pairs):
+        """追加若干个桶，参数为交错的 (起点, 终点) 与 (最小值, 最大值)"""
+        self.x.extend(x_pairs)
+        for channel, pairs in y_pairs.items():
+            self.y[channel].extend(pairs)
+
+    def bucket_range(self, x_start, x_end):
+        """与 [x_start, x_end] 有重叠的桶序号范围 [first, last)"""
+        x = self.x.view()
+        ends = x[1::2]
+        starts = x[0::2]
+        first = int(np.searchsorted(ends, x_start, side='left'))
+        last = int(np.searchsorted(starts, x_end, side='right'))
+        return first, max(first, last)
+
+
+def _reduce_buckets(x_pairs, y_pairs, factor):
+    """把每 factor 个相邻桶合并为一个，只处理完整的部分，返回 (x, {通道: y}) 或 None"""
+    n = (len(x_pairs) // 2) // factor
+    if n == 0:
+        return None
+    used = n * factor * 2
+    x = x_pairs[:used].reshape(n, factor * 2)
+    out_x = np.empty(2 * n)
+    out_x[0::2] = x[:, 0]
+    out_x[1::2] = x[:, -1]
+    out_y = {}
+    for channel, pairs in y_pairs.items():
+        y = pairs[:used].reshape(n, factor, 2)
+        reduced = np.empty(2 * n)
+        reduced[0::2] = np.fmin.reduce(y[:, :, 0], axis=1)
+        reduced[1::2] = np.fmax.reduce(y[:, :, 1], axis=1)
+        out_y[channel] = reduced
+    return out_x, out_y
+
+
+class MinMaxPyramid:
+    """
+    多分辨率最小/最大值金字塔
+
+    第 k 层（k 从 0 开始）每个桶包含 base * factor**k 个原始样本。
+    样本通过 append()/extend() 按时间顺序增量加入。
+    """
+
+    def __init__(self, channels, base=16, factor=4):
+        self.channels = tuple(channels)
+        self.base = base
+        self.factor = factor
+        self.levels = []
+        # 尚未凑满第 0 层一个桶的原始样本
+        self._raw_x = np.empty(base)
+        self._raw = {channel: np.empty(base) for channel in self.channels}
+        self._raw_count = 0
+        self.count = 0
+
+    def append(self, x, *values):
+        """追加一个样本，values 按通道顺序给出"""
+        i = self._raw_count
+        self._raw_x[i] = x
+        for channel, value in zip(self.channels, values):
+            self._raw[channel][i] = value
+        self._raw_count = i + 1
+        self.count += 1
+        if self._raw_count == self.base:
+            self._flush_raw(self._raw_x, self._raw, self.base)
+            self._raw_count = 0
+
+    def extend(self, x, *columns):
+        """批量追加样本"""
+        x = np.asarray(x, dtype=np.float64)
+        n = len(x)
+        if n == 0:
+            return
+        columns = [np.asarray(column, dtype=np.float64) for column in columns]
+        self.count += n
+        if self._raw_count:
+            # 先补齐上次剩下的不完整桶
+            take = min(n, self.base - self._raw_count)
+            i = self._raw_count
+            self._raw_x[i:i + take] = x[:take]
+            for channel, column in zip(self.channels, columns):
+                self._raw[channel][i:i + take] = column[:take]
+            self._raw_count += take
+            x = x[take:]
+            columns = [column[take:] for column in columns]
+            if self._raw_count < self.base:
+                return
+            self._flush_raw(self._raw_x, self._raw, self.base)
+            self._raw_count = 0
+
+        full = (len(x) // self.base) * self.base
+        if full:
+            self._flush_raw(x[:full], dict(zip(self.channels, (c[:full] for c in columns))), full)
+        rest = len(x) - full
+        if rest:
+            self._raw_x[:rest] = x[full:]
+            for channel, column in zip(self.channels, columns):
+                self._raw[channel][:rest] = column[full:]
+            self._raw_count = rest
+
+    def _flush_raw(self, x, values, n):
+        """把 n（base 的整数倍）个原始样本合并为第 0 层的桶并向上传递"""
+        buckets = n // self.base
+        x = x[:n].reshape(buckets, self.base)
+        x_pairs = np.empty(2 * buckets)
+        x_pairs[0::2] = x[:, 0]
+        x_pairs[1::2] = x[:, -1]
+        y_pairs = {}
+        for channel in self.channels:
+            y = values[channel][:n].reshape(buckets, self.base)
+            pairs = np.empty(2 * buckets)
+            pairs[0::2] = np.fmin.reduce(y, axis=1)
+            pairs[1::2] = np.fmax.reduce(y, axis=1)
+            y_pairs[channel] = pairs
+        self._add(0, x_pairs, y_pairs)
+
+    def _add(self, k, x_pairs, y_pairs):
+        if k == len(self.levels):
+            self.levels.append(_Level(self.base * self.factor ** k, self.channels))
+        level = self.levels[k]
+        level.add(x_pairs, y_pairs)
+        # 上一层已经合并到的桶数
+        merged = len(self.levels[k + 1]) * self.factor if k + 1 < len(self.levels) else 0
+        pending_x = level.x.view(2 * merged)
+        if len(pending_x) // 2 < self.factor:
+            return
+        pending_y = {channel: level.y[channel].view(2 * merged) for channel in self.channels}
+        reduced = _reduce_buckets(pending_x, pending_y, self.factor)
+        if reduced is not None:
+            self._add(k + 1, *reduced)
+
+    def choose_level(self, sample_count, max_points):
+        """
+        为可见的 sample_count 个样本选择层级
+
+        最底层的桶数也不到 max_points / 2 时返回 -1，此时应直接使用原始数据
+        （必要时用 minmax_decimate 临时降采样）。
+        """
+        if sample_count / self.base < max_points / 2:
+            return -1
+        k = 0
+        while k + 1 < len(self.levels) and \
+                sample_count / (self.base * self.factor ** k) > max_points / 2:
+            k += 1
+        return k if k < len(self.levels) else -1
+
+    def estimate_count(self, x_start, x_end):
+        """估计 [x_start, x_end] 内的原始样本数"""
+        if not self.levels:
+            return self.count
+        first, last = self.levels[0].bucket_range(x_start, x_end)
+        return (last - first) * self.base + self._raw_count
+
+    def query(self, x_start, x_end, max_points, raw_available=True, channels=None):
+        """
+        取 [x_start, x_end] 范围内约 max_points 个点的降采样数据
+
+        返回 (x, {通道: y})，channels 为 None 时包括全部通道；范围内原始样本不超过 max_points
+        且 raw_available 时返回 None，由调用者直接使用原始数据。只涉及一层时返回的是不复制的视图。
+        """
+        channels = self.channels if channels is None else channels
+        if not self.levels:
+            return None
+        k = self.choose_level(self.estimate_count(x_start, x_end), max_points)
+        if k < 0:
+            if raw_available:
+                return None
+            k = 0
+
+        level = self.levels[k]
+        first, last = level.bucket_range(x_start, x_end)
+        segments_x = [level.x.view(2 * first, 2 * last)]
+        segments_y = {channel: [level.y[channel].view(2 * first, 2 * last)]
+                      for channel in channels}
+
+        # 范围延伸到最新数据时，第 k 层末尾之后的部分还在更细的层里，逐层补上，最后补原始样本
+        if last == len(level):
+            covered = len(level) * level.bucket_size
+            for j in range(k - 1, -1, -1):
+                finer = self.levels[j]
+                start = covered // finer.bucket_size
+                if start < len(finer):
+                    segments_x.append(finer.x.view(2 * start))
+                    for channel in channels:
+                        segments_y[channel].append(finer.y[channel].view(2 * start))
+                    covered = len(finer) * finer.bucket_size
+            if self._raw_count:
+                segments_x.append(self._raw_x[:self._raw_count])
+                for channel in channels:
+                    segments_y[channel].append(self._raw[channel][:self._raw_count])
+
+        if len(segments_x) == 1:
+            return segments_x[0], {channel: ys[0] for channel, ys in segments_y.items()}
+        return (np.concatenate(segments_x),
+                {channel: np.concatenate(ys) for channel, ys in segments_y.items()})
+
+    def x_range(self):
+        """全部数据的时间范围，没有数据时返回 None"""
+        if self.levels:
+            start = self.levels[0].x.view(0, 1)[0]
+        elif self._raw_count:
+            start = self._raw_x[0]
+        else:
+            return None
+        if self._raw_count:
+            end = self._raw_x[self._raw_count - 1]
+        else:
+            end = self.levels[0].x.view()[-1]
+        return float(start), float(end)
@@ -0,0 +1,277 @@
+"""
+历史数据导出
+
+把一段时间范围内的样本写入 CSV、压缩 NPZ 或 HDF5 文件。数据来源是磁盘记录
+（内存映射，不整体载入内存）加上环形缓冲中尚未落盘的最新样本；写入按块进行，
+每块之后报告进度并检查是否取消，因此可以放在后台线程中运行，不阻塞界面和采集。
+
+    NPZ   每个通道一个 .npy 成员，逐块压缩写入 zip，np.load 可直接读取
+    HDF5  需要安装 h5py（可选依赖），每个通道一个分块压缩的数据集
+    CSV   表头为通道名（t,heading,ir,...），时间为 Unix 秒
+
+导出的通道为数据源中的全部通道（时间 t 加上数据格式中的各通道，见 schema.py）。
+"""
+import importlib.util
+import math
+import os
+import zipfile
+
+import numpy as np
+from PyQt5.QtCore import QDateTime, QThread, pyqtSignal
+from PyQt5.QtWidgets import (QComboBox, QDateTimeEdit, QDialog, QDialogButtonBox,
+                             QGridLayout, QHBoxLayout, QLabel, QPushButton)
+
+# 数据源为空时导出的通道
+CHANNELS = ('t', 'heading', 'ir')
+# 每块的样本数
+CHUNK_SIZE = 1 << 16
+# 文件扩展名对应的格式
+EXTENSIONS = {'.csv': 'csv', '.npz': 'npz', '.h5': 'hdf5', '.hdf5': 'hdf5'}
+# 格式在文件对话框中的过滤器
+FILE_FILTERS = {'csv': "CSV 文件 (*.csv)", 'npz': "压缩 NPZ 文件 (*.npz)",
+                'hdf5': "HDF5 文件 (*.h5 *.hdf5)"}
+# CSV 中时间与其他通道的数值格式
+CSV_TIME_FORMAT = '%.6f'
+CSV_VALUE_FORMAT = '%.3f'
+
+
+class ExportCancelled(Exception):
+    """导出被取消"""
+
+
+def available_formats():
+    """当前环境可用的导出格式"""
+    formats = ['csv', 'npz']
+    if importlib.util.find_spec('h5py') is None:
+        return formats
+    return formats + ['hdf5']
+
+
+def format_for_path(path):
+    """按扩展名判断格式"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError(f"不支持的导出格式: {ext or path}，可用扩展名: {', '.join(EXTENSIONS)}")
+    return EXTENSIONS[ext]
+
+
+class ExportSource:
+    """
+    一段时间范围内的样本，由若干段按时间顺序排列的列数据组成
+
+    每段是 {通道: 数组}，时间为 Unix 秒。磁盘段是内存映射切片，只在写入时按块读取。
+    """
+
+    def __init__(self, segments):
+        segments = list(segments)
+        self.segments = [segment for segment in segments if len(segment['t'])]
+        # 时间列在前，其余通道按数据源中的顺序
+        first = segments[0] if segments else dict.fromkeys(CHANNELS)
+        self.channels = ('t',) + tuple(channel for channel in first if channel != 't')
+
+    def __len__(self):
+        return sum(len(segment['t']) for segment in self.segments)
+
+    @classmethod
+    def from_store(cls, store, t_start, t_end):
+        """
+        从样本历史（sample_store.HistoryStore）中取 [t_start, t_end]（Unix 秒）的样本
+
+        需要在界面线程中调用：环形缓冲中的部分会被复制，磁盘部分只是内存映射切片。
+        """
+        if store.t0 is None:
+            return cls([])
+        segments = store.segments(t_start - store.t0, t_end - store.t0, unix=True)
+        return cls([{channel: column if isinstance(column, np.memmap) else column.copy()
+                     for channel, column in segment.items()}
+                    for segment in segments])
+
+    def chunks(self, channels=None, size=CHUNK_SIZE):
+        """按块产生 {通道: 数组}，channels 默认为全部通道"""
+        channels = self.channels if channels is None else channels
+        for segment in self.segments:
+            length = len(segment['t'])
+            for start in range(0, length, size):
+                yield {channel: np.asarray(segment[channel][start:start + size], dtype=np.float64)
+                       for channel in channels}
+
+
+def export(source, path, fmt=None, progress=None, cancelled=None, chunk_size=CHUNK_SIZE):
+    """
+    把 source 写入 path，返回写入的样本数
+
+    progress(done, total) 在每块之后调用（单位为 样本数 × 通道数）；
+    cancelled() 返回真时中止并删除未完成的文件。
+    """
+    fmt = fmt or format_for_path(path)
+    writer = {'csv': _write_csv, 'npz': _write_npz, 'hdf5': _write_hdf5}.get(fmt)
+    if writer is None:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    total = len(source)
+    done = 0
+
+    def chunks(channels=source.channels):
+        nonlocal done
+        for chunk in source.chunks(channels, chunk_size):
+            if cancelled is not None and cancelled():
+                raise ExportCancelled()
+            yield chunk
+            done += len(chunk[channels[0]]) * len(channels)
+            if progress is not None:
+                progress(done, total * len(source.channels))
+
+    # 先写入临时文件，完成后再改名，取消或出错时不会留下不完整的文件
+    partial = path + '.part'
+    try:
+        writer(partial, source.channels, total, chunks)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return total
+
+
+def _write_csv(path, channels, total, chunks):
+    row_format = ','.join([CSV_TIME_FORMAT] + [CSV_VALUE_FORMAT] * (len(channels) - 1)) + '\n'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(channels) + '\n')
+        for chunk in chunks():
+            rows = np.column_stack([chunk[channel] for channel in channels])
+            f.write((row_format * len(rows)) % tuple(rows.ravel().tolist()))
+
+
+def _write_npz(path, channels, total, chunks):
+    # zip 中同一时间只能写一个成员，所以逐个通道读一遍数据源，每个通道一个 .npy 成员：
+    # 先写头（长度已知），再逐块追加压缩数据
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED,
+                         compresslevel=1, allowZip64=True) as zf:
+        for channel in channels:
+            with zf.open(channel + '.npy', 'w', force_zip64=True) as member:
+                np.lib.format.write_array_header_2_0(
+                    member, {'descr': '<f8', 'fortran_order': False, 'shape': (total,)})
+                for chunk in chunks((channel,)):
+                    member.write(chunk[channel].astype('<f8', copy=False).tobytes())
+
+
+def _write_hdf5(path, channels, total, chunks):
+    try:
+        import h5py
+    except ImportError:
+        raise ValueError("导出 HDF5 需要安装 h5py") from None
+    from schema import CHANNELS as KNOWN_CHANNELS
+    with h5py.File(path, 'w') as f:
+        datasets = {channel: f.create_dataset(channel, shape=(total,), dtype='<f8',
+                                              chunks=(min(max(total, 1), CHUNK_SIZE),),
+                                              compression='lzf')
+                    for channel in channels}
+        f['t'].attrs['units'] = 's'
+        for channel in channels[1:]:
+            if channel in KNOWN_CHANNELS:
+                f[channel].attrs['units'] = KNOWN_CHANNELS[channel].unit.replace('°', 'deg')
+        start = 0
+        for chunk in chunks():
+            end = start + len(chunk['t'])
+            for channel, dataset in datasets.items():
+                dataset[start:end] = chunk[channel]
+            start = end
+
+
+class ExportThread(QThread):
+    """在后台线程中导出，进度以千分比报告"""
+    progress = pyqtSignal(int)
+    finished_export = pyqtSignal(str, int)  # 文件路径, 样本数
+    failed = pyqtSignal(str)
+
+    def __init__(self, source, path, fmt=None, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.path = path
+        self.fmt = fmt
+        self._cancelled = False
+        self._reported = -1
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _progress(self, done, total):
+        permille = 1000 * done // total if total else 1000
+        if permille != self._reported:
+            self._reported = permille
+            self.progress.emit(permille)
+
+    def run(self):
+        # 导出不如采集紧急
+        self.setPriority(QThread.LowPriority)
+        try:
+            count = export(self.source, self.path, self.fmt, progress=self._progress,
+                           cancelled=lambda: self._cancelled)
+        except ExportCancelled:
+            self.failed.emit("导出已取消")
+        except (OSError, ValueError) as e:
+            self.failed.emit(f"导出失败: {e}")
+        except Exception as e:
+            # 其他错误（h5py、内存不足等）也必须通知界面，否则对话框一直等待；未完成的文件已由 export() 删除
+            self.failed.emit(f"导出失败: {type(e).__name__}: {e}")
+        else:
+            self.finished_export.emit(self.path, count)
+
+
+def _to_datetime(t, round_up=False):
+    """Unix 秒转为毫秒精度的 QDateTime；结束时间向上取整，不会漏掉最后一个样本"""
+    msecs = math.ceil(t * 1000) if round_up else math.floor(t * 1000)
+    return QDateTime.fromMSecsSinceEpoch(msecs)
+
+
+class ExportDialog(QDialog):
+    """选择导出的时间范围和格式"""
+
+    def __init__(self, data_range, view_range=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("导出数据")
+        self.data_range = data_range
+        layout = QGridLayout(self)
+
+        self.start_edit = QDateTimeEdit()
+        self.end_edit = QDateTimeEdit()
+        for row, (name, edit) in enumerate((("开始时间:", self.start_edit),
+                                            ("结束时间:", self.end_edit))):
+            edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss.zzz")
+            edit.setDateTimeRange(_to_datetime(data_range[0]), _to_datetime(data_range[1], True))
+            layout.addWidget(QLabel(name), row, 0)
+            layout.addWidget(edit, row, 1)
+
+        range_layout = QHBoxLayout()
+        all_btn = QPushButton("全部数据")
+        all_btn.clicked.connect(lambda: self.set_range(*self.data_range))
+        range_layout.addWidget(all_btn)
+        if view_range is not None:
+            view_btn = QPushButton("当前视图")
+            view_btn.clicked.connect(lambda: self.set_range(*view_range))
+            range_layout.addWidget(view_btn)
+        layout.addLayout(range_layout, 2, 1)
+
+        layout.addWidget(QLabel("格式:"), 3, 0)
+        self.format_combo = QComboBox()
+        for fmt in available_formats():
+            self.format_combo.addItem(FILE_FILTERS[fmt], fmt)
+        layout.addWidget(self.format_combo, 3, 1)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons, 4, 0, 1, 2)
+
+        self.set_range(*(view_range or data_range))
+
+    def set_range(self, t_start, t_end):
+        self.start_edit.setDateTime(_to_datetime(t_start))
+        self.end_edit.setDateTime(_to_datetime(t_end, True))
+
+    def time_range(self):
+        """选择的时间范围（Unix 秒）"""
+        return (self.start_edit.dateTime().toMSecsSinceEpoch() / 1000.0,
+                self.end_edit.dateTime().toMSecsSinceEpoch() / 1000.0)
+
+    def format(self):
+        return self.format_combo.currentData()
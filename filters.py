@@ -0,0 +1,140 @@
+"""
+航向/红外方位角滤波（不依赖 Qt）
+
+    HeadingKalman   航向角的匀速模型卡尔曼滤波（状态为角度和角速度），
+                    新息按最短弧计算，跨越 0/360 度不会产生跳变
+    CircularMedian  红外方位角的滑动中值滤波，去除单点野值；
+                    窗口内各样本相对当前样本的最短弧偏差取中值，同样不受 0/360 影响
+    FilterStage     把两者组合为一个按批处理的滤波级
+
+卡尔曼递推本身是逐样本顺序的，用 Python 浮点数循环实现；中值滤波整批向量化。
+"""
+import numpy as np
+
+from interpolation import shortest_arc
+
+
+class HeadingKalman:
+    """
+    航向角卡尔曼滤波
+
+    process_noise 为角加速度白噪声强度（度²/s³），measurement_noise 为测量噪声方差（度²）。
+    """
+
+    def __init__(self, process_noise=50.0, measurement_noise=4.0):
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.angle = None
+        self.rate = 0.0
+        self._t = None
+        # 协方差矩阵 [[p00, p01], [p01, p11]]
+        self._p00 = self._p01 = self._p11 = 0.0
+
+    def filter(self, timestamps, angles):
+        """滤波一批样本，返回 (滤波后角度, 角速度) 两个数组"""
+        n = len(angles)
+        out_angle = np.empty(n)
+        out_rate = np.empty(n)
+        if n == 0:
+            return out_angle, out_rate
+
+        q, r = self.q, self.r
+        angle, rate, t_last = self.angle, self.rate, self._t
+        p00, p01, p11 = self._p00, self._p01, self._p11
+        for i, (t, z) in enumerate(zip(np.asarray(timestamps, dtype=np.float64).tolist(),
+                                       np.asarray(angles, dtype=np.float64).tolist())):
+            if angle is None:
+                if z != z:
+                    # 还没有初始状态时缺失的样本无从预测
+                    out_angle[i] = out_rate[i] = np.nan
+                    continue
+                # 第一个样本直接作为初始状态，角速度未知
+                angle, rate = z, 0.0
+                p00, p01, p11 = r, 0.0, 100.0
+            else:
+                dt = t - t_last
+                if dt > 0:
+                    # 预测
+                    angle += rate * dt
+                    p00 += dt * (2 * p01 + dt * p11) + q * dt ** 3 / 3
+                    p01 += dt * p11 + q * dt ** 2 / 2
+                    p11 += q * dt
+                # 缺失的测量（NaN）只做预测，不更新，否则状态和协方差会一直是 NaN
+                if z == z:
+                    # 更新：新息取最短弧
+                    y = (z - angle + 180.0) % 360.0 - 180.0
+                    s = p00 + r
+                    k0 = p00 / s
+                    k1 = p01 / s
+                    angle += k0 * y
+                    rate += k1 * y
+                    p11 -= k1 * p01
+                    p01 -= k0 * p01
+                    p00 -= k0 * p00
+            angle %= 360.0
+            t_last = t
+            out_angle[i] = angle
+            out_rate[i] = rate
+
+        self.angle, self.rate, self._t = angle, rate, t_last
+        self._p00, self._p01, self._p11 = p00, p01, p11
+        return out_angle, out_rate
+
+
+class CircularMedian:
+    """因果滑动中值滤波（窗口为当前样本及之前的 size - 1 个样本）"""
+
+    def __init__(self, size=5):
+        self.size = int(size)
+        self._tail = np.empty(0)
+
+    def reset(self):
+        self._tail = np.empty(0)
+
+    def filter(self, angles):
+        angles = np.asarray(angles, dtype=np.float64)
+        n = len(angles)
+        if n == 0 or self.size <= 1:
+            return angles.copy()
+        history = self._tail
+        if len(history) < self.size - 1:
+            # 开始时之前的样本不足，用第一个样本补齐
+            fill = history[0] if len(history) else angles[0]
+            history = np.concatenate((np.full(self.size - 1 - len(history), fill), history))
+        data = np.concatenate((history, angles))
+        self._tail = data[-(self.size - 1):]
+        windows = np.lib.stride_tricks.sliding_window_view(data, self.size)[-n:]
+        if np.isfinite(data).all():
+            deviations = shortest_arc(angles[:, None], windows)
+            return (angles + np.median(deviations, axis=1)) % 360.0
+        # 有缺失的样本（NaN）时只对窗口内的有效样本取中值，参考角取最近的有效值；
+        # 窗口内全部缺失时输出 NaN
+        valid = np.isfinite(data)
+        index = np.maximum.accumulate(np.where(valid, np.arange(len(data)), -1))
+        reference = data[np.maximum(index, 0)][-n:]
+        deviations = shortest_arc(reference[:, None], windows)
+        empty = ~np.isfinite(windows).any(axis=1)
+        deviations[empty] = 0.0
+        out = (reference + np.nanmedian(deviations, axis=1)) % 360.0
+        out[empty] = np.nan
+        return out
+
+
+class FilterStage:
+    """航向卡尔曼 + 红外中值的按批滤波级"""
+
+    def __init__(self, process_noise=50.0, measurement_noise=4.0, median_size=5):
+        self.heading = HeadingKalman(process_noise, measurement_noise)
+        self.ir = CircularMedian(median_size)
+
+    def reset(self):
+        self.heading.reset()
+        self.ir.reset()
+
+    def process(self, timestamps, headings, irs):
+        """滤波一批样本，返回 (航向角, 航向角速度, 红外方位角) 三个数组"""
+        headings, rates = self.heading.filter(timestamps, headings)
+        return headings, rates, self.ir.filter(irs)
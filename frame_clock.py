@@ -0,0 +1,78 @@
+"""
+自适应帧时钟
+
+界面刷新由一个 QTimer 驱动：有数据流入时按显示刷新率（约 60 fps）触发，
+一段时间没有新数据后降到低频，窗口隐藏或最小化时进一步降低，
+空闲时几乎不占用 CPU。消费者连接 tick 信号，自行判断本帧是否需要重绘。
+"""
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class FrameClock(QObject):
+    """按数据活跃程度和窗口可见性调整间隔的帧定时器"""
+
+    tick = pyqtSignal()
+
+    def __init__(self, active_interval=16, idle_interval=250, hidden_interval=1000,
+                 idle_after=0.5, parent=None):
+        super().__init__(parent)
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.hidden_interval = hidden_interval
+        # 超过该时间（秒）没有新数据即视为空闲
+        self.idle_after = idle_after
+        self.visible = True
+        self._last_activity = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(idle_interval)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def start(self):
+        self._timer.start(self._target_interval())
+
+    def stop(self):
+        self._timer.stop()
+
+    def isActive(self):
+        return self._timer.isActive()
+
+    def interval(self):
+        """当前的触发间隔（毫秒）"""
+        return self._timer.interval()
+
+    def notify_activity(self):
+        """有新数据到达：需要时立即切换到高帧率"""
+        self._last_activity = time.monotonic()
+        if self.visible and self._timer.interval() != self.active_interval:
+            self._set_interval(self.active_interval)
+
+    def set_visible(self, visible):
+        """窗口显示/隐藏（或最小化）时调用"""
+        if visible == self.visible:
+            return
+        self.visible = visible
+        self._set_interval(self._target_interval())
+
+    def _target_interval(self):
+        if not self.visible:
+            return self.hidden_interval
+        last = self._last_activity
+        if last is not None and time.monotonic() - last <= self.idle_after:
+            return self.active_interval
+        return self.idle_interval
+
+    def _set_interval(self, interval):
+        # 定时器未启动时只记录间隔，不要意外启动它
+        if self._timer.isActive():
+            self._timer.start(interval)
+        else:
+            self._timer.setInterval(interval)
+
+    def _on_timeout(self):
+        self.tick.emit()
+        interval = self._target_interval()
+        if interval != self._timer.interval():
+            self._set_interval(interval)
@@ -0,0 +1,128 @@
+"""
+无界面采集模式
+
+不导入 PyQt5 / pyqtgraph，适用于没有显示器的记录设备：
+    python -m headless --port /dev/ttyUSB0 --baud 115200 --record run01
+"""
+import argparse
+import sys
+import time
+
+from acquisition import Acquisition
+from recording import RecordingWriter
+from schema import SCHEMAS
+from tracing import tracer
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m headless",
+                                     description="无界面串口采集与记录")
+    parser.add_argument('--port', help="串口名称，例如 COM3 或 /dev/ttyUSB0")
+    parser.add_argument('--baud', type=int, default=115200, help="波特率（默认 115200）")
+    parser.add_argument('--record', metavar='DIR', help="记录目录，不指定则只采集不记录")
+    parser.add_argument('--alarms', metavar='FILE', help="报警规则配置文件（JSON），报警写入记录")
+    parser.add_argument('--schema', choices=sorted(SCHEMAS), default='basic',
+                        help="数据格式（默认 basic：航向角,红外方位角；extended 另含俯仰、横滚、红外强度、目标编号）")
+    parser.add_argument('--stats-interval', type=float, default=1.0,
+                        help="统计信息输出间隔（秒，默认 1.0，0 表示不输出）")
+    parser.add_argument('--duration', type=float, default=0,
+                        help="采集时长（秒，默认 0 表示一直运行直到 Ctrl+C）")
+    parser.add_argument('--list-ports', action='store_true', help="列出可用串口后退出")
+    parser.add_argument('--verbose', action='store_true', help="打印每一行原始数据")
+    return parser
+
+
+def list_ports():
+    """列出可用串口（不依赖 Qt）"""
+    from serial.tools import list_ports as serial_list_ports
+    return sorted(set(port.device for port in serial_list_ports.comports()))
+
+
+def open_serial(port, baudrate):
+    """以与界面相同的参数打开串口"""
+    import serial
+    return serial.Serial(
+        port=port,
+        baudrate=baudrate,
+        bytesize=serial.EIGHTBITS,
+        parity=serial.PARITY_NONE,
+        stopbits=serial.STOPBITS_ONE,
+        timeout=1,
+        xonxoff=False,
+        rtscts=False,
+        dsrdtr=False
+    )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.list_ports:
+        for port in list_ports():
+            print(port)
+        return 0
+    if not args.port:
+        print("请用 --port 指定串口", file=sys.stderr)
+        return 2
+
+    if tracer.configure_from_env():
+        tracer.name_thread("采集线程")
+
+    try:
+        ser = open_serial(args.port, args.baud)
+    except Exception as e:
+        print(f"无法打开串口 {args.port}: {e}", file=sys.stderr)
+        return 1
+
+    schema = SCHEMAS[args.schema]
+    try:
+        recorder = (RecordingWriter(args.record, channels=('t',) + schema.names)
+                    if args.record else None)
+    except OSError as e:
+        print(f"无法创建记录 {args.record}: {e}", file=sys.stderr)
+        ser.close()
+        return 1
+    alarms = on_alarm = None
+    if args.alarms:
+        from alarms import AlarmEngine, format_event
+        try:
+            alarms = AlarmEngine.from_config(args.alarms, schema=schema)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"加载报警规则失败: {e}", file=sys.stderr)
+            if recorder is not None:
+                recorder.close()
+            ser.close()
+            return 1
+        on_alarm = lambda event: print("报警 " + format_event(event), flush=True)
+    acquisition = Acquisition(ser, recorder=recorder, verbose=args.verbose,
+                              alarms=alarms, on_alarm=on_alarm, schema=schema)
+    print(f"开始采集: {args.port}, 波特率 {args.baud}"
+          + (f", 记录到 {args.record}" if recorder else ""))
+
+    start = time.monotonic()
+    next_stats = start + args.stats_interval
+    try:
+        while True:
+            acquisition.poll()
+            now = time.monotonic()
+            if args.stats_interval > 0 and now >= next_stats:
+                print(acquisition.stats.summary(), flush=True)
+                next_stats = now + args.stats_interval
+            if args.duration and now - start >= args.duration:
+                break
+            time.sleep(0.01)
+    except KeyboardInterrupt:
+        print("采集已中断")
+    finally:
+        if recorder is not None:
+            recorder.close()
+        ser.close()
+        if tracer.enabled:
+            tracer.export()
+
+    print(acquisition.stats.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+角度运算与插值（不依赖 Qt）
+
+船体姿态按显示刷新率绘制，而不是按样本到达的频率：每帧取
+“当前时间 - 一个样本间隔” 时刻的角度，在最近两个带时间戳的样本之间沿最短弧线性插值。
+低采样率时指针平滑转动，高采样率时每帧只画一次；0/360 度的跨越按最短弧处理。
+"""
+import numpy as np
+
+
+def shortest_arc(a, b):
+    """从角度 a 转到 b 的最短有向角差，范围 [-180, 180)"""
+    return (b - a + 180.0) % 360.0 - 180.0
+
+
+def interpolate_angle(a, b, fraction):
+    """沿最短弧在 a 与 b 之间插值，结果归一化到 [0, 360)"""
+    return (a + shortest_arc(a, b) * fraction) % 360.0
+
+
+def unwrap_degrees(angles, previous=None, offset=0.0):
+    """
+    把一批角度展开为连续值（相邻样本按最短弧相连）
+
+    previous 为上一批最后一个原始角度，offset 为其展开值；返回展开后的数组。
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    if len(angles) == 0:
+        return angles
+    steps = np.empty(len(angles))
+    steps[0] = 0.0 if previous is None else (angles[0] - previous + 180.0) % 360.0 - 180.0
+    steps[1:] = (np.diff(angles) + 180.0) % 360.0 - 180.0
+    base = angles[0] if previous is None else offset
+    return base + np.cumsum(steps)
+
+
+class AngleInterpolator:
+    """
+    在最近两个样本之间按时间插值的角度
+
+    显示时刻比最新样本滞后一个样本间隔（不超过 max_lag 秒），因此总是内插，不会外推越过
+    最新样本；数据停止后停在最新值上。
+    """
+
+    def __init__(self, max_lag=0.5):
+        self.max_lag = max_lag
+        self._t0 = self._t1 = None
+        self._v0 = self._v1 = None
+
+    def reset(self, value):
+        """直接跳到 value，不做动画"""
+        self._t0 = self._t1 = None
+        self._v0 = self._v1 = value
+
+    def push(self, timestamp, value):
+        """加入一个新样本"""
+        self._t0, self._v0 = self._t1, self._v1
+        self._t1, self._v1 = timestamp, value
+
+    def extend(self, timestamps, values):
+        """加入一批样本，只有最后两个会参与插值"""
+        start = max(0, len(values) - 2)
+        for i in range(start, len(values)):
+            self.push(float(timestamps[i]), float(values[i]))
+
+    def lag(self):
+        """显示时刻相对当前时间的滞后（秒）"""
+        if self._t0 is None or self._t1 is None:
+            return 0.0
+        return min(max(self._t1 - self._t0, 0.0), self.max_lag)
+
+    def value_at(self, now):
+        """now 时刻应显示的角度，没有样本时返回 None"""
+        if self._t0 is None or self._v0 is None:
+            return self._v1
+        t = now - self.lag()
+        span = self._t1 - self._t0
+        if span <= 0 or t >= self._t1:
+            return self._v1
+        if t <= self._t0:
+            return self._v0
+        return interpolate_angle(self._v0, self._v1, (t - self._t0) / span)
+
+    def settled(self, now):
+        """动画是否已经停在最新值上"""
+        return self._t0 is None or now - self.lag() >= self._t1
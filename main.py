@@ -1,9 +1,18 @@
+import os
 import sys
+import time
+
+_START = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication
 from main_ui import MainWindow
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
+    # 启动性能测试（bench_startup.py）通过环境变量打开测量探针
+    if os.environ.get('NAVE_STARTUP_PROBE'):
+        from bench_startup import install_probe
+        install_probe(app, window, _START)
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
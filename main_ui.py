@@ -1,18 +1,33 @@
+import os
+import re
 import sys
-import serial
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QComboBox,
                              QGroupBox, QGridLayout, QLineEdit, QMessageBox,
-                             QTextEdit)
-from PyQt5.QtCore import QTimer
-import pyqtgraph as pg
+                             QCheckBox, QListWidget, QProgressBar, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer, QEvent
 
 # 导入自定义模块
-from serial_handler import SerialThread, get_available_ports
-from visualization import ShipAttitudeWidget, AttitudePlot
+# serial、pyqtgraph、numpy 和可视化模块在首次使用时才导入，缩短启动时间
+from serial_handler import SerialThread, PortScanThread
+from frame_clock import FrameClock
+from receive_log import ReceiveLogView
+from recording import FLUSH_EVERY, RecordingWriter, RecordingHistory, prune_sessions
+from schema import BASIC, get_schema
+from tracing import tracer
 
 
 class MainWindow(QMainWindow):
+    # 统计面板的刷新间隔（秒）
+    STATS_INTERVAL = 0.25
+    # 报警列表保留的事件条数
+    ALARM_HISTORY = 200
+    # 录像帧率
+    CAPTURE_FPS = 10
+    # 会话记录超过这个个数时提示清理
+    RECORD_KEEP = 10
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("船体姿态可视化")
@@ -20,6 +35,50 @@ class MainWindow(QMainWindow):
 
         self.serial_thread = None
         self.ser = None
+        self.port_scan_thread = None
+        # 本次运行的会话记录，同时作为曲线图的磁盘历史层
+        self.recorder = None
+
+        # 可视化组件在窗口首次显示后才创建
+        self.ship_widget = None
+        self.plot_widget = None
+        self.attitude_plot = None
+        self.spectrum = None
+        self.spectrogram_plot = None
+        self._startup_scheduled = False
+
+        # 最新的读数，由帧时钟每帧刷新一次到界面；_shown_readout 为已显示的值
+        self._latest_readout = None
+        self._shown_readout = None
+
+        # 航向/红外的滚动统计（与可视化组件一起创建），统计面板每 STATS_INTERVAL 秒刷新一次
+        self.stats = None
+        self.stats_panel = None
+        self._stats_shown_at = 0.0
+
+        # 可选的滤波级（航向卡尔曼 + 红外中值），启用时表盘和读数显示滤波后的值
+        self.filter_stage = None
+
+        # 正在运行的导出线程
+        self.export_thread = None
+        # 录像（capture.PanelRecorder，第一次录像时创建）和正在写入的截图/录像线程
+        self.panel_recorder = None
+        self._capture_threads = []
+
+        # 报警引擎（开始接收时按配置创建），_active_alarms 为当前处于报警状态的规则名
+        self.alarms = None
+        self._active_alarms = []
+
+        # 数据格式由环境变量 NAVE_SCHEMA 指定（basic / extended，默认 basic）
+        self.schema = BASIC
+        try:
+            self.schema = get_schema(os.environ.get('NAVE_SCHEMA') or 'basic')
+        except ValueError as e:
+            print(e)
+
+        # 根据环境变量启用样本追踪
+        if tracer.configure_from_env():
+            tracer.name_thread("界面线程")
         
         self.initUI()
 
@@ -39,7 +98,6 @@ class MainWindow(QMainWindow):
 
         serial_layout.addWidget(QLabel("串口:"), 0, 0)
         self.port_combo = QComboBox()
-        self.update_ports()
         serial_layout.addWidget(self.port_combo, 0, 1)
 
         serial_layout.addWidget(QLabel("波特率:"), 1, 0)
@@ -68,27 +126,76 @@ class MainWindow(QMainWindow):
         data_group = QGroupBox("数据显示")
         data_layout = QGridLayout(data_group)
 
-        data_layout.addWidget(QLabel("航向角:"), 0, 0)
-        self.heading_edit = QLineEdit("0.0")
-        self.heading_edit.setReadOnly(True)
-        data_layout.addWidget(self.heading_edit, 0, 1)
-
-        data_layout.addWidget(QLabel("红外方位角:"), 1, 0)
-        self.ir_edit = QLineEdit("0.0")
-        self.ir_edit.setReadOnly(True)
-        data_layout.addWidget(self.ir_edit, 1, 1)
+        # 每个通道一个读数框
+        self.readout_edits = {}
+        for row, channel in enumerate(self.schema):
+            data_layout.addWidget(QLabel(f"{channel.label}:"), row, 0)
+            edit = QLineEdit("0.0")
+            edit.setReadOnly(True)
+            data_layout.addWidget(edit, row, 1)
+            self.readout_edits[channel.name] = edit
+        self.heading_edit = self.readout_edits['heading']
+        self.ir_edit = self.readout_edits['ir']
+        row = len(self.schema)
+
+        self.trail_check = QCheckBox("显示最近 30 秒轨迹")
+        self.trail_check.toggled.connect(self.toggle_trail)
+        data_layout.addWidget(self.trail_check, row, 0, 1, 2)
+
+        self.filter_check = QCheckBox("滤波（航向卡尔曼、红外中值）")
+        self.filter_check.toggled.connect(self.toggle_filter)
+        data_layout.addWidget(self.filter_check, row + 1, 0, 1, 2)
 
         control_layout.addWidget(data_group)
 
+        # 统计面板在 build_visualization 中插入到这里
+        self.stats_layout = QVBoxLayout()
+        control_layout.addLayout(self.stats_layout)
+
+        # 报警：当前报警和最近的报警事件（最新的在最上面）
+        alarm_group = QGroupBox("报警")
+        alarm_layout = QVBoxLayout(alarm_group)
+        self.alarm_label = QLabel("无报警")
+        alarm_layout.addWidget(self.alarm_label)
+        self.alarm_list = QListWidget()
+        self.alarm_list.setMaximumHeight(100)
+        alarm_layout.addWidget(self.alarm_list)
+        control_layout.addWidget(alarm_group)
+
         # 添加接收数据显示区域
         receive_group = QGroupBox("接收区")
         receive_layout = QVBoxLayout(receive_group)
         
-        # 创建文本显示区域
-        self.receive_text = QTextEdit()
-        self.receive_text.setReadOnly(True)
+        # 创建文本显示区域（有界，按帧批量追加）
+        self.receive_text = ReceiveLogView()
         self.receive_text.setMinimumHeight(150)
         receive_layout.addWidget(self.receive_text)
+
+        # 检索与过滤
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("检索接收历史")
+        self.search_edit.returnPressed.connect(self.apply_receive_filter)
+        search_layout.addWidget(self.search_edit)
+
+        self.regex_check = QCheckBox("正则")
+        search_layout.addWidget(self.regex_check)
+
+        self.ignore_case_check = QCheckBox("忽略大小写")
+        search_layout.addWidget(self.ignore_case_check)
+
+        search_btn = QPushButton("过滤")
+        search_btn.clicked.connect(self.apply_receive_filter)
+        search_layout.addWidget(search_btn)
+
+        clear_filter_btn = QPushButton("显示全部")
+        clear_filter_btn.clicked.connect(self.clear_receive_filter)
+        search_layout.addWidget(clear_filter_btn)
+
+        receive_layout.addLayout(search_layout)
+
+        self.search_status = QLabel("")
+        receive_layout.addWidget(self.search_status)
         
         # 按钮布局
         btn_layout = QHBoxLayout()
@@ -139,43 +246,183 @@ class MainWindow(QMainWindow):
 
         main_layout.addWidget(control_panel, 1)
 
-        # 右侧可视化区域
+        # 右侧可视化区域（船体姿态与曲线图在首次显示后由 build_visualization 填充）
         viz_panel = QWidget()
-        viz_layout = QVBoxLayout(viz_panel)
-
-        # 船体姿态可视化
-        self.ship_widget = ShipAttitudeWidget()
-        viz_layout.addWidget(self.ship_widget, 1)
+        self.viz_layout = QVBoxLayout(viz_panel)
 
         # 曲线图
         plot_group = QGroupBox("姿态曲线")
-        plot_layout = QVBoxLayout(plot_group)
+        self.plot_layout = QVBoxLayout(plot_group)
+
+        # 导出：在后台线程中写文件，这里显示进度
+        export_layout = QHBoxLayout()
+        self.export_btn = QPushButton("导出数据...")
+        self.export_btn.clicked.connect(self.export_data)
+        export_layout.addWidget(self.export_btn)
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 1000)
+        self.export_progress.setVisible(False)
+        export_layout.addWidget(self.export_progress, 1)
+        self.export_cancel_btn = QPushButton("取消导出")
+        self.export_cancel_btn.setVisible(False)
+        self.export_cancel_btn.clicked.connect(self.cancel_export)
+        export_layout.addWidget(self.export_cancel_btn)
+        self.export_status = QLabel("")
+        export_layout.addWidget(self.export_status)
+        export_layout.addStretch(1)
+        # 截图与录像：只渲染船体姿态和曲线图两个组件，编码在后台线程中进行
+        self.screenshot_btn = QPushButton("截图")
+        self.screenshot_btn.clicked.connect(self.take_screenshot)
+        export_layout.addWidget(self.screenshot_btn)
+        self.record_btn = QPushButton("开始录像")
+        self.record_btn.clicked.connect(self.toggle_video)
+        export_layout.addWidget(self.record_btn)
+        self.crosshair_check = QCheckBox("十字光标")
+        self.crosshair_check.setChecked(True)
+        self.crosshair_check.toggled.connect(self.toggle_crosshair)
+        export_layout.addWidget(self.crosshair_check)
+        self.plot_layout.addLayout(export_layout)
+
+        # 显示曲线的通道
+        channel_layout = QHBoxLayout()
+        channel_layout.addWidget(QLabel("曲线:"))
+        self.channel_checks = {}
+        for channel in self.schema:
+            check = QCheckBox(channel.label)
+            check.setChecked(channel.name in ('heading', 'ir'))
+            check.toggled.connect(self.set_plot_channels)
+            channel_layout.addWidget(check)
+            self.channel_checks[channel.name] = check
+        channel_layout.addStretch(1)
+        if len(self.schema) > 2:
+            self.plot_layout.addLayout(channel_layout)
+        self.viz_layout.addWidget(plot_group, 1)
+
+        main_layout.addWidget(viz_panel, 3)
+
+        # 帧时钟驱动读数、船体姿态和图表的刷新：有数据时约 60 fps，空闲或窗口隐藏时降频；
+        # 图表创建后启动
+        self.timer = FrameClock(parent=self)
+        self.timer.tick.connect(self.update_frame)
+        self.receive_text.set_frame_clock(self.timer)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # 第一次绘制之后再创建可视化组件和扫描串口，让窗口尽快显示出来
+        if not self._startup_scheduled:
+            self._startup_scheduled = True
+            QTimer.singleShot(0, self.build_visualization)
+            QTimer.singleShot(0, self.update_ports)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.timer.set_visible(not self.isMinimized())
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.set_visible(False)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        # 最小化时窗口不一定收到 hideEvent
+        if event.type() == QEvent.WindowStateChange:
+            self.timer.set_visible(self.isVisible() and not self.isMinimized())
+
+    def build_visualization(self):
+        """创建船体姿态组件和曲线图（只执行一次）"""
+        if self.attitude_plot is not None:
+            return
+        import pyqtgraph as pg
+        from visualization import ShipAttitudeWidget, AttitudePlot, StatsPanel
+        from rolling_stats import StreamStats
+
+        # 滚动统计面板
+        self.stats = StreamStats()
+        self.stats_panel = StatsPanel()
+        self.stats_layout.addWidget(self.stats_panel)
+
+        # 船体姿态可视化
+        self.ship_widget = ShipAttitudeWidget()
+        self.viz_layout.insertWidget(0, self.ship_widget, 1)
 
         self.plot_widget = pg.PlotWidget()
-        plot_layout.addWidget(self.plot_widget)
-        
-        # 初始化姿态图表
-        self.attitude_plot = AttitudePlot(self.plot_widget)
-        
-        viz_layout.addWidget(plot_group, 1)
+        self.plot_layout.addWidget(self.plot_widget)
+
+        # 初始化姿态图表：内存中保留最近 10 万个原始样本，更早的数据由降采样金字塔显示
+        self.attitude_plot = AttitudePlot(self.plot_widget, data_length=100000, schema=self.schema)
+        self.set_plot_channels()
+        self.toggle_crosshair(self.crosshair_check.isChecked())
+        # 鼠标在曲线图上移动时帧时钟切换到高帧率，十字光标的读数不会滞后
+        self.plot_widget.scene().sigMouseMoved.connect(self.timer.notify_activity)
+        self.toggle_trail(self.trail_check.isChecked())
+
+        # 频谱：重叠窗口 FFT 的时频图，可切换航向角/红外方位角
+        from spectrum import SlidingSpectrum
+        from visualization import SpectrogramPlot
+
+        spectrum_group = QGroupBox("频谱")
+        spectrum_layout = QVBoxLayout(spectrum_group)
+        self.spectrum_combo = QComboBox()
+        self.spectrum_combo.addItem("航向角", 'heading')
+        self.spectrum_combo.addItem("红外方位角", 'ir')
+        self.spectrum_combo.currentIndexChanged.connect(self.set_spectrum_channel)
+        spectrum_layout.addWidget(self.spectrum_combo)
+        self.spectrum = SlidingSpectrum()
+        spectrum_widget = pg.PlotWidget()
+        spectrum_layout.addWidget(spectrum_widget)
+        self.spectrogram_plot = SpectrogramPlot(spectrum_widget, self.spectrum)
+        self.viz_layout.addWidget(spectrum_group, 1)
+
+        self.timer.start()
+
+    def set_plot_channels(self):
+        """按勾选的通道显示曲线"""
+        if self.attitude_plot is None:
+            return
+        self.attitude_plot.set_channels([name for name, check in self.channel_checks.items()
+                                         if check.isChecked()])
 
-        main_layout.addWidget(viz_panel, 3)
+    def toggle_crosshair(self, enabled):
+        """启用/关闭曲线图的十字光标"""
+        if self.attitude_plot is not None:
+            self.attitude_plot.set_crosshair(enabled)
+
+    def set_spectrum_channel(self, index):
+        """切换时频图显示的通道"""
+        self.spectrogram_plot.set_channel(self.spectrum_combo.itemData(index))
 
-        # 设置定时器更新图表
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_plot)
-        self.timer.start(100)  # 100ms更新一次
+    def toggle_trail(self, enabled):
+        """船体姿态表盘上显示/隐藏轨迹，轨迹数据取自曲线图的样本缓冲"""
+        if self.ship_widget is None:
+            return
+        self.ship_widget.set_trail(self.attitude_plot.ring if enabled else None, seconds=30.0)
+        self.ship_widget.refresh()
+
+    def toggle_filter(self, enabled):
+        """启用/关闭滤波级；关闭时删除滤波曲线"""
+        if enabled:
+            from filters import FilterStage
+            self.filter_stage = FilterStage()
+        else:
+            self.filter_stage = None
+        if not enabled and self.attitude_plot is not None:
+            self.attitude_plot.clear_filtered()
 
     def update_ports(self):
+        """在后台线程中扫描串口，完成后更新下拉菜单"""
+        if self.port_scan_thread is not None and self.port_scan_thread.isRunning():
+            return
+        self.port_scan_thread = PortScanThread()
+        self.port_scan_thread.ports_ready.connect(self.set_ports)
+        self.port_scan_thread.start()
+
+    def set_ports(self, ports):
         # 保存当前选中的串口（如果有的话）
         current_port = self.port_combo.currentText() if self.port_combo.count() > 0 else ""
 
         # 清空下拉菜单
         self.port_combo.clear()
 
-        # 获取可用串口列表
-        ports = get_available_ports()
-
         # 添加到下拉菜单
         self.port_combo.addItems(ports)
 
@@ -197,16 +444,19 @@ class MainWindow(QMainWindow):
 
             try:
                 # 修改：使用已打开的串口对象
-                self.serial_thread = SerialThread(port, baudrate)
+                self.serial_thread = SerialThread(port, baudrate, schema=self.schema)
                 self.serial_thread.set_serial(self.ser)  # 传递串口对象
+                self.serial_thread.acquisition.recorder = self.ensure_recording()
+                self.serial_thread.acquisition.alarms = self.ensure_alarms()
                 
                 # 确保先连接信号，再启动线程
-                self.serial_thread.data_received.connect(self.update_data)
+                self.serial_thread.samples_received.connect(self.update_data)
                 self.serial_thread.raw_data_received.connect(self.update_receive_text)
                 self.serial_thread.error_occurred.connect(self.show_error)
+                self.serial_thread.alarm_raised.connect(self.show_alarm)
                 
                 # 清空接收区，准备接收新数据
-                self.receive_text.clear()
+                self.receive_text.clear_lines()
                 
                 # 启动线程
                 self.serial_thread.start()
@@ -221,47 +471,356 @@ class MainWindow(QMainWindow):
             self.connect_btn.setText("开始接收")
             print("已停止接收数据")
 
-    def update_data(self, heading, ir):
-        # 更新数据显示
-        self.heading_edit.setText(f"{heading:.1f}")
-        self.ir_edit.setText(f"{ir:.1f}")
+    def ensure_recording(self):
+        """
+        创建本次运行的会话记录（只创建一次）
+
+        记录目录由环境变量 NAVE_RECORD_DIR 指定（默认为程序目录下的 recordings），设为空字符串时不记录；
+        设置了 NAVE_RECORD_KEEP（大于 0）时只保留最近这么多次会话的记录，自动删除更早的；
+        默认不删除任何记录，只列出超过 RECORD_KEEP 个的旧记录。
+        """
+        if self.recorder is not None:
+            return self.recorder
+        default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+        record_dir = os.environ.get('NAVE_RECORD_DIR', default)
+        if not record_dir:
+            return None
+        try:
+            keep = int(os.environ.get('NAVE_RECORD_KEEP', '0'))
+        except ValueError:
+            print("NAVE_RECORD_KEEP 不是整数，不删除旧的会话记录")
+            keep = 0
+        if keep > 0:
+            # 为本次会话留出位置
+            for removed in prune_sessions(record_dir, keep - 1):
+                print(f"删除旧的会话记录: {removed}")
+        else:
+            for old in prune_sessions(record_dir, self.RECORD_KEEP - 1, dry_run=True):
+                print(f"旧的会话记录（未删除，设置 NAVE_RECORD_KEEP 后自动清理）: {old}")
+        if self.attitude_plot is None:
+            self.build_visualization()
+        path = os.path.join(record_dir, time.strftime("%Y%m%d-%H%M%S"))
+        # 尚未落盘的样本必须还在曲线图的环形缓冲中
+        flush_every = min(FLUSH_EVERY, self.attitude_plot.data_length)
+        try:
+            self.recorder = RecordingWriter(path, flush_every=flush_every,
+                                            channels=('t',) + self.schema.names)
+        except OSError as e:
+            print(f"创建会话记录失败: {e}")
+            return None
+        self.attitude_plot.set_history(RecordingHistory(path, flush_every=flush_every))
+        print(f"会话记录: {path}")
+        return self.recorder
+
+    def ensure_alarms(self):
+        """
+        按配置创建报警引擎（只创建一次）
+
+        规则文件由环境变量 NAVE_ALARMS 指定（默认为程序目录下的 alarms.json），设为空字符串时不检查报警。
+        """
+        if self.alarms is not None:
+            return self.alarms
+        default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alarms.json')
+        path = os.environ.get('NAVE_ALARMS', default)
+        if not path:
+            return None
+        from alarms import AlarmEngine
+        try:
+            self.alarms = AlarmEngine.from_config(path, schema=self.schema)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"加载报警规则失败: {e}")
+            return None
+        print(f"报警规则: {path}，共 {len(self.alarms.rules)} 条")
+        return self.alarms
+
+    def show_alarm(self, event):
+        """显示一个报警事件（触发或解除）"""
+        from alarms import format_event
+        text = format_event(event)
+        print(f"报警 {text}")
+        self.alarm_list.insertItem(0, text)
+        if event['state'] == 'raised':
+            self.alarm_list.item(0).setForeground(Qt.red)
+        while self.alarm_list.count() > self.ALARM_HISTORY:
+            self.alarm_list.takeItem(self.alarm_list.count() - 1)
+
+        # 引擎在采集线程中运行，这里按收到的事件维护当前报警，不读取引擎状态
+        if event['state'] == 'raised':
+            if event['rule'] not in self._active_alarms:
+                self._active_alarms.append(event['rule'])
+        elif event['rule'] in self._active_alarms:
+            self._active_alarms.remove(event['rule'])
+        if self._active_alarms:
+            self.alarm_label.setText("当前报警: " + "、".join(self._active_alarms))
+            self.alarm_label.setStyleSheet("color: red; font-weight: bold;")
+        else:
+            self.alarm_label.setText("无报警")
+            self.alarm_label.setStyleSheet("")
 
-        # 更新船体姿态可视化
-        self.ship_widget.update_angles(heading, ir)
+    def export_data(self):
+        """选择时间范围、格式和文件，在后台线程中导出磁盘记录和内存中的样本"""
+        if self.export_thread is not None and self.export_thread.isRunning():
+            return
+        plot = self.attitude_plot
+        if plot is None or plot.t0 is None:
+            QMessageBox.information(self, "导出数据", "还没有可导出的数据")
+            return
+        from export import ExportDialog, ExportSource, ExportThread, FILE_FILTERS, EXTENSIONS
+
+        first, last = plot.store.time_range()
+        data_range = (plot.t0 + first, plot.t0 + last)
+        view_range = None
+        view_box = self.plot_widget.getViewBox()
+        if not view_box.autoRangeEnabled()[0]:
+            x_start, x_end = view_box.viewRange()[0]
+            view_range = (max(plot.t0 + x_start, data_range[0]), min(plot.t0 + x_end, data_range[1]))
+
+        dialog = ExportDialog(data_range, view_range, self)
+        if not dialog.exec_():
+            return
+        fmt = dialog.format()
+        suffix = next(ext for ext, value in EXTENSIONS.items() if value == fmt)
+        default = time.strftime("nave-%Y%m%d-%H%M%S", time.localtime(data_range[0])) + suffix
+        path, _ = QFileDialog.getSaveFileName(self, "导出数据", default, FILE_FILTERS[fmt])
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += suffix
+
+        # 在界面线程中取出数据源：磁盘记录只做内存映射，尚未落盘的最新样本从环形缓冲复制；
+        # 写文件在后台线程中进行
+        source = ExportSource.from_store(plot.store, *dialog.time_range())
+        self.export_thread = ExportThread(source, path, fmt, parent=self)
+        self.export_thread.progress.connect(self.export_progress.setValue)
+        self.export_thread.finished_export.connect(self.export_finished)
+        self.export_thread.failed.connect(self.export_failed)
+        self.export_thread.finished.connect(self.export_stopped)
+        self.export_progress.setValue(0)
+        self.export_progress.setVisible(True)
+        self.export_cancel_btn.setVisible(True)
+        self.export_btn.setEnabled(False)
+        self.export_status.setText(f"正在导出 {len(source)} 个样本")
+        self.export_thread.start()
+
+    def take_screenshot(self):
+        """把船体姿态和曲线图保存为 PNG（写文件在后台线程中）"""
+        if self.attitude_plot is None:
+            return
+        from capture import save_screenshot, default_capture_path
+        thread = save_screenshot([self.ship_widget, self.plot_widget],
+                                 default_capture_path("screenshot") + ".png", parent=self)
+        self._watch_capture(thread)
+
+    def toggle_video(self):
+        """开始/停止录像：有 ffmpeg 时编码为 MP4，否则保存 PNG 序列"""
+        if self.attitude_plot is None:
+            return
+        from capture import PanelRecorder, default_capture_path
+        if self.panel_recorder is not None and self.panel_recorder.is_recording():
+            thread = self.panel_recorder.stop()
+            self.record_btn.setText("开始录像")
+            self.export_status.setText(f"正在写入录像（编码跟不上丢弃 {thread.dropped} 帧，用上一帧补齐）")
+            print(f"停止录像，编码跟不上丢弃 {thread.dropped} 帧")
+            return
+        if self.panel_recorder is None:
+            self.panel_recorder = PanelRecorder([self.ship_widget, self.plot_widget],
+                                                fps=self.CAPTURE_FPS, parent=self)
+        try:
+            path = self.panel_recorder.start(default_capture_path("video"))
+        except OSError as e:
+            QMessageBox.warning(self, "录像", f"无法开始录像: {e}")
+            return
+        self._watch_capture(self.panel_recorder.thread)
+        self.record_btn.setText("停止录像")
+        self.export_status.setText(f"录像中: {path}")
+        print(f"开始录像: {path}")
+
+    def _watch_capture(self, thread):
+        """截图/录像线程结束时显示结果"""
+        self._capture_threads.append(thread)
+        thread.finished_capture.connect(self.capture_finished)
+        thread.failed.connect(self.capture_failed)
+        thread.finished.connect(lambda: self._capture_threads.remove(thread))
+
+    def capture_failed(self, message):
+        # 编码出错（例如 ffmpeg 退出）时停止录像
+        if self.panel_recorder is not None and self.panel_recorder.is_recording():
+            self.panel_recorder.stop()
+            self.record_btn.setText("开始录像")
+        self.export_status.setText(message)
+        print(message)
+
+    def capture_finished(self, path, frames, dropped):
+        if frames == 1 and path.endswith('.png'):
+            text = f"已保存截图 {path}"
+        else:
+            text = f"已保存录像 {path}（{frames} 帧"
+            if dropped:
+                text += f"，编码跟不上，其中 {dropped} 帧重复上一帧"
+            text += "）"
+        self.export_status.setText(text)
+        print(text)
+
+    def cancel_export(self):
+        if self.export_thread is not None:
+            self.export_thread.cancel()
+
+    def export_finished(self, path, count):
+        self.export_status.setText(f"已导出 {count} 个样本")
+        print(f"已导出 {count} 个样本到 {path}")
+
+    def export_failed(self, message):
+        self.export_status.setText(message)
+        print(message)
+
+    def export_stopped(self):
+        self.export_progress.setVisible(False)
+        self.export_cancel_btn.setVisible(False)
+        self.export_btn.setEnabled(True)
+
+    def update_data(self, timestamps, columns):
+        """
+        接收一批样本：读数和船体姿态只显示最新值，曲线数据整批写入
+
+        columns 为 {通道名: 数组}，通道见数据格式（schema.py）。
+        """
+        headings, irs = columns['heading'], columns['ir']
+        count = len(headings)
+        if count == 0:
+            return
+        if self.attitude_plot is None:
+            self.build_visualization()
+        self.timer.notify_activity()
+        first = tracer.next_deliveries(count)
+        if first is not None:
+            t_deliver = tracer.now()
+
+        # 统计使用原始数据；启用滤波时读数和船体姿态使用滤波后的数据
+        self.stats.extend(timestamps, headings, irs)
+        self.spectrum.extend(timestamps, headings, irs)
+        shown_headings, shown_irs = headings, irs
+        if self.filter_stage is not None:
+            shown_headings, _, shown_irs = self.filter_stage.process(timestamps, headings, irs)
+
+        # 读数和船体姿态只记录最新值，由帧时钟统一刷新
+        latest = {name: column[-1] for name, column in columns.items()}
+        latest['heading'], latest['ir'] = shown_headings[-1], shown_irs[-1]
+        self._latest_readout = tuple(latest[name] for name in self.schema.names)
+        self.ship_widget.extend(timestamps, shown_headings, shown_irs)
+
+        if first is not None:
+            t_buffer = tracer.now()
 
         # 更新数据数组
-        self.attitude_plot.update_data(heading, ir)
+        self.attitude_plot.extend(timestamps, *(columns[name] for name in self.schema.names))
+        if self.filter_stage is not None:
+            self.attitude_plot.extend_filtered(timestamps, shown_headings, shown_irs)
+
+        if first is not None:
+            t_done = tracer.now()
+            for sid in tracer.sampled_ids(first, count):
+                tracer.flow(sid, 't', t_deliver)
+                tracer.span('deliver', sid, t_deliver, t_buffer, batch=count)
+                tracer.span('buffer', sid, t_buffer, t_done, batch=count)
+                tracer.mark_pending('plot', sid)
+
+    def update_frame(self):
+        """帧时钟的每一帧：读数、船体姿态和曲线图各至多刷新一次"""
+        self.update_readouts()
+        self.update_stats()
+        if self.ship_widget is not None:
+            self.ship_widget.refresh()
+        self.update_plot()
+
+    def update_readouts(self):
+        """把各通道的最新值显示到读数框，数值不变时不做任何事"""
+        readout = self._latest_readout
+        if readout is None or readout == self._shown_readout:
+            return
+        shown = self._shown_readout or (None,) * len(readout)
+        self._shown_readout = readout
+        for channel, value, old in zip(self.schema, readout, shown):
+            if value != old:
+                self.readout_edits[channel.name].setText(channel.format(float(value)))
+
+    def update_stats(self):
+        """刷新统计面板；数字变化太快人眼无法读取，最多每 STATS_INTERVAL 秒一次"""
+        now = time.monotonic()
+        if self.stats is None or not self.stats.changed or now - self._stats_shown_at < self.STATS_INTERVAL:
+            return
+        self._stats_shown_at = now
+        self.stats_panel.set_stats(self.stats)
 
     def update_plot(self):
-        # 更新曲线图
-        self.attitude_plot.update_plot()
+        # 更新曲线图和时频图
+        if self.attitude_plot is not None:
+            self.attitude_plot.update_plot()
+            self.spectrogram_plot.update_plot()
 
     def clear_receive_text(self):
         """清空接收文本区域"""
-        self.receive_text.clear()
+        self.receive_text.clear_lines()
 
-    def update_receive_text(self, text):
-        """更新接收区文本"""
-        # 将文本添加到接收区，确保每条数据后面有换行符
-        if not text.endswith('\n'):
-            text += '\n'
-            
-        # 将文本添加到接收区
-        self.receive_text.append(text.strip())  # 使用append方法自动处理光标和滚动
-        
-        # 确保滚动到底部
+    def apply_receive_filter(self):
+        """在接收历史中检索，接收区只显示匹配的行"""
+        pattern = self.search_edit.text()
+        if not pattern:
+            self.clear_receive_filter()
+            return
+        start = time.perf_counter()
         try:
-            scrollbar = self.receive_text.verticalScrollBar()
-            scrollbar.setValue(scrollbar.maximum())
-        except Exception as e:
-            print(f"滚动接收区时出错: {e}")
+            count = self.receive_text.set_filter(pattern,
+                                                 regex=self.regex_check.isChecked(),
+                                                 ignore_case=self.ignore_case_check.isChecked())
+        except re.error as e:
+            QMessageBox.warning(self, "检索错误", f"正则表达式无效: {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        total = len(self.receive_text.store)
+        self.search_status.setText(f"显示最近 {count} 条匹配（共 {total} 行，用时 {elapsed:.1f} ms）")
+
+    def clear_receive_filter(self):
+        """取消过滤，恢复显示最新的行"""
+        self.receive_text.set_filter(None)
+        self.search_status.setText("")
+
+    def update_receive_text(self, text):
+        """更新接收区文本（下一帧批量显示）"""
+        self.receive_text.append_line(text.strip())
 
     def closeEvent(self, event):
+        # 等待串口扫描线程结束
+        if self.port_scan_thread is not None:
+            self.port_scan_thread.wait()
+
+        # 取消未完成的导出
+        if self.export_thread is not None and self.export_thread.isRunning():
+            self.export_thread.cancel()
+            self.export_thread.wait()
+
+        # 结束录像并写完已渲染的帧
+        if self.panel_recorder is not None:
+            self.panel_recorder.stop()
+        for thread in list(self._capture_threads):
+            thread.finish()
+            thread.wait()
+
+        # 导出样本追踪数据
+        if tracer.enabled:
+            try:
+                tracer.export()
+            except OSError as e:
+                print(f"导出追踪数据时出错: {e}")
+
         # 关闭串口线程
         if self.serial_thread and self.serial_thread.running:
             self.serial_thread.stop()
             print("已停止串口线程")
 
+        # 关闭会话记录
+        if self.recorder is not None:
+            self.recorder.close()
+
         # 关闭串口
         if hasattr(self, 'ser') and self.ser:
             try:
@@ -282,6 +841,8 @@ class MainWindow(QMainWindow):
         baudrate = int(self.baud_combo.currentText())
 
         try:
+            import serial
+
             # 添加更多串口参数以确保兼容性
             self.ser = serial.Serial(
                 port=port,
@@ -377,6 +938,7 @@ class MainWindow(QMainWindow):
         """测试接收区是否正常工作"""
         test_data = "这是一条测试数据，用于验证接收区是否正常工作。"
         self.update_receive_text(test_data)
+        self.receive_text.flush()
         print("已发送测试数据到接收区")
     
     def send_data(self):
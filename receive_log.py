@@ -0,0 +1,329 @@
+"""
+接收区日志视图与历史检索
+
+串口每收到一行就直接 QTextEdit.append 会让富文本文档无限增长，
+长时间运行后内存占用巨大、界面卡死。这里改为：
+    - 接收历史保存在分块的 LogStore 中，容量固定，支持子串/正则检索
+    - QPlainTextEdit 设置最大块数，超出后自动丢弃最旧的行
+    - 新行先进入待显示队列，每帧合并为一次追加
+    - 过滤模式下视图只显示匹配的行
+"""
+import re
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+
+from PyQt5.QtWidgets import QPlainTextEdit
+
+# 每个分块的布隆过滤器位数（必须是 2 的幂）
+BLOOM_BITS = 1 << 16
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _required_literal(pattern):
+    """
+    从正则中提取一段每个匹配都必须包含的字面文本，用于分块过滤；无法确定时返回空串
+
+    只处理顶层的普通字符：含 '|' 的模式直接放弃，分组和字符集内的内容不计入，
+    后面跟 ?、*、{ 的字符视为可选。
+    """
+    if '|' in pattern:
+        return ''
+    best = current = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            best, current = max(best, current, key=len), ''
+            i += 2
+            continue
+        if c in '[{':
+            # 字符集和重复次数整体跳过；{m,n} 使前一个字符可能不出现
+            if c == '{' and current:
+                current = current[:-1]
+            best, current = max(best, current, key=len), ''
+            if c == '[':
+                i = _class_end(pattern, i)
+            else:
+                end = pattern.find('}', i + 1)
+                i = len(pattern) if end < 0 else end + 1
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        if c in '.^$*+?()':
+            if c in '?*' and current:
+                current = current[:-1]
+            best, current = max(best, current, key=len), ''
+        elif depth == 0:
+            current += c
+        i += 1
+    return max(best, current, key=len)
+
+
+def _class_end(pattern, i):
+    """pattern[i] 为 '[' 时，字符集结束之后的位置；开头的 ']'（包括 '^' 之后的）和转义的 ']' 是普通字符"""
+    j = i + 1
+    if pattern.startswith('^', j):
+        j += 1
+    if pattern.startswith(']', j):
+        j += 1
+    while j < len(pattern):
+        if pattern[j] == '\\':
+            j += 2
+        elif pattern[j] == ']':
+            return j + 1
+        else:
+            j += 1
+    return len(pattern)
+
+
+class _Chunk:
+    """已封存的日志分块：拼接后的文本、行起始偏移和三元组布隆过滤器"""
+
+    __slots__ = ('start', 'count', 'text', 'offsets', 'bloom')
+
+    def __init__(self, start, lines):
+        self.start = start
+        self.count = len(lines)
+        self.text = '\n'.join(lines) + '\n'
+        self.offsets = [0]
+        self.offsets.extend(accumulate(len(line) + 1 for line in lines))
+        self.offsets.pop()
+        # 按小写三元组建立索引，大小写敏感与不敏感的查询都能用来排除分块
+        bloom = bytearray(BLOOM_BITS // 8)
+        mask = BLOOM_BITS - 1
+        for tri in _trigrams(self.text.lower()):
+            h = hash(tri) & mask
+            bloom[h >> 3] |= 1 << (h & 7)
+        self.bloom = bytes(bloom)
+
+    def may_contain(self, hashes):
+        bloom = self.bloom
+        return all(bloom[h >> 3] & (1 << (h & 7)) for h in hashes)
+
+    def line(self, i):
+        start = self.offsets[i]
+        end = self.offsets[i + 1] - 1 if i + 1 < self.count else len(self.text) - 1
+        return self.text[start:end]
+
+    def matches(self, needle=None, regex=None):
+        """返回匹配行在分块内的序号（升序，每行至多一次）"""
+        text = self.text
+        offsets = self.offsets
+        found = []
+        if regex is not None:
+            for m in regex.finditer(text):
+                start, end = m.span()
+                if start == len(text):
+                    # 末尾换行符之后的空匹配（如 ^$）不属于任何一行
+                    break
+                i = bisect_right(offsets, start) - 1
+                if '\n' not in text[start:end]:
+                    if not found or found[-1] != i:
+                        found.append(i)
+                    continue
+                # 跨行的匹配（如 \s+、[^x]*）不算数：它经过的每一行单独用正则重新检查，
+                # 结果与逐行匹配（未封存的行和实时过滤）一致
+                last = bisect_right(offsets, end - 1) - 1
+                for j in range(i, last + 1):
+                    if (not found or found[-1] < j) and regex.search(self.line(j)):
+                        found.append(j)
+            return found
+        pos = text.find(needle)
+        while pos >= 0:
+            i = bisect_right(offsets, pos) - 1
+            found.append(i)
+            # 跳到下一行开头，同一行只记一次
+            next_start = offsets[i + 1] if i + 1 < self.count else len(text)
+            pos = text.find(needle, next_start)
+        return found
+
+
+class LogStore:
+    """
+    可检索的接收历史
+
+    行按 chunk_size 分块；写满的分块封存为一段拼接文本并建立三元组布隆索引，
+    检索时用 str.find / re.finditer 在整块文本上扫描，并跳过不可能匹配的分块。
+    总行数超过 capacity 时丢弃最旧的分块。行号是从开始记录起的绝对序号。
+    """
+
+    def __init__(self, capacity=1000000, chunk_size=4096):
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self._chunks = deque()
+        self._active = []
+        self._active_start = 0
+        self.first_index = 0
+
+    def __len__(self):
+        return self._active_start + len(self._active) - self.first_index
+
+    def append(self, line):
+        """追加一行"""
+        if '\n' in line:
+            # 行内换行会破坏分块的行偏移，拆成多行保存
+            self.extend(line.split('\n'))
+            return
+        self._active.append(line)
+        if len(self._active) >= self.chunk_size:
+            self._seal()
+
+    def extend(self, lines):
+        for line in lines:
+            self.append(line)
+
+    def _seal(self):
+        self._chunks.append(_Chunk(self._active_start, self._active))
+        self._active_start += len(self._active)
+        self._active = []
+        while self._chunks and len(self) > self.capacity:
+            self.first_index += self._chunks.popleft().count
+
+    def clear(self):
+        self._chunks.clear()
+        self._active_start += len(self._active)
+        self._active = []
+        self.first_index = self._active_start
+
+    def tail(self, count):
+        """最新的 count 行（按时间顺序）"""
+        lines = self._active[-count:] if count else []
+        for chunk in reversed(self._chunks):
+            need = count - len(lines)
+            if need <= 0:
+                break
+            lines = chunk.text[:-1].split('\n')[-need:] + lines
+        return lines
+
+    @staticmethod
+    def compile_matcher(pattern, regex=False, ignore_case=False):
+        """编译单行匹配函数，正则非法时抛出 re.error"""
+        if regex or ignore_case:
+            flags = re.IGNORECASE if ignore_case else 0
+            compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+            return lambda line: compiled.search(line) is not None
+        return lambda line: pattern in line
+
+    def search(self, pattern, regex=False, ignore_case=False, limit=None):
+        """
+        检索匹配的行，返回 [(行号, 文本), ...]（按时间顺序）
+
+        从最新的行向前检索，找到 limit 条后停止；正则非法时抛出 re.error。
+        """
+        if not pattern:
+            return []
+        compiled = None
+        needle = pattern
+        hashes = None
+        if regex or ignore_case:
+            flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+            compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+        literal = _required_literal(pattern) if regex else pattern
+        if len(literal) >= 3:
+            mask = BLOOM_BITS - 1
+            hashes = [hash(tri) & mask for tri in _trigrams(literal.lower())]
+
+        matcher = self.compile_matcher(pattern, regex, ignore_case)
+        results = [(self._active_start + i, line)
+                   for i, line in enumerate(self._active) if matcher(line)]
+        if limit is not None and len(results) >= limit:
+            return results[-limit:]
+
+        for chunk in reversed(self._chunks):
+            if hashes is not None and not chunk.may_contain(hashes):
+                continue
+            found = chunk.matches(needle, compiled)
+            if not found:
+                continue
+            if limit is not None:
+                found = found[-(limit - len(results)):]
+            results = [(chunk.start + i, chunk.line(i)) for i in found] + results
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+class ReceiveLogView(QPlainTextEdit):
+    """有界、按帧批量追加、支持过滤的接收区"""
+
+    def __init__(self, capacity=5000, history=1000000, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        # 不自动换行，避免每次追加都重新排版整段文本
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setMaximumBlockCount(capacity)
+
+        # 全部接收历史，视图只显示其中最新（或匹配）的 capacity 行
+        self.store = LogStore(history)
+        self._pending = []
+        self._filter = None
+        # 驱动刷新的帧时钟（frame_clock.FrameClock），没有时由调用者自行调用 flush()
+        self.frame_clock = None
+
+    def set_frame_clock(self, clock):
+        """在界面共用的帧时钟的每一帧刷新待显示的行，不再单独使用定时器"""
+        self.frame_clock = clock
+        clock.tick.connect(self.flush)
+
+    def append_line(self, text):
+        """添加一行，实际显示推迟到下一帧"""
+        self.store.append(text)
+        if self._filter is not None and not self._filter(text):
+            return
+        self._pending.append(text)
+        if self.frame_clock is not None:
+            # 只有文本行（没有样本）到达时帧时钟也要切换到高帧率
+            self.frame_clock.notify_activity()
+
+    def flush(self):
+        """把待显示的行一次性追加到视图"""
+        if not self._pending:
+            return
+        # 同一帧内超过容量的部分无论如何都会被丢弃，不必再交给文档
+        pending = self._pending[-self.capacity:]
+        self._pending = []
+
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 1
+        self.appendPlainText('\n'.join(pending))
+        # 只有用户停留在底部时才自动滚动，向上查看历史时不跳动
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def clear_lines(self):
+        """清空接收区"""
+        self._pending = []
+        self.store.clear()
+        self.clear()
+
+    def set_filter(self, pattern, regex=False, ignore_case=False):
+        """
+        只显示匹配的行，返回历史中的匹配数（最多 capacity 条）
+
+        pattern 为空时取消过滤，恢复显示最新的行；正则非法时抛出 re.error。
+        """
+        if not pattern:
+            self._filter = None
+            self._reload(self.store.tail(self.capacity))
+            return None
+        matcher = LogStore.compile_matcher(pattern, regex, ignore_case)
+        results = self.store.search(pattern, regex, ignore_case, limit=self.capacity)
+        self._filter = matcher
+        self._reload([line for _, line in results])
+        return len(results)
+
+    def _reload(self, lines):
+        """用给定的行替换视图内容"""
+        self._pending = []
+        self.setPlainText('\n'.join(lines))
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
@@ -0,0 +1,229 @@
+"""
+采集记录文件
+
+一次记录是一个目录，按列存放样本：
+    meta.json      通道列表、数据类型、开始时间
+    t.f64          时间戳（Unix 秒，float64 小端）
+    heading.f64    航向角
+    ir.f64         红外方位角
+    ...            数据格式中的其他通道（见 schema.py），每个通道一个列文件
+    events.jsonl   事件（报警等），每行一个 JSON 对象
+
+列文件只追加写入，读取时可以直接用 numpy.memmap 映射，不需要整体载入内存。
+写入端不依赖 numpy，无界面采集模式启动更快。
+"""
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from array import array
+
+CHANNELS = ('t', 'heading', 'ir')
+DTYPE = '<f8'
+META_FILE = 'meta.json'
+EVENTS_FILE = 'events.jsonl'
+# 默认每缓冲这么多个样本落盘一次
+FLUSH_EVERY = 1024
+# 界面自动创建的会话记录目录名（开始时间）
+SESSION_NAME = re.compile(r'^\d{8}-\d{6}$')
+
+
+def column_path(path, channel):
+    """通道列文件路径"""
+    return os.path.join(path, f"{channel}.f64")
+
+
+def read_channels(path):
+    """记录中的通道列表（包括时间 't'）"""
+    try:
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            return tuple(json.load(f).get('channels', CHANNELS))
+    except (OSError, ValueError):
+        return CHANNELS
+
+
+class RecordingWriter:
+    """
+    按列追加写入记录，缓冲到一定数量后批量落盘
+
+    channels 为包括时间 't' 在内的通道列表，append/extend 的参数按这个顺序给出。
+    path 必须不存在或为空目录：追加到已有记录上会使各列长度或通道不一致，样本无法对齐。
+    """
+
+    def __init__(self, path, flush_every=FLUSH_EVERY, channels=CHANNELS):
+        self.path = path
+        self.flush_every = flush_every
+        self.channels = tuple(channels)
+        self.count = 0
+        os.makedirs(path, exist_ok=True)
+        if os.listdir(path):
+            raise FileExistsError(f"记录目录 {path} 已存在且不为空")
+        meta = {
+            'version': 1,
+            'channels': list(self.channels),
+            'dtype': DTYPE,
+            'started': time.time(),
+        }
+        with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self._files = [open(column_path(path, channel), 'ab') for channel in self.channels]
+        self._buffers = [array('d') for _ in self.channels]
+        self._events = open(os.path.join(path, EVENTS_FILE), 'a', encoding='utf-8')
+
+    def append(self, timestamp, *values):
+        """追加一个样本，values 按通道顺序给出"""
+        self._buffers[0].append(timestamp)
+        for buf, value in zip(self._buffers[1:], values):
+            buf.append(value)
+        self.count += 1
+        if len(self._buffers[0]) >= self.flush_every:
+            self.flush()
+
+    def extend(self, timestamps, *columns):
+        """追加一批样本（等长序列），columns 按通道顺序给出"""
+        self._buffers[0].extend(timestamps)
+        for buf, column in zip(self._buffers[1:], columns):
+            buf.extend(column)
+        self.count += len(timestamps)
+        if len(self._buffers[0]) >= self.flush_every:
+            self.flush()
+
+    def write_event(self, event):
+        """写入一条事件记录"""
+        self._events.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def flush(self):
+        """把缓冲的样本写入列文件"""
+        for buf, f in zip(self._buffers, self._files):
+            if not buf:
+                continue
+            if sys.byteorder != 'little':
+                buf.byteswap()
+            buf.tofile(f)
+            del buf[:]
+            f.flush()
+        self._events.flush()
+
+    def close(self):
+        """落盘并关闭文件"""
+        self.flush()
+        for f in self._files:
+            f.close()
+        self._events.close()
+
+
+def open_recording(path):
+    """以内存映射方式打开记录，返回 (meta, {通道名: numpy 数组})"""
+    import numpy as np
+
+    with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    dtype = np.dtype(meta.get('dtype', DTYPE))
+    columns = {}
+    # 各列可能因写入中断而长度不一，取最短长度
+    length = min(os.path.getsize(column_path(path, channel)) // dtype.itemsize
+                 for channel in meta['channels'])
+    for channel in meta['channels']:
+        if length == 0:
+            columns[channel] = np.zeros(0, dtype=dtype)
+        else:
+            columns[channel] = np.memmap(column_path(path, channel), dtype=dtype,
+                                         mode='r', shape=(length,))
+    return meta, columns
+
+
+class RecordingHistory:
+    """
+    正在写入（或已完成）的记录的只读视图
+
+    列文件通过 numpy.memmap 映射，文件增长后重新映射；按时间范围取数据时
+    对时间列二分查找，只有实际访问到的页面会被读入内存。
+    flush_every 为写入端的 RecordingWriter.flush_every：最新的至多这么多个样本可能还没有落盘，
+    记录已完成或不再写入时为 None。
+    """
+
+    def __init__(self, path, flush_every=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.channels = read_channels(path)
+        self.length = 0
+        self._columns = {}
+
+    def refresh(self):
+        """检查列文件是否增长，需要时重新映射，返回当前样本数"""
+        import numpy as np
+
+        try:
+            length = min(os.path.getsize(column_path(self.path, channel)) // 8
+                         for channel in self.channels)
+        except OSError:
+            return self.length
+        if length != self.length:
+            self.length = length
+            self._columns = {
+                channel: np.memmap(column_path(self.path, channel), dtype=DTYPE,
+                                   mode='r', shape=(length,))
+                for channel in self.channels
+            } if length else {}
+        return self.length
+
+    def column(self, channel):
+        """整列的内存映射视图"""
+        import numpy as np
+
+        self.refresh()
+        return self._columns.get(channel, np.zeros(0))
+
+    def slice(self, t_start, t_end):
+        """时间在 [t_start, t_end] 内的样本，返回 {通道: 内存映射切片}"""
+        import numpy as np
+
+        if not self.refresh():
+            return {channel: np.zeros(0) for channel in self.channels}
+        t = self._columns['t']
+        first = int(np.searchsorted(t, t_start, side='left'))
+        last = int(np.searchsorted(t, t_end, side='right'))
+        return {channel: column[first:last] for channel, column in self._columns.items()}
+
+
+def read_events(path):
+    """读取记录中的全部事件"""
+    events = []
+    events_path = os.path.join(path, EVENTS_FILE)
+    if not os.path.exists(events_path):
+        return events
+    with open(events_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    return events
+
+
+def prune_sessions(directory, keep, dry_run=False):
+    """
+    只保留 directory 下最新的 keep 个会话记录，删除更早的，返回删除的路径列表
+
+    只处理按开始时间命名（YYYYMMDD-HHMMSS）且包含 meta.json 的目录，其他文件不动；
+    dry_run 为真时不删除，只返回应删除的路径。
+    """
+    if not os.path.isdir(directory):
+        return []
+    sessions = sorted(name for name in os.listdir(directory)
+                      if SESSION_NAME.match(name)
+                      and os.path.isfile(os.path.join(directory, name, META_FILE)))
+    removed = []
+    for name in sessions[:max(len(sessions) - keep, 0)]:
+        path = os.path.join(directory, name)
+        if dry_run:
+            removed.append(path)
+            continue
+        try:
+            shutil.rmtree(path)
+        except OSError as e:
+            print(f"删除旧的会话记录 {path} 失败: {e}", file=sys.stderr)
+            continue
+        removed.append(path)
+    return removed
@@ -0,0 +1,251 @@
+"""
+离线渲染录像
+
+从采集记录直接生成录像，不需要按实际时间回放：
+    python render_video.py run01 run01.mp4 --fps 30 --speed 4
+
+每一帧对应记录中的一个时刻：表盘显示该时刻的航向角和红外方位角，曲线图显示
+之前 --window 秒的曲线。帧按连续区间分给多个进程（每个进程有自己的离屏 QApplication），
+CPU 有多少核就能并行渲染多少段，速度通常是实际时间的几十倍以上。
+有 ffmpeg 时每个进程编码一段 MP4，最后无损拼接；否则输出为 PNG 图片序列目录。
+"""
+import argparse
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from recording import open_recording
+
+
+def frame_times(t_first, t_last, fps, speed=1.0):
+    """每一帧对应的记录时间（Unix 秒），speed 为每秒录像对应的记录秒数"""
+    import numpy as np
+
+    count = int(math.floor((t_last - t_first) * fps / speed + 1e-9)) + 1 if t_last >= t_first else 0
+    return t_first + np.arange(count) * (speed / fps)
+
+
+def split_frames(count, parts):
+    """把 count 帧分成至多 parts 个连续区间 [(first, last), ...]"""
+    parts = max(1, min(parts, count))
+    bounds = [count * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i + 1] > bounds[i]]
+
+
+def _recording_schema(channels):
+    """按记录中的通道构造数据格式，未知通道按普通数值显示"""
+    from schema import CHANNELS, SCHEMAS, Channel, Schema
+
+    names = tuple(channel for channel in channels if channel != 't')
+    for schema in SCHEMAS.values():
+        if schema.names == names:
+            return schema
+    return Schema('recording', "记录", [CHANNELS.get(name) or Channel(name, name, unit='', kind='value')
+                                       for name in names])
+
+
+def _render_range(job):
+    """
+    在子进程中渲染 [first, last) 帧，返回 (first, 帧数, 输出路径)
+
+    每帧直接从内存映射的记录中二分查找出曲线窗口内的样本并按像素宽度降采样，
+    内存占用只与窗口长度有关，与分段长度无关。曲线横坐标以记录开始时间为基准，各段拼接后坐标连续。
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    import numpy as np
+    import pyqtgraph as pg
+    from PyQt5.QtWidgets import QApplication
+    from capture import FfmpegWriter, PngSequenceWriter, render_panels
+    from decimation import minmax_decimate
+    from visualization import AttitudePlot, ShipAttitudeWidget
+
+    app = QApplication.instance() or QApplication([])
+    meta, columns = open_recording(job['recording'])
+    times = frame_times(job['t_first'], job['t_last'], job['fps'], job['speed'])[job['first']:job['last']]
+    t = columns['t']
+    t0 = float(t[0])
+
+    ship = ShipAttitudeWidget()
+    ship.resize(job['height'], job['height'])
+    plot_widget = pg.PlotWidget()
+    plot_widget.resize(2 * job['height'], job['height'])
+    # 只借用曲线图的坐标轴、图例和曲线样式，数据不写入它的样本历史
+    plot = AttitudePlot(plot_widget, data_length=1, schema=_recording_schema(meta['channels']))
+    plot.set_channels(job['channels'])
+    plot_widget.getViewBox().disableAutoRange()
+    plot_widget.setYRange(*job['y_range'])
+    if job['y_label'] is not None:
+        plot_widget.setLabel('left', *job['y_label'])
+    for widget in (ship, plot_widget):
+        widget.show()
+    app.processEvents()
+
+    if job['ffmpeg']:
+        writer = FfmpegWriter(job['output'], job['fps'], job['ffmpeg'])
+    else:
+        writer = PngSequenceWriter(job['output'], first=job['first'] + 1)
+    headings, irs = columns['heading'], columns['ir']
+    max_points = 2 * int(plot_widget.getViewBox().width())
+    try:
+        for now in times.tolist():
+            lo = int(np.searchsorted(t, now - job['window'], side='left'))
+            hi = int(np.searchsorted(t, now, side='right'))
+            i = hi - 1
+            # 样本缺失（NaN）时表盘保持上一个有效角度
+            if i >= 0 and not (math.isnan(headings[i]) or math.isnan(irs[i])):
+                ship.set_angles(float(headings[i]), float(irs[i]))
+            x = now - t0
+            plot_widget.setXRange(x - job['window'], x, padding=0)
+            plot_widget.setTitle(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+                                 + f".{int(now * 1000) % 1000:03d}")
+            xs, ys = minmax_decimate(t[lo:hi] - t0, {name: columns[name][lo:hi] for name in plot.curves},
+                                     max_points)
+            for name, curve in plot.curves.items():
+                curve.setData(xs, np.asarray(ys[name]))
+            writer.write(render_panels([ship, plot_widget]))
+    finally:
+        writer.close()
+    return job['first'], writer.count, job['output']
+
+
+def plot_range(columns, channels, schema):
+    """
+    曲线图的纵轴范围和标签 ((下限, 上限), (标签, 单位) 或 None)
+
+    全部是角度通道时与界面相同（-10~370 度）；否则取整个记录中这些通道的范围，
+    整段录像纵轴固定，不随画面跳动。
+    """
+    import numpy as np
+
+    if all(schema[name].kind == 'angle' for name in channels):
+        return (-10.0, 370.0), None
+    low = min(float(np.nanmin(columns[name])) if np.isfinite(columns[name]).any() else 0.0
+              for name in channels)
+    high = max(float(np.nanmax(columns[name])) if np.isfinite(columns[name]).any() else 1.0
+               for name in channels)
+    margin = (high - low) * 0.05 or 1.0
+    units = {schema[name].unit for name in channels}
+    unit = units.pop() if len(units) == 1 else ''
+    return (low - margin, high + margin), ('数值', unit)
+
+
+def _concat(ffmpeg, segments, output):
+    """用 ffmpeg 的 concat 无损拼接各段"""
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+        for segment in segments:
+            f.write("file '{}'\n".format(os.path.abspath(segment).replace("'", "'\\''")))
+        listing = f.name
+    try:
+        subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                        '-i', listing, '-c', 'copy', output], check=True)
+    finally:
+        os.remove(listing)
+
+
+def render(recording, output, fps=30, speed=1.0, window=60.0, start=None, end=None,
+           height=480, workers=None, ffmpeg=None, progress=None, channels=('heading', 'ir')):
+    """
+    渲染整段记录（或 start~end 秒，相对记录开始），返回 (帧数, 输出路径)
+
+    channels 为曲线图显示的通道；ffmpeg 为 None 时自动查找，为 '' 时输出 PNG 序列；progress(完成帧数, 总帧数) 在每段完成后调用。
+    """
+    from capture import find_ffmpeg
+
+    meta, columns = open_recording(recording)
+    t = columns['t']
+    if len(t) == 0:
+        raise ValueError(f"记录 {recording} 中没有样本")
+    schema = _recording_schema(meta['channels'])
+    unknown = [name for name in channels if name not in schema]
+    if unknown:
+        raise ValueError(f"记录中没有通道 {', '.join(unknown)}，可用通道: {', '.join(schema.names)}")
+    y_range, y_label = plot_range(columns, channels, schema)
+    t_first = float(t[0]) + (start or 0.0)
+    t_last = float(t[-1]) if end is None else min(float(t[-1]), float(t[0]) + end)
+    count = len(frame_times(t_first, t_last, fps, speed))
+    if count == 0:
+        raise ValueError("选择的时间范围内没有帧")
+
+    if ffmpeg is None:
+        ffmpeg = find_ffmpeg()
+    workers = workers or os.cpu_count() or 1
+    ranges = split_frames(count, workers)
+    if ffmpeg:
+        if not output.lower().endswith('.mp4'):
+            output += '.mp4'
+        segment_dir = tempfile.mkdtemp(prefix='nave-render-', dir=os.path.dirname(os.path.abspath(output)))
+    jobs = [{'recording': recording, 'first': first, 'last': last, 't_first': t_first, 't_last': t_last,
+             'fps': fps, 'speed': speed, 'window': window, 'height': height, 'ffmpeg': ffmpeg,
+             'channels': tuple(channels), 'y_range': y_range, 'y_label': y_label,
+             'output': os.path.join(segment_dir, f"{first:08d}.mp4") if ffmpeg else output}
+            for first, last in ranges]
+
+    done = 0
+    segments = {}
+    try:
+        # 每个进程需要独立的 QApplication，用 spawn 启动，不继承父进程的状态
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=get_context('spawn')) as pool:
+            for future in as_completed([pool.submit(_render_range, job) for job in jobs]):
+                first, frames, path = future.result()
+                segments[first] = path
+                done += frames
+                if progress is not None:
+                    progress(done, count)
+        if ffmpeg:
+            _concat(ffmpeg, [segments[first] for first in sorted(segments)], output)
+    finally:
+        if ffmpeg:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+    return done, output
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python render_video.py",
+                                     description="从采集记录离线渲染表盘和曲线录像")
+    parser.add_argument('recording', help="记录目录")
+    parser.add_argument('output', help="输出文件（.mp4）；没有 ffmpeg 时为 PNG 序列目录")
+    parser.add_argument('--fps', type=int, default=30, help="录像帧率（默认 30）")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="播放倍速，即每秒录像对应的记录秒数（默认 1.0）")
+    parser.add_argument('--window', type=float, default=60.0, help="曲线图显示的时间窗口（秒，默认 60）")
+    parser.add_argument('--channels', default='heading,ir',
+                        help="曲线图显示的通道，逗号分隔（默认 heading,ir）")
+    parser.add_argument('--start', type=float, help="开始时间（相对记录开始的秒数）")
+    parser.add_argument('--end', type=float, help="结束时间（相对记录开始的秒数）")
+    parser.add_argument('--height', type=int, default=480, help="画面高度（像素，默认 480，宽度为 3 倍）")
+    parser.add_argument('--workers', type=int, help="渲染进程数（默认 CPU 核数）")
+    parser.add_argument('--png', action='store_true', help="总是输出 PNG 序列，不使用 ffmpeg")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.monotonic()
+
+    def report(done, total):
+        print(f"已渲染 {done}/{total} 帧", flush=True)
+
+    try:
+        frames, output = render(args.recording, args.output, fps=args.fps, speed=args.speed,
+                                window=args.window, start=args.start, end=args.end,
+                                height=args.height, workers=args.workers,
+                                ffmpeg='' if args.png else None, progress=report,
+                                channels=[name for name in args.channels.split(',') if name])
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"渲染失败: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.monotonic() - started
+    video = frames / args.fps
+    print(f"已写入 {output}: {frames} 帧（{video:.1f} 秒录像，对应记录 {video * args.speed:.1f} 秒），"
+          f"用时 {elapsed:.1f} 秒，为实际时间的 {video * args.speed / elapsed:.1f} 倍")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+滚动圆周统计（不依赖 Qt，统计面板见 visualization.StatsPanel）
+
+航向角和红外方位角是圆周量，不能直接求算术平均：这里累加单位向量的 sin/cos，
+圆周均值为 atan2(ΣS, ΣC)，圆周标准差为 sqrt(-2 ln R)（R 为平均合成向量长度）。
+转向速率由展开后的航向角（逐样本累加最短弧角差）在窗口首尾之差除以时间差得到。
+
+每个时间窗口被分成 slots 个时间槽，每个槽保存样本数、sin/cos 之和以及槽内第一个样本的
+时间和展开角。新样本累加到最新的槽，过期的槽整体移出并从累计和中减去，
+因此每个样本的开销为 O(1)，内存与采样率无关；窗口边界的精度为窗口长度的 1/slots。
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+from interpolation import unwrap_degrees
+
+# 默认统计窗口（秒）及显示名称
+WINDOWS = ((10.0, "10 秒"), (60.0, "1 分钟"), (600.0, "10 分钟"))
+
+
+class RollingCircularStats:
+    """一个时间窗口内的圆周均值、圆周标准差和变化速率"""
+
+    def __init__(self, seconds, slots=100):
+        self.seconds = float(seconds)
+        self.slots = int(slots)
+        self.slot_width = self.seconds / self.slots
+        # 每个槽：[槽序号, 样本数, Σsin, Σcos, 第一个样本时间, 第一个样本展开角]
+        self._slots = deque()
+        self.count = 0
+        self._sin = 0.0
+        self._cos = 0.0
+        self._last_t = None
+        self._last_unwrapped = None
+
+    def extend(self, t, sin_a, cos_a, unwrapped):
+        """
+        加入一批按时间排序的样本（均为等长数组，角度已转为 sin/cos 并展开）
+
+        缺失的样本（NaN）不计入，否则累计和会一直是 NaN，样本过期后也无法恢复。
+        """
+        valid = np.isfinite(sin_a) & np.isfinite(cos_a) & np.isfinite(unwrapped)
+        if not valid.all():
+            t, sin_a, cos_a, unwrapped = (np.asarray(a)[valid] for a in (t, sin_a, cos_a, unwrapped))
+        n = len(t)
+        if n == 0:
+            return
+        ids = np.floor(np.asarray(t) / self.slot_width).astype(np.int64)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+        counts = np.diff(np.append(starts, n))
+        sin_sums = np.add.reduceat(sin_a, starts)
+        cos_sums = np.add.reduceat(cos_a, starts)
+
+        slots = self._slots
+        for slot_id, count, s, c, first in zip(ids[starts].tolist(), counts.tolist(),
+                                               sin_sums.tolist(), cos_sums.tolist(),
+                                               starts.tolist()):
+            if slots and slots[-1][0] == slot_id:
+                slot = slots[-1]
+                slot[1] += count
+                slot[2] += s
+                slot[3] += c
+            else:
+                slots.append([slot_id, count, s, c, float(t[first]), float(unwrapped[first])])
+            self.count += count
+            self._sin += s
+            self._cos += c
+
+        # 移出窗口之外的槽
+        oldest = int(ids[-1]) - self.slots + 1
+        while slots and slots[0][0] < oldest:
+            _, count, s, c, _, _ = slots.popleft()
+            self.count -= count
+            self._sin -= s
+            self._cos -= c
+        if self.count == 0:
+            self._sin = self._cos = 0.0
+        self._last_t = float(t[-1])
+        self._last_unwrapped = float(unwrapped[-1])
+
+    def resultant(self):
+        """平均合成向量长度 R（0~1），没有样本时返回 None"""
+        if self.count == 0:
+            return None
+        return min(1.0, math.hypot(self._sin, self._cos) / self.count)
+
+    def mean(self):
+        """圆周均值（度，0~360），没有样本时返回 None"""
+        if self.count == 0:
+            return None
+        return math.degrees(math.atan2(self._sin, self._cos)) % 360.0
+
+    def std(self):
+        """圆周标准差（度），没有样本时返回 None"""
+        r = self.resultant()
+        if r is None:
+            return None
+        if r <= 0.0:
+            return float('inf')
+        return math.degrees(math.sqrt(-2.0 * math.log(r)))
+
+    def rate(self):
+        """窗口内的平均变化速率（度/秒），样本跨度为 0 时返回 None"""
+        if not self._slots:
+            return None
+        first_t, first_unwrapped = self._slots[0][4], self._slots[0][5]
+        if self._last_t <= first_t:
+            return None
+        return (self._last_unwrapped - first_unwrapped) / (self._last_t - first_t)
+
+
+class ChannelStats:
+    """单个角度通道在多个窗口上的统计"""
+
+    def __init__(self, windows=WINDOWS, slots=100):
+        self.windows = {seconds: RollingCircularStats(seconds, slots) for seconds, _ in windows}
+        self._last_angle = None
+        self._last_unwrapped = 0.0
+
+    def extend(self, timestamps, angles):
+        angles = np.asarray(angles, dtype=np.float64)
+        if len(angles) == 0:
+            return
+        t = np.asarray(timestamps, dtype=np.float64)
+        # 缺失的角度（NaN）不参与展开和统计，展开状态保持为最后一个有效角度
+        valid = np.isfinite(angles)
+        if not valid.all():
+            t, angles = t[valid], angles[valid]
+            if len(angles) == 0:
+                return
+        unwrapped = unwrap_degrees(angles, self._last_angle, self._last_unwrapped)
+        self._last_angle = float(angles[-1])
+        self._last_unwrapped = float(unwrapped[-1])
+        radians = np.radians(angles)
+        sin_a = np.sin(radians)
+        cos_a = np.cos(radians)
+        for stats in self.windows.values():
+            stats.extend(t, sin_a, cos_a, unwrapped)
+
+
+class StreamStats:
+    """航向角和红外方位角的滚动统计，由采集到的样本批次驱动"""
+
+    def __init__(self, windows=WINDOWS, slots=100):
+        self.heading = ChannelStats(windows, slots)
+        self.ir = ChannelStats(windows, slots)
+        # 自上次读取之后是否有新样本
+        self.changed = False
+
+    def extend(self, timestamps, headings, irs):
+        """加入一批样本"""
+        if len(headings) == 0:
+            return
+        self.heading.extend(timestamps, headings)
+        self.ir.extend(timestamps, irs)
+        self.changed = True
+
@@ -0,0 +1,251 @@
+"""
+样本存储
+
+SampleRing 是预分配的镜像环形缓冲：每个样本同时写入位置 i 和 i + capacity，
+因此最近任意 n 个样本在内存中总是连续的，插入为 O(1)，
+绘图时可以直接把视图交给 pyqtgraph，无需拼接或复制。
+
+HistoryStore 把环形缓冲、降采样金字塔和磁盘记录组合为按时间查询的完整历史。
+"""
+import numpy as np
+
+from decimation import MinMaxPyramid, minmax_decimate
+
+
+class SampleRing:
+    """按通道存放的镜像环形缓冲，数组形状为 (通道数, 2 * capacity)"""
+
+    def __init__(self, capacity, channels=('t', 'heading', 'ir'), dtype=np.float64):
+        self.capacity = int(capacity)
+        self.channels = tuple(channels)
+        self._channel_index = {name: i for i, name in enumerate(self.channels)}
+        # 每个通道占一行，行内连续，取单个通道的视图不需要跨步
+        self._data = np.zeros((len(self.channels), 2 * self.capacity), dtype=dtype)
+        self._rows = [self._data[i] for i in range(len(self.channels))]
+        # 下一个写入位置（0 <= head < capacity）
+        self._head = 0
+        # 累计写入的样本数
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def channel_index(self, name):
+        return self._channel_index[name]
+
+    def append(self, *values):
+        """追加一个样本，values 按通道顺序给出"""
+        head = self._head
+        mirror = head + self.capacity
+        for row, value in zip(self._rows, values):
+            row[head] = value
+            row[mirror] = value
+        head += 1
+        self._head = 0 if head == self.capacity else head
+        self.count += 1
+
+    def extend(self, *columns):
+        """批量追加样本，columns 按通道顺序给出等长数组，用切片赋值写入"""
+        dtype = self._data.dtype
+        columns = [np.asarray(column, dtype=dtype) for column in columns]
+        n = len(columns[0])
+        if n == 0:
+            return
+        capacity = self.capacity
+        self.count += n
+        if n >= capacity:
+            # 超过容量时只保留最后 capacity 个
+            for row, column in zip(self._rows, columns):
+                row[:capacity] = column[-capacity:]
+                row[capacity:] = column[-capacity:]
+            self._head = 0
+            return
+
+        head = self._head
+        first = min(n, capacity - head)
+        rest = n - first
+        for row, column in zip(self._rows, columns):
+            row[head:head + first] = column[:first]
+            row[head + capacity:head + capacity + first] = column[:first]
+            if rest:
+                row[:rest] = column[first:]
+                row[capacity:capacity + rest] = column[first:]
+        self._head = (head + n) % capacity
+
+    def view(self, channel, n=None):
+        """
+        返回某通道最近 n 个样本的只读连续视图（按时间顺序）
+
+        n 为 None 时返回完整的 capacity 长度窗口（未写入的位置为 0）。
+        """
+        if n is None:
+            n = self.capacity
+        end = self._head + self.capacity
+        view = self._rows[self._channel_index[channel]][end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, channel):
+        """某通道最新的值，没有数据时返回 None"""
+        if self.count == 0:
+            return None
+        return self._rows[self._channel_index[channel]][self._head + self.capacity - 1]
+
+    def clear(self):
+        self._data.fill(0)
+        self._head = 0
+        self.count = 0
+
+
+class HistoryStore:
+    """
+    按时间索引的样本历史
+
+    最近 capacity 个原始样本在内存环形缓冲中，全部历史的最小/最大值金字塔用于长范围的
+    降采样，更早的原始样本可由磁盘记录（recording.RecordingHistory）按需读取。
+    时间以第一个样本的 Unix 时间 t0 为基准（即曲线的横坐标）；各层的时间都有序，
+    按范围取数据时二分查找，开销为 O(log n)。
+    """
+
+    def __init__(self, capacity, channels=('heading', 'ir'), pyramid_base=64):
+        self.channels = tuple(channels)
+        self.ring = SampleRing(capacity, channels=('t',) + self.channels)
+        self.pyramid = MinMaxPyramid(self.channels, base=pyramid_base)
+        # 磁盘记录，其时间戳为 Unix 时间
+        self.disk = None
+        self.t0 = None
+
+    @property
+    def count(self):
+        """累计写入的样本数"""
+        return self.ring.count
+
+    def append(self, timestamp, *values):
+        """追加一个样本，timestamp 为 Unix 时间"""
+        if self.t0 is None:
+            self.t0 = timestamp
+        self.ring.append(timestamp - self.t0, *values)
+        self.pyramid.append(timestamp - self.t0, *values)
+
+    def extend(self, timestamps, *columns):
+        """批量追加样本，timestamps 为 Unix 时间，columns 按通道顺序给出"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(timestamps) == 0:
+            return
+        if self.t0 is None:
+            self.t0 = float(timestamps[0])
+        x = timestamps - self.t0
+        self.ring.extend(x, *columns)
+        self.pyramid.extend(x, *columns)
+
+    def set_disk(self, history):
+        """
+        设置磁盘记录层
+
+        写入端尚未落盘的样本只能从环形缓冲中取，因此要求 history.flush_every 不超过环形缓冲容量，
+        否则已离开环形缓冲、又还没写入磁盘的样本会从查询结果中漏掉。
+        """
+        flush_every = getattr(history, 'flush_every', None)
+        if flush_every is not None and flush_every > self.ring.capacity:
+            raise ValueError(f"记录每 {flush_every} 个样本落盘一次，超过环形缓冲容量 {self.ring.capacity}")
+        self.disk = history
+
+    def _ring_columns(self):
+        n = len(self.ring)
+        return self.ring.view('t', n), {channel: self.ring.view(channel, n) for channel in self.channels}
+
+    def time_range(self):
+        """全部历史的时间范围 (最早, 最新)，没有样本时返回 None"""
+        if self.t0 is None:
+            return None
+        ring_x, _ = self._ring_columns()
+        first = float(ring_x[0])
+        if self.disk is not None and self.disk.refresh():
+            first = min(first, float(self.disk.column('t')[0]) - self.t0)
+        return first, float(ring_x[-1])
+
+    def nearest(self, t, channels=None):
+        """
+        离 t 最近的原始样本，返回 (时间, {通道: 值})；没有可查的原始样本时返回 None
+
+        在环形缓冲或磁盘记录的时间列上二分查找，与样本总数无关。
+        早于环形缓冲、又没有磁盘记录时原始样本已经丢弃，返回 None。
+        """
+        if self.t0 is None:
+            return None
+        channels = self.channels if channels is None else channels
+        ring_x, ring_ys = self._ring_columns()
+        offset = 0.0
+        x, ys = ring_x, ring_ys
+        if t < ring_x[0] and self.ring.count > self.ring.capacity:
+            if self.disk is None or not self.disk.refresh():
+                return None
+            # 磁盘记录的时间为 Unix 时间
+            offset = self.t0
+            x = self.disk.column('t')
+            ys = {channel: self.disk.column(channel) for channel in channels}
+        i = int(np.searchsorted(x, t + offset))
+        if i == len(x) or (i > 0 and t + offset - x[i - 1] <= x[i] - (t + offset)):
+            i -= 1
+        return float(x[i] - offset), {channel: float(ys[channel][i]) for channel in channels}
+
+    def segments(self, t_start, t_end, unix=False):
+        """
+        [t_start, t_end] 内的原始样本，按时间顺序分段返回 [{'t': 时间, 通道: 数组}, ...]
+
+        环形缓冲中的部分是不复制的视图，磁盘上的部分是内存映射切片（时间列换算基准时除外）；
+        unix 为真时时间为 Unix 时间，此时磁盘部分的时间列也不复制。
+        """
+        if self.t0 is None:
+            return []
+        ring_x, ring_ys = self._ring_columns()
+        first = int(np.searchsorted(ring_x, t_start, side='left'))
+        last = int(np.searchsorted(ring_x, t_end, side='right'))
+        segments = []
+        if self.disk is not None and (len(ring_x) == 0 or t_start < ring_x[0]):
+            # 范围从环形缓冲之前开始，较早的部分从磁盘读取；尚未落盘的最新样本只在环形缓冲中
+            page = self.disk.slice(self.t0 + t_start, self.t0 + t_end)
+            if len(page['t']):
+                segment = {channel: page[channel] for channel in self.channels}
+                segment['t'] = page['t'] if unix else page['t'] - self.t0
+                segments.append(segment)
+                first = int(np.searchsorted(ring_x, page['t'][-1] - self.t0, side='right'))
+                last = max(first, last)
+        if last > first:
+            segment = {channel: ys[first:last] for channel, ys in ring_ys.items()}
+            segment['t'] = ring_x[first:last] + self.t0 if unix else ring_x[first:last]
+            segments.append(segment)
+        return segments
+
+    def query(self, t_start, t_end, max_points=None, channels=None):
+        """
+        取 [t_start, t_end] 内的样本，返回 (时间, {通道: 数组})
+
+        channels 为需要的通道（默认全部），其余通道不会被拼接或降采样。
+        max_points 为 None 时返回全部原始样本；否则点数多时返回金字塔或临时的
+        最小/最大值降采样结果。结果只来自一段时（环形缓冲、磁盘或金字塔的一层）是不复制的视图，
+        跨段时才拼接。
+        """
+        channels = self.channels if channels is None else tuple(channels)
+        if max_points is not None and self.t0 is not None:
+            ring_x, _ = self._ring_columns()
+            in_ring = len(ring_x) > 0 and t_start >= ring_x[0]
+            decimated = self.pyramid.query(t_start, t_end, max_points,
+                                           raw_available=in_ring or self.disk is not None,
+                                           channels=channels)
+            if decimated is not None:
+                return decimated
+
+        segments = self.segments(t_start, t_end)
+        if not segments:
+            return np.zeros(0), {channel: np.zeros(0) for channel in channels}
+        if len(segments) == 1:
+            x = segments[0]['t']
+            ys = {channel: segments[0][channel] for channel in channels}
+        else:
+            x = np.concatenate([segment['t'] for segment in segments])
+            ys = {channel: np.concatenate([segment[channel] for segment in segments])
+                  for channel in channels}
+        if max_points is not None:
+            x, ys = minmax_decimate(x, ys, max_points)
+        return x, ys
@@ -0,0 +1,107 @@
+"""
+样本通道定义（不依赖 Qt 和 numpy）
+
+传感器每行发送若干个逗号分隔的数值，Schema 按位置给每个字段命名。
+前 required 个通道是必需的，缺少或无法解析时整行作为解析错误；其余通道可选，
+缺少或无法解析时记为 NaN，因此只发送航向/红外的旧传感器也能使用扩展格式。
+所有格式的前两个通道都是航向角和红外方位角。
+
+采集、记录、曲线图按 Schema 的通道顺序保存数据，新增物理量只需要在这里增加一个通道。
+"""
+import math
+import struct
+
+NAN = float('nan')
+
+
+class Channel:
+    """一个样本通道"""
+
+    def __init__(self, name, label, unit='°', kind='angle', color=(0, 0, 0)):
+        self.name = name
+        self.label = label
+        self.unit = unit
+        # angle: 0~360 度的角度；value: 普通数值；id: 整数编号
+        self.kind = kind
+        self.color = color
+
+    def format(self, value):
+        """读数框中显示的文本"""
+        if math.isnan(value):
+            return '-'
+        if self.kind == 'id':
+            return str(int(value))
+        return f"{value:.1f}"
+
+
+class Schema:
+    """按字段位置排列的通道列表"""
+
+    def __init__(self, name, label, channels, required=2):
+        self.name = name
+        self.label = label
+        self.channels = tuple(channels)
+        self.required = required
+        self.names = tuple(channel.name for channel in self.channels)
+        self._by_name = {channel.name: channel for channel in self.channels}
+
+    def __len__(self):
+        return len(self.channels)
+
+    def __iter__(self):
+        return iter(self.channels)
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def parse_fields(self, parts):
+        """
+        把一行的各字段解析为按通道顺序的数值元组
+
+        必需字段不足或无法解析时抛出 ValueError / IndexError。
+        """
+        if len(parts) < self.required:
+            raise IndexError(f"字段数 {len(parts)} 少于 {self.required}")
+        values = [float(parts[i]) for i in range(self.required)]
+        for i in range(self.required, len(self.channels)):
+            try:
+                values.append(float(parts[i]))
+            except (IndexError, ValueError):
+                values.append(NAN)
+        return tuple(values)
+
+    def parse_binary(self, raw_data):
+        """二进制帧：开头为若干个 float32（至少 required 个），不足的通道记为 NaN"""
+        count = min(len(raw_data) // 4, len(self.channels))
+        if count < self.required:
+            return None
+        values = struct.unpack(f'{count}f', raw_data[:4 * count])
+        return tuple(values) + (NAN,) * (len(self.channels) - count)
+
+
+HEADING = Channel('heading', "航向角", color=(0, 0, 255))
+IR = Channel('ir', "红外方位角", color=(255, 0, 0))
+PITCH = Channel('pitch', "俯仰角", color=(0, 150, 0))
+ROLL = Channel('roll', "横滚角", color=(200, 120, 0))
+IR_STRENGTH = Channel('ir_strength', "红外信号强度", unit='', kind='value', color=(128, 0, 128))
+TARGET_ID = Channel('target_id', "目标编号", unit='', kind='id', color=(100, 100, 100))
+
+BASIC = Schema('basic', "航向 + 红外", (HEADING, IR))
+EXTENDED = Schema('extended', "扩展（俯仰、横滚、红外强度、目标编号）",
+                  (HEADING, IR, PITCH, ROLL, IR_STRENGTH, TARGET_ID))
+SCHEMAS = {schema.name: schema for schema in (BASIC, EXTENDED)}
+# 全部已知通道，按名称查找单位等信息
+CHANNELS = {channel.name: channel for schema in SCHEMAS.values() for channel in schema}
+
+
+def get_schema(name):
+    """按名称取数据格式"""
+    if name not in SCHEMAS:
+        raise ValueError(f"未知的数据格式 {name!r}，可用格式: {', '.join(SCHEMAS)}")
+    return SCHEMAS[name]
@@ -0,0 +1,157 @@
+"""
+滑动窗口频谱（不依赖 Qt）
+
+对样本流做重叠窗口的 FFT：每到达 hop 个新样本就计算一帧长度为 fft_size 的频谱，
+已经算过的帧不再重算。一批数据带来多帧时整批向量化计算。
+
+角度先展开为连续值（跨越 0/360 不产生阶跃），每帧去掉线性趋势（匀速转向）后加 Hann 窗。
+缺失的样本（NaN）用之前最近的有效值代替。
+采样率取自该帧首尾样本的真实时间戳，而不是假定的名义速率。
+最近 columns 帧保存在镜像环形缓冲中，时频图可以直接取连续视图显示。
+"""
+import numpy as np
+
+from interpolation import unwrap_degrees
+
+
+def _fill_missing(values, previous=None):
+    """
+    缺失的样本（NaN）用之前最近的有效值代替（批次开头用 previous）
+
+    FFT 需要等间隔的连续样本，不能简单跳过；NaN 如果进入展开状态，之后所有帧都会是 NaN。
+    之前没有任何有效值时用本批第一个有效值，整批都缺失时为 0。
+    """
+    valid = np.isfinite(values)
+    if valid.all():
+        return values
+    index = np.maximum.accumulate(np.where(valid, np.arange(len(values)), -1))
+    if previous is None:
+        previous = values[valid][0] if valid.any() else 0.0
+    return np.where(index >= 0, values[np.maximum(index, 0)], previous)
+
+
+class SlidingSpectrum:
+    """多通道的重叠窗口频谱与时频图"""
+
+    def __init__(self, channels=('heading', 'ir'), fft_size=256, hop=64, columns=240):
+        self.channels = tuple(channels)
+        self.fft_size = int(fft_size)
+        self.hop = int(hop)
+        self.columns = int(columns)
+        self.bins = self.fft_size // 2 + 1
+        self._window = np.hanning(self.fft_size)
+        # 去趋势用的中心化序号
+        self._ramp = np.arange(self.fft_size) - (self.fft_size - 1) / 2.0
+        self._ramp_norm = float(self._ramp @ self._ramp)
+
+        # 尚未用完的样本（下一帧的起点在 _t[0]）
+        self._t = np.empty(0)
+        self._values = {channel: np.empty(0) for channel in self.channels}
+        self._unwrap = {channel: (None, 0.0) for channel in self.channels}
+
+        # 时频图：镜像环形缓冲，每行一帧（dB），_times 为每帧的中心时间，_rates 为采样率
+        self._images = {channel: np.zeros((2 * self.columns, self.bins))
+                        for channel in self.channels}
+        self._times = np.zeros(2 * self.columns)
+        self._rates = np.zeros(2 * self.columns)
+        self._head = 0
+        self.count = 0
+        # 自上次取图像之后是否有新帧
+        self.changed = False
+
+    def extend(self, timestamps, *columns):
+        """加入一批样本，columns 按通道顺序给出角度（度），返回新计算的帧数"""
+        t_new = np.asarray(timestamps, dtype=np.float64)
+        if len(t_new) == 0:
+            return 0
+        self._t = np.concatenate((self._t, t_new))
+        for channel, column in zip(self.channels, columns):
+            previous, offset = self._unwrap[channel]
+            column = _fill_missing(np.asarray(column, dtype=np.float64), previous)
+            unwrapped = unwrap_degrees(column, previous, offset)
+            self._unwrap[channel] = (float(column[-1]), float(unwrapped[-1]))
+            self._values[channel] = np.concatenate((self._values[channel], unwrapped))
+
+        n = self.fft_size
+        frames = (len(self._t) - n) // self.hop + 1 if len(self._t) >= n else 0
+        if frames <= 0:
+            return 0
+        starts = np.arange(frames) * self.hop
+
+        t_frames = np.lib.stride_tricks.sliding_window_view(self._t, n)[starts]
+        spans = t_frames[:, -1] - t_frames[:, 0]
+        rates = np.where(spans > 0, (n - 1) / np.where(spans > 0, spans, 1.0), 0.0)
+        centers = (t_frames[:, 0] + t_frames[:, -1]) / 2
+
+        spectra = {}
+        for channel in self.channels:
+            x = np.lib.stride_tricks.sliding_window_view(self._values[channel], n)[starts]
+            x = x - x.mean(axis=1, keepdims=True)
+            slope = (x @ self._ramp) / self._ramp_norm
+            x = (x - slope[:, None] * self._ramp) * self._window
+            magnitude = np.abs(np.fft.rfft(x, axis=1)) * (2.0 / self._window.sum())
+            spectra[channel] = 20.0 * np.log10(magnitude + 1e-6)
+        self._push(centers, rates, spectra)
+
+        # 丢弃不会再用到的样本
+        used = frames * self.hop
+        self._t = self._t[used:]
+        for channel in self.channels:
+            self._values[channel] = self._values[channel][used:]
+        return frames
+
+    def _push(self, centers, rates, spectra):
+        """把若干帧写入镜像环形缓冲"""
+        k = len(centers)
+        if k > self.columns:
+            centers = centers[-self.columns:]
+            rates = rates[-self.columns:]
+            spectra = {channel: s[-self.columns:] for channel, s in spectra.items()}
+            self.count += k - self.columns
+            k = self.columns
+        cols = self.columns
+        rows = (self._head + np.arange(k)) % cols
+        for rows_at in (rows, rows + cols):
+            self._times[rows_at] = centers
+            self._rates[rows_at] = rates
+            for channel, s in spectra.items():
+                self._images[channel][rows_at] = s
+        self._head = (self._head + k) % cols
+        self.count += k
+        self.changed = True
+
+    def __len__(self):
+        return min(self.count, self.columns)
+
+    def image(self, channel):
+        """某通道最近的帧，形状为 (帧数, 频点数)，按时间顺序的只读视图（dB）"""
+        n = len(self)
+        end = self._head + self.columns
+        view = self._images[channel][end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def times(self):
+        """最近各帧的中心时间（与时间戳同一基准）"""
+        n = len(self)
+        end = self._head + self.columns
+        return self._times[end - n:end]
+
+    def sample_rate(self):
+        """最新一帧的采样率（Hz），没有帧时返回 None"""
+        if self.count == 0:
+            return None
+        return float(self._rates[self._head + self.columns - 1])
+
+    def frequencies(self):
+        """按最新采样率计算的各频点频率（Hz）"""
+        rate = self.sample_rate()
+        if not rate:
+            return np.zeros(self.bins)
+        return np.fft.rfftfreq(self.fft_size, 1.0 / rate)
+
+    def latest(self, channel):
+        """最新一帧的频谱 (频率, dB)"""
+        if self.count == 0:
+            return np.zeros(0), np.zeros(0)
+        return self.frequencies(), self._images[channel][self._head + self.columns - 1]
@@ -0,0 +1,188 @@
+import struct
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from acquisition import Acquisition, decode_text, parse_sample
+from recording import RecordingWriter, RecordingHistory, open_recording, read_channels, read_events
+from schema import EXTENDED
+
+
+class FakeSerial:
+    """模拟串口：按块返回预先准备好的数据"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, size):
+        return self.chunks.pop(0)
+
+
+def test_parse_sample():
+    """测试文本与二进制格式的样本解析"""
+    assert parse_sample(b"45.5,90\r\n") == (45.5, 90.0)
+    assert parse_sample(b"12,34,extra\n") == (12.0, 34.0)
+    assert parse_sample(b"hello\n") is None
+    binary = struct.pack('ff', 1.5, 2.5) + b'\xff\xfe'
+    assert parse_sample(binary) == (1.5, 2.5)
+    assert decode_text(b'\xff\xfe') == 'FF FE'
+
+
+def test_acquisition_splits_lines_across_reads(tmp_path):
+    """测试跨读取块的行拼接、回调与记录"""
+    samples = []
+    batches = []
+    texts = []
+
+    def on_batch(timestamps, columns):
+        batches.append(len(columns['heading']))
+        samples.extend(zip(columns['heading'], columns['ir']))
+
+    recorder = RecordingWriter(str(tmp_path / "rec"))
+    ser = FakeSerial([b"10,20\n30,", b"40\nbad\n", b"50,60\n70,80\n"])
+    acquisition = Acquisition(ser, on_batch=on_batch, on_text=texts.append,
+                              recorder=recorder)
+    while ser.chunks:
+        acquisition.poll()
+    recorder.write_event({'type': 'test'})
+    recorder.close()
+
+    assert samples == [(10.0, 20.0), (30.0, 40.0), (50.0, 60.0), (70.0, 80.0)]
+    assert batches == [1, 1, 2]
+    assert len(texts) == 5
+    assert acquisition.stats.samples == 4
+    # "bad" 字段不足，计为一次解析错误
+    assert acquisition.stats.parse_errors == 1
+
+    meta, columns = open_recording(str(tmp_path / "rec"))
+    assert meta['channels'] == ['t', 'heading', 'ir']
+    assert list(columns['heading']) == [10.0, 30.0, 50.0, 70.0]
+    assert list(columns['ir']) == [20.0, 40.0, 60.0, 80.0]
+    assert all(columns['t'][1:] >= columns['t'][:-1])
+    assert read_events(str(tmp_path / "rec")) == [{'type': 'test'}]
+
+
+def test_extended_schema_columns(tmp_path):
+    """测试扩展数据格式：每个通道一列，可选字段缺失或无效时为 NaN，记录按通道保存"""
+    assert parse_sample(b"1,2,3,4,50,7\n", EXTENDED) == (1.0, 2.0, 3.0, 4.0, 50.0, 7.0)
+    binary = struct.pack('fff', 1.5, 2.5, 3.5) + b'\xff\xfe'
+    assert parse_sample(binary, EXTENDED)[:3] == (1.5, 2.5, 3.5)
+
+    batches = []
+    recorder = RecordingWriter(str(tmp_path / "rec"), channels=('t',) + EXTENDED.names)
+    acquisition = Acquisition(on_batch=lambda t, columns: batches.append(columns),
+                              recorder=recorder, schema=EXTENDED)
+    acquisition.feed(b"10,20,1,2,80,3\n30,40\n50,60,x,5\n", timestamp=100.0)
+    recorder.close()
+
+    columns = batches[0]
+    assert list(columns) == list(EXTENDED.names)
+    assert list(columns['heading']) == [10.0, 30.0, 50.0]
+    assert columns['pitch'][0] == 1.0 and np.isnan(columns['pitch'][1]) and np.isnan(columns['pitch'][2])
+    assert columns['roll'][2] == 5.0
+    meta, recorded = open_recording(str(tmp_path / "rec"))
+    assert meta['channels'] == ['t'] + list(EXTENDED.names)
+    assert recorded['target_id'][0] == 3.0
+    assert RecordingHistory(str(tmp_path / "rec")).slice(0, 200)['ir_strength'][0] == 80.0
+
+
+def test_batch_timestamps_spread_between_reads():
+    """测试同一次读取的样本时间戳在两次读取之间均匀分布"""
+    received = []
+    acquisition = Acquisition(on_batch=lambda t, columns: received.append(list(t)))
+    acquisition.feed(b"1,1\n", timestamp=100.0)
+    acquisition.feed(b"2,2\n3,3\n4,4\n5,5\n", timestamp=100.4)
+    assert received[0] == [100.0]
+    assert received[1] == pytest.approx([100.1, 100.2, 100.3, 100.4])
+
+
+def test_alarm_events_recorded_and_forwarded(tmp_path):
+    """测试报警事件写入记录并交给回调"""
+    from alarms import AlarmEngine, AlarmRule
+
+    alarms = AlarmEngine([AlarmRule("航向跳变", 'jump', threshold=30)])
+    forwarded = []
+    recorder = RecordingWriter(str(tmp_path / "rec"))
+    acquisition = Acquisition(recorder=recorder, alarms=alarms, on_alarm=forwarded.append)
+    acquisition.feed(b"10,0\n", timestamp=100.0)
+    acquisition.feed(b"90,0\n", timestamp=100.1)
+    acquisition.feed(b"91,0\n", timestamp=102.0)
+    acquisition.feed(b"92,0\n", timestamp=103.5)
+    recorder.close()
+
+    assert [(e['rule'], e['state']) for e in forwarded] == [("航向跳变", 'raised'), ("航向跳变", 'cleared')]
+    assert read_events(str(tmp_path / "rec")) == forwarded
+
+
+def test_missing_alarm_fires_while_unparsable_lines_arrive():
+    """测试一直收到缺少红外字段的行时，红外丢失报警仍会触发，这些行计为解析错误"""
+    from alarms import AlarmEngine, AlarmRule
+
+    alarms = AlarmEngine([AlarmRule("红外丢失", 'missing', channel='ir', duration=5)])
+    forwarded = []
+    acquisition = Acquisition(alarms=alarms, on_alarm=forwarded.append)
+    acquisition.feed(b"10,20\n", timestamp=100.0)
+    for i in range(1, 21):
+        acquisition.feed(b"10\n10,\n\n", timestamp=100.0 + i)
+    assert [(e['rule'], e['state']) for e in forwarded] == [("红外丢失", 'raised')]
+    assert 105.0 < forwarded[0]['time'] <= 106.0
+    assert acquisition.stats.parse_errors == 40
+
+
+def test_headless_does_not_import_qt():
+    """测试无界面模式以及各数据处理模块不导入 Qt 和 pyqtgraph"""
+    code = ("import sys, headless, rolling_stats, filters, spectrum, alarms; "
+            "print(any(m.startswith(('PyQt5', 'pyqtgraph')) for m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    assert result.stdout.strip() == 'False'
+
+
+def test_recording_history_follows_growing_file(tmp_path):
+    """测试记录增长后重新映射，并按时间范围取切片"""
+    path = str(tmp_path / "rec")
+    recorder = RecordingWriter(path, flush_every=10)
+    history = RecordingHistory(path)
+    assert history.refresh() == 0
+    recorder.extend([1.0, 2.0, 3.0], [10.0, 20.0, 30.0], [0.0, 0.0, 0.0])
+    recorder.flush()
+    assert history.refresh() == 3
+    recorder.extend([4.0, 5.0], [40.0, 50.0], [0.0, 0.0])
+    recorder.close()
+    page = history.slice(2.0, 4.5)
+    assert list(page['t']) == [2.0, 3.0, 4.0]
+    assert list(page['heading']) == [20.0, 30.0, 40.0]
+
+
+def test_recording_refuses_existing_directory(tmp_path):
+    """测试不会追加到已有记录上，空目录可以使用"""
+    path = str(tmp_path / "rec")
+    RecordingWriter(path).close()
+    with pytest.raises(FileExistsError):
+        RecordingWriter(path, channels=('t',) + EXTENDED.names)
+    assert read_channels(path) == ('t', 'heading', 'ir')
+    (tmp_path / "empty").mkdir()
+    RecordingWriter(str(tmp_path / "empty")).close()
+
+
+def test_prune_sessions_keeps_newest(tmp_path):
+    """测试只删除较早的会话记录目录，其他文件不动"""
+    from recording import prune_sessions
+
+    for name in ("20260101-000000", "20260102-000000", "20260103-000000"):
+        RecordingWriter(str(tmp_path / name)).close()
+    (tmp_path / "20250101-000000").mkdir()
+    (tmp_path / "notes").mkdir()
+    expected = [str(tmp_path / "20260101-000000"), str(tmp_path / "20260102-000000")]
+    assert sorted(prune_sessions(str(tmp_path), 1, dry_run=True)) == expected
+    assert len(list(tmp_path.iterdir())) == 5
+    removed = prune_sessions(str(tmp_path), 1)
+    assert sorted(removed) == expected
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["20250101-000000", "20260103-000000", "notes"]
+    assert prune_sessions(str(tmp_path / "missing"), 1) == []
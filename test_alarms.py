@@ -0,0 +1,118 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from alarms import AlarmEngine, AlarmRule, load_rules
+from schema import EXTENDED
+
+
+def _run(engine, t, heading, ir, batch=7):
+    events = []
+    for start in range(0, len(t), batch):
+        s = slice(start, start + batch)
+        events.extend(engine.process(t[s], heading[s], ir[s]))
+    return events
+
+
+def test_rate_rule_duration_and_hysteresis():
+    """测试转向速率持续超过阈值 2 秒才触发，降到解除值以下才解除，跨批次保持状态"""
+    engine = AlarmEngine([AlarmRule("转向过快", "rate_above", "heading",
+                                    threshold=10, duration=2, clear=8)])
+    t = np.arange(0, 20, 0.1)
+    # 0~5 s 转速 12°/s，5~10 s 转速 9°/s（介于解除值与阈值之间），之后 5°/s
+    rate = np.where(t < 5, 12.0, np.where(t < 10, 9.0, 5.0))
+    heading = (350.0 + np.concatenate(([0.0], np.cumsum(rate[1:] * 0.1)))) % 360.0
+    events = _run(engine, t, heading, np.zeros(len(t)))
+
+    assert [e['state'] for e in events] == ['raised', 'cleared']
+    assert events[0]['time'] == pytest.approx(2.1, abs=0.11)
+    assert events[1]['time'] == pytest.approx(10.0, abs=0.11)
+    assert not engine.active_rules()
+
+
+def test_jump_rule_across_wrap():
+    """测试航向跳变按最短弧计算：359 -> 1 不是跳变，1 -> 60 是"""
+    engine = AlarmEngine([AlarmRule("航向跳变", "jump", "heading", threshold=30)])
+    t = np.arange(10) * 0.1
+    heading = np.array([358.0, 359.0, 1.0, 2.0, 60.0, 61.0, 62.0, 63.0, 64.0, 65.0])
+    events = engine.process(t, heading, np.zeros(10))
+    assert len(events) == 1 and events[0]['state'] == 'raised'
+    assert events[0]['time'] == pytest.approx(0.4)
+    assert events[0]['value'] == pytest.approx(58.0)
+    # 1 秒内没有再次跳变后解除
+    events = engine.process(t + 1.0, np.full(10, 65.0), np.zeros(10))
+    assert [e['state'] for e in events] == ['cleared']
+
+
+def test_missing_rule_from_nan_and_silence():
+    """测试红外连续无有效值或完全没有数据时触发，收到有效值后解除"""
+    engine = AlarmEngine([AlarmRule("红外丢失", "missing", "ir", duration=5)])
+    t = np.arange(0, 10, 0.5)
+    ir = np.where(t < 2, 90.0, np.nan)
+    events = engine.process(t, np.zeros(len(t)), ir)
+    assert [e['state'] for e in events] == ['raised']
+    assert events[0]['time'] == pytest.approx(7.0)
+
+    events = engine.process([10.0], [0.0], [91.0])
+    assert [e['state'] for e in events] == ['cleared']
+
+    # 之后完全没有数据，由 poll 检查
+    assert engine.poll(14.0) == []
+    events = engine.poll(15.5)
+    assert [e['state'] for e in events] == ['raised']
+
+
+def test_missing_rule_without_any_valid_sample():
+    """测试从未收到有效值时从第一次检查开始计时"""
+    engine = AlarmEngine([AlarmRule("红外丢失", "missing", "ir", duration=5)])
+    assert engine.poll(100.0) == []
+    assert engine.poll(104.0) == []
+    events = engine.poll(105.5)
+    assert [e['state'] for e in events] == ['raised']
+    assert events[0]['value'] == pytest.approx(5.5)
+
+    # 只收到缺少红外字段的样本
+    engine = AlarmEngine([AlarmRule("红外丢失", "missing", "ir", duration=5)])
+    t = np.arange(0, 10, 0.5)
+    events = engine.process(t, np.zeros(len(t)), np.full(len(t), np.nan))
+    assert [e['time'] for e in events] == [pytest.approx(5.5)]
+
+
+def test_rules_on_extended_channels():
+    """测试扩展数据格式中的通道可以用于规则"""
+    engine = AlarmEngine([AlarmRule("横滚过大", "above", "roll", threshold=20),
+                          AlarmRule("信号丢失", "missing", "ir_strength", duration=1)],
+                         schema=EXTENDED)
+    t = np.arange(5.0)
+    zeros = np.zeros(5)
+    events = engine.process(t, zeros, zeros, zeros, [0.0, 10.0, 25.0, 5.0, 5.0],
+                            [80.0, np.nan, np.nan, np.nan, 80.0], zeros)
+    assert [(e['rule'], e['state'], e['time']) for e in events] == [
+        ("横滚过大", 'raised', 2.0), ("信号丢失", 'raised', 2.0),
+        ("横滚过大", 'cleared', 3.0), ("信号丢失", 'cleared', 4.0)]
+
+
+def test_below_rule_and_config(tmp_path):
+    """测试从配置文件加载规则，below 规则与无效配置"""
+    path = tmp_path / "alarms.json"
+    path.write_text(json.dumps({"rules": [
+        {"name": "航向过小", "type": "below", "channel": "heading", "threshold": 10, "clear": 15},
+    ]}), encoding='utf-8')
+    engine = AlarmEngine.from_config(str(path))
+    events = engine.process([0.0, 1.0, 2.0, 3.0], [20.0, 5.0, 12.0, 16.0], [0.0] * 4)
+    assert [(e['state'], e['time']) for e in events] == [('raised', 1.0), ('cleared', 3.0)]
+
+    with pytest.raises(ValueError):
+        AlarmRule("x", "unknown")
+    with pytest.raises(ValueError):
+        AlarmEngine([AlarmRule("x", "above", "roll", threshold=1)])
+    with pytest.raises(ValueError):
+        AlarmRule("x", "above")
+
+
+def test_default_config_loads():
+    """测试仓库中的默认配置可以加载"""
+    rules = load_rules(os.path.join(os.path.dirname(__file__), "alarms.json"))
+    assert {rule.type for rule in rules} == {"rate_above", "missing", "jump"}
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+
+import pytest
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QApplication
+
+from capture import CaptureWriterThread, PanelRecorder, find_ffmpeg, render_panels, save_screenshot
+from visualization import ShipAttitudeWidget
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication(sys.argv)
+    yield app
+
+
+def _panels():
+    ship = ShipAttitudeWidget()
+    ship.resize(121, 100)
+    plot = pg.PlotWidget()
+    plot.resize(160, 90)
+    return [ship, plot]
+
+
+def _run(qapp, seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        qapp.processEvents()
+        time.sleep(0.005)
+
+
+def test_render_panels_side_by_side(qapp):
+    """测试两个组件并排渲染，尺寸取偶数"""
+    ship, plot = _panels()
+    plot.resize(161, 90)
+    image = render_panels([ship, plot])
+    width = ship.width() + plot.width()
+    assert image.width() == width + width % 2
+    assert image.width() % 2 == 0 and image.height() % 2 == 0
+    assert image.height() >= max(ship.height(), plot.height())
+
+
+def test_screenshot_saved_in_background(qapp, tmp_path):
+    """测试截图在后台线程中写入"""
+    path = str(tmp_path / "shots" / "a.png")
+    thread = save_screenshot(_panels(), path)
+    assert thread.wait(5000)
+    assert (tmp_path / "shots" / "a.png").stat().st_size > 0
+
+
+def test_png_sequence_matches_wall_clock(qapp, tmp_path):
+    """测试没有 ffmpeg 时录制为 PNG 序列，帧数与录制时长一致"""
+    recorder = PanelRecorder(_panels(), fps=20)
+    path = recorder.start(str(tmp_path / "video"), ffmpeg='')
+    _run(qapp, 0.5)
+    thread = recorder.stop()
+    assert thread.wait(5000)
+    frames = sorted(p.name for p in (tmp_path / "video").iterdir())
+    assert path == str(tmp_path / "video")
+    assert len(frames) == recorder.frames
+    assert 8 <= recorder.frames <= 13
+    assert frames[0] == "frame_000001.png"
+
+
+class ListWriter:
+    path = "list"
+
+    def __init__(self):
+        self.images = []
+
+    @property
+    def count(self):
+        return len(self.images)
+
+    def write(self, image):
+        self.images.append(image)
+
+    def close(self):
+        pass
+
+
+def test_dropped_frames_repeat_last_accepted(qapp):
+    """测试队列已满时丢弃的帧在写入时用上一帧补齐，帧数与提交次数一致"""
+    writer = ListWriter()
+    thread = CaptureWriterThread(writer, max_pending=2)
+    assert thread.submit("a") and thread.submit("b")
+    assert not thread.submit("c")
+    thread.start()
+    while not thread.frames.empty():
+        time.sleep(0.005)
+    assert thread.submit("d")
+    thread.finish()
+    assert thread.wait(5000)
+    assert writer.images == ["a", "b", "b", "d"]
+
+    # 最后几帧被丢弃时用最后一帧补齐
+    writer = ListWriter()
+    thread = CaptureWriterThread(writer, max_pending=1)
+    assert thread.submit("a")
+    assert not thread.submit("b") and not thread.submit("c")
+    thread.finish()
+    thread.start()
+    assert thread.wait(5000)
+    assert writer.images == ["a", "a", "a"]
+    assert thread.dropped == 2
+
+
+@pytest.mark.skipif(find_ffmpeg() is None, reason="没有安装 ffmpeg")
+def test_ffmpeg_video(qapp, tmp_path):
+    """测试通过 ffmpeg 编码为 MP4"""
+    recorder = PanelRecorder(_panels(), fps=10)
+    path = recorder.start(str(tmp_path / "video"))
+    _run(qapp, 0.3)
+    thread = recorder.stop()
+    assert thread.wait(10000)
+    assert path.endswith(".mp4")
+    assert (tmp_path / "video.mp4").stat().st_size > 0
+
+
+def test_default_capture_path_next_to_program(monkeypatch, tmp_path):
+    """测试默认保存在程序目录下，与当前目录无关"""
+    import capture
+
+    monkeypatch.delenv('NAVE_CAPTURE_DIR', raising=False)
+    monkeypatch.chdir(tmp_path)
+    path = capture.default_capture_path("video")
+    assert os.path.dirname(path) == os.path.join(os.path.dirname(os.path.abspath(capture.__file__)), 'captures')
+    monkeypatch.setenv('NAVE_CAPTURE_DIR', str(tmp_path))
+    assert os.path.dirname(capture.default_capture_path("video")) == str(tmp_path)
@@ -0,0 +1,81 @@
+import numpy as np
+
+from decimation import MinMaxPyramid, minmax_decimate
+
+
+def make_pyramid(n, batch=1000):
+    pyramid = MinMaxPyramid(('heading', 'ir'), base=4, factor=4)
+    x = np.arange(n, dtype=float)
+    heading = np.sin(x / 50.0) * 100 + 180
+    heading[n // 3] = 999.0
+    ir = -heading
+    for start in range(0, n, batch):
+        pyramid.extend(x[start:start + batch], heading[start:start + batch],
+                       ir[start:start + batch])
+    return pyramid, x, heading, ir
+
+
+def test_extend_matches_append():
+    """测试批量构建与逐个追加得到相同的金字塔"""
+    batched, x, heading, ir = make_pyramid(5000, batch=333)
+    single = MinMaxPyramid(('heading', 'ir'), base=4, factor=4)
+    for i in range(len(x)):
+        single.append(x[i], heading[i], ir[i])
+    assert len(batched.levels) == len(single.levels)
+    for a, b in zip(batched.levels, single.levels):
+        assert np.array_equal(a.x.view(), b.x.view())
+        assert np.array_equal(a.y['heading'].view(), b.y['heading'].view())
+
+
+def test_query_keeps_spikes_and_limits_points():
+    """测试降采样结果点数受限且不丢失尖峰"""
+    pyramid, x, heading, ir = make_pyramid(100000)
+    qx, ys = pyramid.query(0, x[-1], 1000)
+    assert len(qx) <= 1000
+    assert ys['heading'].max() == 999.0
+    assert ys['ir'].min() == -999.0
+    assert ys['heading'].min() == heading.min()
+    # 结果覆盖到最新的样本
+    assert qx[-1] == x[-1]
+    assert np.all(np.diff(qx) >= 0)
+
+
+def test_query_returns_none_when_raw_is_sparse_enough():
+    """测试可见样本较少时交给调用者直接使用原始数据"""
+    pyramid, x, _, _ = make_pyramid(100000)
+    assert pyramid.query(500, 700, 1000) is None
+    qx, ys = pyramid.query(500, 700, 1000, raw_available=False)
+    assert qx[0] <= 500 and qx[-1] >= 700
+    assert pyramid.x_range() == (0.0, x[-1])
+
+
+def test_minmax_decimate_raw_segment():
+    """测试对原始数据临时降采样保留极值和末尾样本"""
+    x = np.arange(10001, dtype=float)
+    y = np.zeros_like(x)
+    y[4321] = 50.0
+    y[-1] = -1.0
+    dx, dy = minmax_decimate(x, {'y': y}, 500)
+    assert len(dx) <= 502
+    assert dy['y'].max() == 50.0 and dy['y'].min() == -1.0
+    assert dx[-1] == x[-1]
+    same_x, same = minmax_decimate(x[:100], {'y': y[:100]}, 500)
+    assert same_x is not None and len(same_x) == 100
+
+
+def test_sparse_nan_does_not_blank_buckets():
+    """测试可选通道中零星的缺失样本（NaN）不会让整个桶、整层变成 NaN"""
+    x = np.arange(100000, dtype=float)
+    pitch = np.sin(x / 500.0) * 30
+    pitch[::100] = np.nan
+    gap = np.full(4000, np.nan)
+    pitch[50000:54000] = gap
+    pyramid = MinMaxPyramid(('pitch',), base=4, factor=4)
+    pyramid.extend(x, pitch)
+    qx, ys = pyramid.query(0, 100000, 1000, raw_available=False)
+    finite = np.isfinite(ys['pitch'])
+    # 只有整段缺失的范围是 NaN（曲线在此断开）
+    assert finite.mean() > 0.9
+    assert not finite[(qx > 50500) & (qx < 53500)].any()
+    dx, dy = minmax_decimate(x, {'pitch': pitch}, 500)
+    assert np.isfinite(dy['pitch']).mean() > 0.9
@@ -0,0 +1,96 @@
+import sys
+
+import numpy as np
+import pytest
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QApplication
+
+from export import ExportCancelled, ExportSource, ExportThread, available_formats, export
+from recording import RecordingWriter, RecordingHistory
+from visualization import AttitudePlot
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication(sys.argv)
+    yield app
+
+
+def _source(n=1000, start=1000.0):
+    t = start + np.arange(n) * 0.01
+    return ExportSource([{'t': t, 'heading': (t * 7) % 360, 'ir': np.full(n, 45.0)}]), t
+
+
+def test_export_npz_and_csv_round_trip(tmp_path):
+    """测试分块写入的 NPZ 和 CSV 可以完整读回"""
+    source, t = _source(1000)
+    progress = []
+    count = export(source, str(tmp_path / "a.npz"), chunk_size=300,
+                   progress=lambda done, total: progress.append(done / total))
+    assert count == 1000
+    assert progress[-1] == 1.0
+    data = np.load(str(tmp_path / "a.npz"))
+    assert np.array_equal(data['t'], t)
+    assert np.array_equal(data['heading'], (t * 7) % 360)
+
+    export(source, str(tmp_path / "a.csv"), chunk_size=300)
+    rows = np.loadtxt(str(tmp_path / "a.csv"), delimiter=',', skiprows=1)
+    assert rows.shape == (1000, 3)
+    assert rows[:, 0] == pytest.approx(t)
+    assert rows[:, 2] == pytest.approx(45.0)
+
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    """测试取消导出时不留下不完整的文件"""
+    source, _ = _source(1000)
+    with pytest.raises(ExportCancelled):
+        export(source, str(tmp_path / "a.csv"), chunk_size=100,
+               progress=lambda done, total: None, cancelled=lambda: True)
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(ValueError):
+        export(source, str(tmp_path / "a.txt"))
+
+
+class BrokenSource:
+    channels = ('t', 'heading')
+
+    def __len__(self):
+        return 10
+
+    def chunks(self, channels=None, size=None):
+        yield {'t': np.zeros(5), 'heading': np.zeros(5)}
+        raise TypeError("broken")
+
+
+def test_thread_reports_unexpected_errors(qapp, tmp_path):
+    """测试导出线程遇到任何异常都发出失败信号，并删除未完成的文件"""
+    path = str(tmp_path / "a.npz")
+    thread = ExportThread(BrokenSource(), path)
+    messages = []
+    thread.failed.connect(messages.append)
+    thread.start()
+    assert thread.wait(5000)
+    qapp.processEvents()
+    assert messages == ["导出失败: TypeError: broken"]
+    assert list(tmp_path.iterdir()) == []
+    assert available_formats()[:2] == ['csv', 'npz']
+
+
+def test_source_joins_disk_history_and_ring(qapp, tmp_path):
+    """测试导出范围由磁盘记录和环形缓冲中尚未落盘的样本拼接而成，不重复"""
+    path = str(tmp_path / "rec")
+    recorder = RecordingWriter(path, flush_every=10 ** 9)
+    plot = AttitudePlot(pg.PlotWidget(), data_length=50)
+    plot.set_history(RecordingHistory(path))
+    t = 1000.0 + np.arange(200) * 0.1
+    headings = np.arange(200, dtype=float)
+    recorder.extend(t[:150], headings[:150], headings[:150])
+    recorder.flush()
+    # 后 50 个样本只在环形缓冲中
+    recorder.extend(t[150:], headings[150:], headings[150:])
+    plot.extend(t, headings, headings)
+
+    source = ExportSource.from_store(plot.store, 1005.0, 1020.0)
+    out = np.concatenate([chunk['heading'] for chunk in source.chunks(size=64)])
+    assert np.array_equal(out, headings[50:200])
+    recorder.close()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from filters import HeadingKalman, CircularMedian, FilterStage
+from interpolation import shortest_arc
+
+
+def test_kalman_tracks_turn_across_wrap():
+    """测试卡尔曼滤波跟踪匀速转向，跨越 0/360 度不跳变，并估计出角速度"""
+    rng = np.random.default_rng(1)
+    t = np.arange(0, 20, 0.01)
+    truth = (340.0 + 5.0 * t) % 360.0
+    measured = (truth + rng.normal(0, 2.0, len(t))) % 360.0
+    kalman = HeadingKalman()
+    angles = []
+    rates = []
+    for start in range(0, len(t), 50):
+        a, r = kalman.filter(t[start:start + 50], measured[start:start + 50])
+        angles.append(a)
+        rates.append(r)
+    angles = np.concatenate(angles)
+    rates = np.concatenate(rates)
+
+    settled = slice(500, None)
+    error = shortest_arc(truth[settled], angles[settled])
+    raw_error = shortest_arc(truth[settled], measured[settled])
+    assert np.abs(error).max() < 180
+    assert error.std() < raw_error.std() / 2
+    assert np.median(rates[settled]) == pytest.approx(5.0, abs=0.5)
+    assert ((angles >= 0) & (angles < 360)).all()
+
+
+def test_median_removes_outliers_across_wrap():
+    """测试中值滤波去掉单点野值，且在 0/360 附近不会被拉向 180"""
+    angles = np.array([359.0, 1.0, 0.5, 120.0, 359.5, 0.0, 1.5, 358.5])
+    median = CircularMedian(size=3)
+    out = np.concatenate((median.filter(angles[:4]), median.filter(angles[4:])))
+    assert np.abs(shortest_arc(out, 0.0)).max() < 2.0
+
+
+def test_missing_measurements_do_not_stick():
+    """测试缺失的测量（NaN）不会让卡尔曼状态和中值滤波一直输出 NaN"""
+    t = np.arange(0, 10, 0.1)
+    headings = (350.0 + 2.0 * t) % 360.0
+    headings[[0, 30, 31, 60]] = np.nan
+    kalman = HeadingKalman()
+    angles, rates = kalman.filter(t, headings)
+    assert np.isnan(angles[0])
+    assert np.isfinite(angles[1:]).all() and np.isfinite(rates[1:]).all()
+    # 缺失处沿用预测值，之后继续跟踪
+    assert abs(shortest_arc(angles[31], (350.0 + 3.1 * 2.0) % 360.0)) < 2.0
+    assert abs(shortest_arc(angles[-1], headings[-1])) < 1.0
+
+    irs = np.array([np.nan, 359.0, 1.0, np.nan, 0.5, 120.0, np.nan, np.nan, np.nan, 2.0])
+    out = CircularMedian(size=3).filter(irs)
+    assert np.isnan(out[0]) and np.isnan(out[8])
+    assert np.isfinite(np.delete(out, [0, 8])).all()
+    assert np.abs(shortest_arc(out[[1, 2, 3, 4, 9]], 0.0)).max() < 3.0
+
+
+def test_filter_stage_shapes():
+    """测试滤波级按批返回等长数组"""
+    stage = FilterStage()
+    t = np.arange(10) * 0.1
+    headings, rates, irs = stage.process(t, np.full(10, 45.0), np.full(10, 90.0))
+    assert len(headings) == len(rates) == len(irs) == 10
+    assert np.allclose(headings, 45.0)
+    assert np.allclose(irs, 90.0)
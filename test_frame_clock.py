@@ -0,0 +1,46 @@
+import sys
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from frame_clock import FrameClock
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    yield app
+
+
+def test_frame_clock_adapts_interval(qapp):
+    """测试有数据时切换到高帧率，空闲和隐藏时降频"""
+    clock = FrameClock(active_interval=16, idle_interval=250, hidden_interval=1000,
+                       idle_after=0.0)
+    clock.start()
+    assert clock.interval() == 250
+
+    clock.notify_activity()
+    assert clock.interval() == 16
+
+    # idle_after 为 0，下一次触发后即回到空闲间隔
+    clock._on_timeout()
+    assert clock.interval() == 250
+
+    clock.set_visible(False)
+    assert clock.interval() == 1000
+    clock.notify_activity()
+    assert clock.interval() == 1000
+
+    clock.set_visible(True)
+    clock.stop()
+    assert not clock.isActive()
+
+
+def test_frame_clock_emits_tick(qapp):
+    """测试每次触发发出 tick 信号"""
+    clock = FrameClock()
+    ticks = []
+    clock.tick.connect(lambda: ticks.append(1))
+    clock._on_timeout()
+    assert ticks == [1]
@@ -0,0 +1,39 @@
+import pytest
+
+from interpolation import shortest_arc, interpolate_angle, AngleInterpolator
+
+
+def test_shortest_arc_wraps():
+    """测试跨越 0/360 度时取最短弧"""
+    assert shortest_arc(350, 10) == 20
+    assert shortest_arc(10, 350) == -20
+    assert shortest_arc(0, 180) == -180
+    assert interpolate_angle(350, 10, 0.25) == pytest.approx(355)
+    assert interpolate_angle(350, 10, 0.75) == pytest.approx(5)
+
+
+def test_interpolator_lags_one_interval():
+    """测试显示时刻滞后一个样本间隔，且不会外推越过最新样本"""
+    interp = AngleInterpolator(max_lag=0.5)
+    assert interp.value_at(0.0) is None
+    interp.push(10.0, 90.0)
+    assert interp.value_at(10.0) == 90.0
+    interp.push(10.1, 100.0)
+    assert interp.lag() == pytest.approx(0.1)
+    assert interp.value_at(10.15) == pytest.approx(95.0)
+    assert not interp.settled(10.15)
+    assert interp.value_at(20.0) == 100.0
+    assert interp.settled(20.0)
+
+
+def test_interpolator_extend_and_reset():
+    """测试批量加入只使用最后两个样本，reset 直接跳到目标值"""
+    interp = AngleInterpolator()
+    interp.extend([1.0, 1.2, 1.4], [10.0, 20.0, 30.0])
+    assert interp.value_at(1.5) == pytest.approx(25.0)
+    # 间隔超过 max_lag 时滞后被限制
+    interp.push(13.0, 40.0)
+    assert interp.lag() == 0.5
+    interp.reset(0.0)
+    assert interp.value_at(100.0) == 0.0
+    assert interp.settled(100.0)
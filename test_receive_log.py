@@ -0,0 +1,137 @@
+import sys
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from receive_log import LogStore, ReceiveLogView
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    yield app
+
+
+@pytest.fixture
+def log_view(qapp):
+    view = ReceiveLogView(capacity=100)
+    yield view
+
+
+def test_lines_are_batched_until_flush(log_view):
+    """测试新行在下一帧才批量显示"""
+    log_view.append_line("第一行")
+    log_view.append_line("第二行")
+    assert log_view.toPlainText() == ""
+    log_view.flush()
+    assert log_view.toPlainText() == "第一行\n第二行"
+
+
+def test_flush_driven_by_frame_clock(log_view):
+    """测试接收区由共用的帧时钟刷新，文本行到达时帧时钟切换到高帧率"""
+    from frame_clock import FrameClock
+
+    clock = FrameClock()
+    clock.start()
+    log_view.set_frame_clock(clock)
+    assert clock.interval() == clock.idle_interval
+    log_view.append_line("第一行")
+    assert clock.interval() == clock.active_interval
+    assert log_view.toPlainText() == ""
+    clock.tick.emit()
+    assert log_view.toPlainText() == "第一行"
+    clock.stop()
+
+
+def test_capacity_is_bounded(log_view):
+    """测试超过容量后只保留最新的行"""
+    for i in range(250):
+        log_view.append_line(f"line {i}")
+        if i % 30 == 0:
+            log_view.flush()
+    log_view.flush()
+    assert len(log_view.store) == 250
+    assert log_view.document().blockCount() == 100
+    assert log_view.toPlainText().splitlines()[-1] == "line 249"
+    assert log_view.toPlainText().splitlines()[0] == "line 150"
+
+
+def test_clear_lines(log_view):
+    """测试清空接收区"""
+    log_view.append_line("data")
+    log_view.clear_lines()
+    log_view.flush()
+    assert log_view.toPlainText() == ""
+    assert len(log_view.store) == 0
+
+
+def test_store_search_across_chunks():
+    """测试跨分块的子串、忽略大小写和正则检索"""
+    store = LogStore(capacity=1000, chunk_size=16)
+    for i in range(100):
+        store.append(f"{i},{i * 2}")
+    store.append("ERROR checksum")
+    store.append("error timeout")
+
+    assert store.search("checksum") == [(100, "ERROR checksum")]
+    assert [i for i, _ in store.search("error", ignore_case=True)] == [100, 101]
+    assert [line for _, line in store.search(r"^9\d,", regex=True)] == \
+        [f"{i},{i * 2}" for i in range(90, 100)]
+    assert [i for i, _ in store.search("1", limit=3)] == [97, 98, 99]
+    assert store.search("missing") == []
+
+
+def test_regex_does_not_match_across_lines():
+    """测试封存分块中的正则不会跨行匹配，结果与逐行匹配一致"""
+    lines = ["alpha 1", "beta 2", "gamma 1 beta", "  ", "delta"]
+    patterns = (r"1[^x]*beta", r"\s+", r"a\s+b", r"^\s*$", r"beta$")
+    sealed = LogStore(chunk_size=len(lines))
+    active = LogStore(chunk_size=1000)
+    for store in (sealed, active):
+        store.extend(lines)
+    for pattern in patterns:
+        matcher = LogStore.compile_matcher(pattern, regex=True)
+        expected = [(i, line) for i, line in enumerate(lines) if matcher(line)]
+        assert sealed.search(pattern, regex=True) == expected, pattern
+        assert active.search(pattern, regex=True) == expected, pattern
+    assert sealed.search(r"1[^x]*beta", regex=True) == [(2, "gamma 1 beta")]
+
+
+def test_regex_with_bracket_in_class_uses_sealed_chunks():
+    """测试字符集开头的 ']' 按普通字符处理，分块过滤不会漏掉实际匹配的行"""
+    lines = ["x abc", "]abc", "plain", "abc"]
+    store = LogStore(chunk_size=len(lines))
+    store.extend(lines)
+    store.append("tail")
+    assert store.search(r"[^]]abc", regex=True) == [(0, "x abc")]
+    assert store.search(r"[]x]abc", regex=True) == [(1, "]abc")]
+    assert store.search(r"[\]x] abc", regex=True) == [(0, "x abc")]
+
+
+def test_store_evicts_oldest_chunks():
+    """测试超过容量后丢弃最旧的分块"""
+    store = LogStore(capacity=64, chunk_size=16)
+    for i in range(200):
+        store.append(f"line {i}")
+    assert len(store) <= 64 + 16
+    assert store.search("line 0,") == []
+    assert store.tail(2) == ["line 198", "line 199"]
+
+
+def test_filter_shows_only_matching_lines(log_view):
+    """测试过滤模式只显示匹配的行，新到的行同样过滤"""
+    for i in range(10):
+        log_view.append_line(f"{i},0")
+    log_view.append_line("ERROR 1")
+    log_view.flush()
+    assert log_view.set_filter("ERROR") == 1
+    assert log_view.toPlainText() == "ERROR 1"
+
+    log_view.append_line("5,5")
+    log_view.append_line("ERROR 2")
+    log_view.flush()
+    assert log_view.toPlainText() == "ERROR 1\nERROR 2"
+
+    log_view.set_filter(None)
+    assert log_view.toPlainText().splitlines()[-2:] == ["5,5", "ERROR 2"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from recording import RecordingWriter
+from render_video import _recording_schema, frame_times, plot_range, render, split_frames
+
+
+def test_frame_times_and_split():
+    """测试帧时间按倍速均匀分布，区间连续覆盖全部帧"""
+    times = frame_times(100.0, 110.0, fps=5, speed=2.0)
+    assert len(times) == 26
+    assert times[1] - times[0] == pytest.approx(0.4)
+    assert times[-1] == pytest.approx(110.0)
+    ranges = split_frames(26, 4)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 26
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert split_frames(2, 8) == [(0, 1), (1, 2)]
+
+
+def test_render_png_sequence_in_worker_processes(tmp_path):
+    """测试多个进程渲染的 PNG 序列编号连续、帧数与时长一致"""
+    path = str(tmp_path / "rec")
+    recorder = RecordingWriter(path)
+    t = 1000.0 + np.arange(300) * 0.02
+    recorder.extend(t, (t * 10) % 360, np.full(300, 90.0))
+    recorder.close()
+
+    progress = []
+    frames, output = render(path, str(tmp_path / "out"), fps=4, window=2.0, height=120,
+                            workers=2, ffmpeg='', progress=lambda done, total: progress.append(done))
+    names = sorted(p.name for p in (tmp_path / "out").iterdir())
+    assert frames == 24
+    assert names == [f"frame_{i:06d}.png" for i in range(1, 25)]
+    assert progress[-1] == 24
+
+
+def test_plot_range_for_value_channels(tmp_path):
+    """测试角度通道沿用 -10~370 度，数值通道取整个记录的范围"""
+    from schema import EXTENDED
+
+    path = str(tmp_path / "rec")
+    recorder = RecordingWriter(path, channels=('t',) + EXTENDED.names)
+    t = 1000.0 + np.arange(100) * 0.1
+    strength = np.linspace(2.0, 12.0, 100)
+    strength[5] = np.nan
+    nan = np.full(100, np.nan)
+    recorder.extend(t, np.zeros(100), np.zeros(100), nan, nan, strength, nan)
+    recorder.close()
+
+    from recording import open_recording
+    meta, columns = open_recording(path)
+    schema = _recording_schema(meta['channels'])
+    assert schema is EXTENDED
+    assert plot_range(columns, ('heading', 'pitch'), schema) == ((-10.0, 370.0), None)
+    (low, high), label = plot_range(columns, ('ir_strength',), schema)
+    assert low < 2.0 < 12.0 < high < 13.0
+    assert label == ('数值', '')
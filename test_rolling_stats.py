@@ -0,0 +1,92 @@
+import math
+import sys
+
+import numpy as np
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from interpolation import unwrap_degrees
+from rolling_stats import RollingCircularStats, StreamStats
+from visualization import StatsPanel
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    yield app
+
+
+def test_unwrap_across_batches():
+    """测试跨越 0/360 度以及跨批次的展开"""
+    first = unwrap_degrees([350.0, 355.0, 5.0])
+    assert np.allclose(first, [350.0, 355.0, 365.0])
+    second = unwrap_degrees([15.0, 340.0], previous=5.0, offset=365.0)
+    assert np.allclose(second, [375.0, 340.0])
+
+
+def _stats_over(t, angles, seconds):
+    stats = RollingCircularStats(seconds)
+    radians = np.radians(angles)
+    unwrapped = unwrap_degrees(angles)
+    for start in range(0, len(t), 37):
+        batch = slice(start, start + 37)
+        stats.extend(t[batch], np.sin(radians[batch]), np.cos(radians[batch]), unwrapped[batch])
+    return stats
+
+
+def test_circular_mean_and_std_match_direct_computation():
+    """测试增量结果与对窗口内样本直接计算一致（窗口边界按时间槽对齐）"""
+    rng = np.random.default_rng(0)
+    t = np.arange(0, 30, 0.01)
+    angles = (358.0 + rng.normal(0, 3.0, len(t))) % 360.0
+    stats = _stats_over(t, angles, 10.0)
+
+    # 窗口覆盖最近 100 个 0.1 s 时间槽，即 20.0 s 之后的样本
+    window = angles[t >= 20.0 - 1e-9]
+    assert stats.count == len(window)
+    radians = np.radians(window)
+    s, c = np.sin(radians).sum(), np.cos(radians).sum()
+    assert stats.mean() == pytest.approx(math.degrees(math.atan2(s, c)) % 360.0)
+    r = math.hypot(s, c) / len(window)
+    assert stats.std() == pytest.approx(math.degrees(math.sqrt(-2 * math.log(r))))
+    assert 2.0 < stats.std() < 4.0
+
+
+def test_rate_of_turn_across_wrap():
+    """测试转向速率按展开角计算，跨越 360 度不会跳变"""
+    t = np.arange(0, 20, 0.05)
+    angles = (300.0 + 6.0 * t) % 360.0
+    stats = _stats_over(t, angles, 10.0)
+    assert stats.rate() == pytest.approx(6.0)
+
+
+def test_missing_angles_are_skipped():
+    """测试缺失的角度（NaN）不会让统计和转向速率一直是 NaN"""
+    stats = StreamStats(windows=((10.0, "10 秒"),))
+    t = 1000.0 + np.arange(400) * 0.05
+    headings = (300.0 + 6.0 * (t - 1000.0)) % 360.0
+    irs = np.full(400, 45.0)
+    irs[100] = np.nan
+    headings[250] = np.nan
+    for start in range(0, 400, 30):
+        stats.extend(t[start:start + 30], headings[start:start + 30], irs[start:start + 30])
+    heading = stats.heading.windows[10.0]
+    assert heading.rate() == pytest.approx(6.0)
+    assert heading.count == 199
+    assert stats.ir.windows[10.0].mean() == pytest.approx(45.0)
+
+
+def test_stats_panel_shows_windows(qapp):
+    """测试面板从 StreamStats 刷新"""
+    stats = StreamStats()
+    t = 1000.0 + np.arange(100) * 0.1
+    stats.extend(t, np.full(100, 90.0), np.full(100, 180.0))
+    panel = StatsPanel()
+    panel.set_stats(stats)
+    assert not stats.changed
+    labels = panel._rows[10.0]
+    assert labels[0].text() == "90.0°"
+    assert labels[2].text() == "180.0°"
+    assert labels[4].text() == "+0.00°/s"
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from recording import RecordingWriter, RecordingHistory
+from sample_store import SampleRing, HistoryStore
+
+
+def test_ring_views_are_contiguous_and_ordered():
+    """测试回绕后视图仍按时间顺序且连续"""
+    ring = SampleRing(4, channels=('heading', 'ir'))
+    for i in range(6):
+        ring.append(i, 10 * i)
+    assert len(ring) == 4
+    assert ring.count == 6
+    heading = ring.view('heading', 4)
+    assert list(heading) == [2, 3, 4, 5]
+    assert list(ring.view('ir', 2)) == [40, 50]
+    assert heading.flags['C_CONTIGUOUS']
+    assert np.shares_memory(heading, ring._data)
+    assert ring.latest('heading') == 5
+
+
+def test_ring_full_window_before_filled():
+    """测试未写满时完整窗口以 0 填充、最新值在末尾"""
+    ring = SampleRing(5, channels=('heading',))
+    assert ring.latest('heading') is None
+    ring.append(7)
+    window = ring.view('heading')
+    assert list(window) == [0, 0, 0, 0, 7]
+    assert not window.flags.writeable
+
+
+def test_ring_extend_wraps_like_append():
+    """测试批量追加（含回绕与超过容量）与逐个追加结果一致"""
+    appended = SampleRing(7, channels=('a', 'b'))
+    extended = SampleRing(7, channels=('a', 'b'))
+    data = np.arange(30, dtype=float)
+    for batch in (data[:3], data[3:8], data[8:9], data[9:20], data[20:30]):
+        extended.extend(batch, -batch)
+        for v in batch:
+            appended.append(v, -v)
+        assert list(extended.view('a')) == list(appended.view('a'))
+        assert list(extended.view('b')) == list(appended.view('b'))
+    assert extended.count == 30
+
+
+def test_history_query_returns_ring_views():
+    """测试范围在环形缓冲内时按时间二分查找并返回不复制的视图"""
+    store = HistoryStore(100, channels=('heading', 'ir'))
+    t = 1000.0 + np.arange(300) * 0.5
+    store.extend(t, np.arange(300.0), -np.arange(300.0))
+    x, ys = store.query(110.0, 120.0)
+    assert list(x) == [110.0 + 0.5 * i for i in range(21)]
+    assert list(ys['heading']) == list(np.arange(220.0, 241.0))
+    assert np.shares_memory(ys['ir'], store.ring._data)
+    assert store.time_range() == (100.0, 149.5)
+
+    # 限制点数时返回降采样结果，范围早于环形缓冲也能从金字塔得到
+    x, ys = store.query(0.0, 149.5, max_points=20)
+    assert len(x) < 100
+    assert ys['heading'].min() == 0.0 and ys['heading'].max() == 299.0
+
+
+def test_history_query_joins_disk_and_ring(tmp_path):
+    """测试跨越磁盘与环形缓冲的范围拼接且不重复，尚未落盘的样本取自环形缓冲"""
+    recorder = RecordingWriter(str(tmp_path / "rec"), flush_every=10 ** 9)
+    store = HistoryStore(100, channels=('heading', 'ir'))
+    store.set_disk(RecordingHistory(str(tmp_path / "rec")))
+    t = 1000.0 + np.arange(500) * 0.1
+    values = np.arange(500.0)
+    recorder.extend(t[:450], values[:450], values[:450])
+    recorder.flush()
+    recorder.extend(t[450:], values[450:], values[450:])
+    store.extend(t, values, values)
+
+    x, ys = store.query(10.0, 50.0)
+    assert list(ys['heading']) == list(values[100:500])
+    assert np.all(np.diff(x) > 0)
+    assert store.time_range() == pytest.approx((0.0, 49.9))
+    # 只在磁盘上的范围：数值列是内存映射切片
+    segments = store.segments(1.0, 2.0, unix=True)
+    assert len(segments) == 1
+    assert isinstance(segments[0]['heading'], np.memmap)
+    assert segments[0]['t'][0] == 1001.0
+    recorder.close()
+
+
+def test_history_query_across_unflushed_samples(tmp_path):
+    """测试逐批写入时跨越尚未落盘部分的查询不漏样本；落盘间隔超过环形缓冲容量时拒绝"""
+    path = str(tmp_path / "rec")
+    recorder = RecordingWriter(path, flush_every=80)
+    store = HistoryStore(100, channels=('heading', 'ir'))
+    with pytest.raises(ValueError):
+        store.set_disk(RecordingHistory(path, flush_every=101))
+    store.set_disk(RecordingHistory(path, flush_every=recorder.flush_every))
+    t = 1000.0 + np.arange(1000) * 0.1
+    values = np.arange(1000.0)
+    for start in range(0, 1000, 30):
+        batch = slice(start, start + 30)
+        recorder.extend(t[batch], values[batch], values[batch])
+        store.extend(t[batch], values[batch], values[batch])
+        end = min(start + 30, 1000)
+        x, ys = store.query(0.0, 100.0)
+        assert list(ys['heading']) == list(values[:end])
+        assert np.array_equal(x, t[:end] - 1000.0)
+    recorder.close()
+
+
+def test_history_nearest_sample(tmp_path):
+    """测试二分查找最近的样本：环形缓冲内、环形缓冲之前的磁盘记录、原始样本已丢弃"""
+    store = HistoryStore(100, channels=('heading', 'ir'))
+    t = 1000.0 + np.arange(300)
+    store.extend(t, np.arange(300.0), np.zeros(300))
+    assert store.nearest(250.4) == (250.0, {'heading': 250.0, 'ir': 0.0})
+    assert store.nearest(250.6, channels=('heading',)) == (251.0, {'heading': 251.0})
+    assert store.nearest(1e6)[0] == 299.0
+    assert store.nearest(10.0) is None
+
+    recorder = RecordingWriter(str(tmp_path / "rec"))
+    recorder.extend(t, np.arange(300.0), np.zeros(300))
+    recorder.close()
+    store.set_disk(RecordingHistory(str(tmp_path / "rec")))
+    assert store.nearest(10.2) == (10.0, {'heading': 10.0, 'ir': 0.0})
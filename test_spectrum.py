@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from spectrum import SlidingSpectrum
+
+
+def _feed(spectrum, t, heading, ir, batch=37):
+    frames = 0
+    for start in range(0, len(t), batch):
+        s = slice(start, start + batch)
+        frames += spectrum.extend(t[s], heading[s], ir[s])
+    return frames
+
+
+def test_peak_frequency_uses_real_timestamps():
+    """测试频率按真实时间戳换算：50 Hz 采样的 2 Hz 振荡出现在 2 Hz"""
+    t = 1000.0 + np.arange(2000) / 50.0
+    # 匀速转向叠加 2 Hz 振荡，跨越 0/360 度
+    heading = (350.0 + 3.0 * (t - 1000.0) + 5.0 * np.sin(2 * np.pi * 2.0 * t)) % 360.0
+    ir = (90.0 + 2.0 * np.sin(2 * np.pi * 7.0 * t)) % 360.0
+    spectrum = SlidingSpectrum(fft_size=256, hop=64, columns=100)
+    frames = _feed(spectrum, t, heading, ir)
+    assert frames == (2000 - 256) // 64 + 1
+    assert spectrum.sample_rate() == pytest.approx(50.0)
+
+    freqs, db = spectrum.latest('heading')
+    assert freqs[np.argmax(db[2:]) + 2] == pytest.approx(2.0, abs=0.2)
+    freqs, db = spectrum.latest('ir')
+    assert freqs[np.argmax(db[1:]) + 1] == pytest.approx(7.0, abs=0.2)
+
+
+def test_incremental_frames_match_single_batch():
+    """测试分批加入与一次性加入得到相同的时频图，且环形缓冲只保留最近的帧"""
+    t = np.arange(3000) / 100.0
+    heading = (t * 10.0) % 360.0
+    ir = np.full(len(t), 45.0)
+    once = SlidingSpectrum(fft_size=128, hop=32, columns=20)
+    once.extend(t, heading, ir)
+    batched = SlidingSpectrum(fft_size=128, hop=32, columns=20)
+    _feed(batched, t, heading, ir, batch=11)
+
+    assert len(once) == len(batched) == 20
+    assert once.count == batched.count
+    assert np.allclose(once.image('heading'), batched.image('heading'))
+    assert np.allclose(once.times(), batched.times())
+    assert np.all(np.diff(batched.times()) > 0)
+
+
+def test_missing_sample_does_not_poison_later_frames():
+    """测试单个缺失样本（NaN）之后的帧仍然是有限值"""
+    t = np.arange(4096) / 100.0
+    heading = (200.0 + 20.0 * np.sin(2 * np.pi * 5.0 * t)) % 360.0
+    ir = heading.copy()
+    ir[300] = np.nan
+    ir[:5] = np.nan
+    spectrum = SlidingSpectrum(fft_size=256, hop=64)
+    _feed(spectrum, t, heading, ir)
+    image = spectrum.image('ir')
+    assert np.isfinite(image).all()
+    freqs = np.fft.rfftfreq(256, 0.01)
+    assert freqs[np.argmax(image[-1])] == pytest.approx(5.0, abs=0.5)
@@ -0,0 +1,45 @@
+import json
+
+from tracing import SampleTracer
+
+
+def test_tracer_disabled_by_default():
+    """测试追踪器默认关闭且不分配编号"""
+    tracer = SampleTracer()
+    assert tracer.next_sample() is None
+    assert tracer.next_delivery() is None
+    assert tracer.events() == []
+
+
+def test_tracer_sampling():
+    """测试每 N 个样本抽样 1 个"""
+    tracer = SampleTracer(every=4)
+    tracer.configure(True)
+    produced = [tracer.next_sample() for _ in range(10)]
+    delivered = [tracer.next_delivery() for _ in range(10)]
+    assert [sid for sid in produced if sid is not None] == [0, 4, 8]
+    assert produced == delivered
+    assert list(tracer.sampled_ids(5, 8)) == [8, 12]
+
+
+def test_tracer_export_chrome_trace(tmp_path):
+    """测试导出的 JSON 符合 Chrome Trace Event 格式"""
+    tracer = SampleTracer(every=1)
+    tracer.configure(True)
+    tracer.name_thread("测试线程")
+    sid = tracer.next_sample()
+    tracer.span('read', sid, 1000, 3000)
+    tracer.flow(sid, 's', 1000)
+    tracer.mark_pending('plot', sid)
+    assert tracer.take_pending('plot') == [sid]
+    assert tracer.take_pending('plot') == []
+
+    path = tracer.export(str(tmp_path / "trace.json"))
+    with open(path, encoding='utf-8') as f:
+        trace = json.load(f)
+    events = trace['traceEvents']
+    span = [e for e in events if e['ph'] == 'X'][0]
+    assert span['name'] == 'read'
+    assert span['ts'] == 1.0 and span['dur'] == 2.0
+    assert span['args']['sample'] == sid
+    assert any(e['ph'] == 'M' and e['args']['name'] == "测试线程" for e in events)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from trail import TrailGeometry
+
+
+def test_trail_bins_last_sample_per_bucket():
+    """测试每个时间桶取桶内最后一个样本，点数固定"""
+    trail = TrailGeometry(duration=10.0, bins=10)
+    t = np.arange(0, 20, 0.25)
+    values = t * 10.0
+    trail.update(t, values)
+    sin_a, cos_a = trail.directions()
+    assert len(sin_a) == 10
+    # 最新的桶 [19, 20) 内最后一个样本是 19.75 s，即 197.5 度
+    assert np.degrees(np.arctan2(sin_a[-1], cos_a[-1])) % 360 == pytest.approx(197.5)
+    assert np.degrees(np.arctan2(sin_a[0], cos_a[0])) % 360 == pytest.approx(107.5)
+
+
+def test_trail_incremental_update_matches_full():
+    """测试增量更新与一次性计算结果相同，没有数据的桶为 NaN"""
+    t = np.concatenate((np.arange(0, 5, 0.1), np.arange(8, 12, 0.1)))
+    values = (t * 37.0) % 360.0
+    full = TrailGeometry(duration=6.0, bins=12)
+    full.update(t, values)
+
+    incremental = TrailGeometry(duration=6.0, bins=12)
+    for end in range(1, len(t) + 1, 7):
+        incremental.update(t[:end], values[:end])
+    incremental.update(t, values)
+
+    for a, b in zip(full.directions(), incremental.directions()):
+        assert np.allclose(a, b, equal_nan=True)
+    sin_a, _ = full.directions()
+    # 窗口为 6~12 s，其中 6~8 s 没有样本
+    assert np.isnan(sin_a[:4]).all()
+    assert not np.isnan(sin_a[4:]).any()
@@ -4,6 +4,10 @@ import numpy as np
 from PyQt5.QtWidgets import QApplication
 import pyqtgraph as pg
 
+from interpolation import shortest_arc
+from recording import RecordingWriter, RecordingHistory
+from schema import EXTENDED
+
 # 导入要测试的可视化组件
 from visualization import ShipAttitudeWidget, AttitudePlot
 
@@ -66,4 +70,178 @@ def test_attitude_plot_update(attitude_plot):
     # 再次更新
     attitude_plot.update_data(180, 270)
     assert attitude_plot.heading_data[-1] == 180
-    assert attitude_plot.ir_data[-1] == 270
\ No newline at end of file
+    assert attitude_plot.ir_data[-1] == 270
+
+def test_attitude_plot_extend(attitude_plot):
+    """测试姿态曲线图的批量更新"""
+    timestamps = 1000.0 + np.arange(5) * 0.1
+    attitude_plot.extend(timestamps, np.arange(5) * 10.0, np.arange(5) * 20.0)
+    assert attitude_plot.heading_data[-1] == 40
+    assert attitude_plot.ir_data[-1] == 80
+    assert attitude_plot.time_data[-1] == pytest.approx(0.4)
+    assert attitude_plot.get_data_range() == pytest.approx((0.0, 0.4))
+    attitude_plot.update_plot()
+
+def test_ship_widget_extend(ship_widget):
+    """测试船体姿态组件批量更新只保留最新值"""
+    ship_widget.extend([1.0, 2.0], [10.0, 20.0], [30.0, 40.0])
+    assert ship_widget.heading_angle == 20
+    assert ship_widget.ir_angle == 40
+    # 重绘推迟到帧时钟调用 refresh()，每帧至多一次
+    assert ship_widget.refresh()
+    assert not ship_widget.refresh()
+
+def test_attitude_plot_pages_history_from_disk(qapp, tmp_path):
+    """测试平移到环形缓冲之前的范围时从磁盘历史读取"""
+    plot_widget = pg.PlotWidget()
+    plot = AttitudePlot(plot_widget, data_length=100)
+    recorder = RecordingWriter(str(tmp_path / "rec"), flush_every=50)
+    plot.set_history(RecordingHistory(str(tmp_path / "rec")))
+    timestamps = 1000.0 + np.arange(1000) * 0.1
+    headings = np.arange(1000) % 360.0
+    for start in range(0, 1000, 100):
+        batch = slice(start, start + 100)
+        recorder.extend(timestamps[batch], headings[batch], headings[batch])
+        plot.extend(timestamps[batch], headings[batch], headings[batch])
+    recorder.flush()
+
+    # 环形缓冲只剩最后 100 个样本（90 s 之后），查看 10~20 s
+    plot.set_display_range(10, 20)
+    x, heading, ir = plot.visible_data()
+    assert x[0] <= 10 < 20 <= x[-1]
+    assert np.allclose(heading, np.arange(len(x)) + round(x[0] * 10))
+    recorder.close()
+
+def test_attitude_plot_plots_any_channel_subset(qapp):
+    """测试按数据格式保存多个通道，显示任意子集时直接使用环形缓冲的视图"""
+    plot = AttitudePlot(pg.PlotWidget(), data_length=100, schema=EXTENDED)
+    timestamps = 1000.0 + np.arange(50) * 0.1
+    columns = [np.arange(50.0) + 100 * i for i in range(len(EXTENDED))]
+    plot.extend(timestamps, *columns)
+    plot.set_channels(('pitch', 'ir_strength'))
+    assert plot.shown_channels() == ('pitch', 'ir_strength')
+    assert plot.heading_curve is None
+
+    x, ys = plot.visible_columns()
+    assert set(ys) == {'pitch', 'ir_strength'}
+    assert list(ys['ir_strength']) == list(columns[EXTENDED.index('ir_strength')])
+    assert np.shares_memory(ys['pitch'], plot.ring._data)
+    assert plot.update_plot()
+
+    # 只给出航向角和红外方位角时其余通道为缺失值
+    plot.update_data(1.0, 2.0, timestamp=1010.0)
+    assert np.isnan(plot.ring.latest('roll'))
+
+
+def test_crosshair_updates_once_per_frame(qapp):
+    """测试十字光标：多次鼠标移动只在下一帧查找一次最近样本"""
+    from PyQt5.QtCore import QPointF
+
+    plot_widget = pg.PlotWidget()
+    plot_widget.resize(640, 360)
+    plot_widget.show()
+    plot = AttitudePlot(plot_widget, data_length=1000)
+    plot.set_crosshair(True)
+    plot.extend(1000.0 + np.arange(100) * 0.1, np.arange(100.0), np.full(100, 90.0))
+    plot.set_display_range(0, 9.9)
+    plot.update_plot()
+    qapp.processEvents()
+
+    lookups = []
+    nearest = plot.store.nearest
+    plot.store.nearest = lambda *args: lookups.append(args) or nearest(*args)
+    view_box = plot_widget.getViewBox()
+    for x in (2.0, 3.0, 4.02):
+        plot.crosshair._on_mouse_moved(view_box.mapViewToScene(QPointF(x, 100.0)))
+    assert lookups == []
+    assert plot.update_plot()
+    assert len(lookups) == 1
+    assert "航向角: 40.0°" in plot.crosshair.label.textItem.toPlainText()
+    assert plot.crosshair.v_line.value() == pytest.approx(4.0)
+    assert not plot.update_plot()
+    plot_widget.close()
+
+
+def test_attitude_plot_skips_unchanged_frames(attitude_plot):
+    """测试没有新数据且可见范围不变时跳过重绘"""
+    attitude_plot.extend([1000.0, 1000.1], [10.0, 20.0], [30.0, 40.0])
+    assert attitude_plot.update_plot()
+    assert not attitude_plot.update_plot()
+
+    attitude_plot.extend([1000.2], [30.0], [50.0])
+    assert attitude_plot.update_plot()
+
+    # 平移视图也需要重绘
+    attitude_plot.set_display_range(0, 0.1)
+    assert attitude_plot.update_plot()
+    assert not attitude_plot.update_plot()
+
+def test_ship_widget_caches_dial(ship_widget):
+    """测试静态表盘只在尺寸变化时重新绘制"""
+    ship_widget.resize(320, 320)
+    dial = ship_widget.dial_pixmap()
+    ship_widget.update_angles(90, 180)
+    ship_widget.grab()
+    assert ship_widget.dial_pixmap() is dial
+
+    ship_widget.resize(400, 360)
+    resized = ship_widget.dial_pixmap()
+    assert resized is not dial
+    assert resized.width() == int(400 * ship_widget.devicePixelRatioF())
+
+def test_ship_widget_interpolates_between_samples(ship_widget):
+    """测试指针按时间戳沿最短弧在最近两个样本间插值"""
+    ship_widget.extend([100.0, 100.2], [350.0, 10.0], [0.0, 0.0])
+    assert ship_widget.heading_angle == 10
+    # 显示时刻滞后一个样本间隔：100.3 时显示 100.1 时刻，即 350 与 10 的中点
+    assert ship_widget.refresh(now=100.3)
+    assert shortest_arc(ship_widget._shown[0], 0.0) == pytest.approx(0.0, abs=1e-6)
+    assert ship_widget.refresh(now=100.5)
+    assert ship_widget._shown[0] == pytest.approx(10.0)
+    assert not ship_widget.refresh(now=100.6)
+
+def test_ship_widget_trail_from_ring(ship_widget):
+    """测试轨迹从共享的样本缓冲读取，只在有新数据时更新"""
+    plot = AttitudePlot(pg.PlotWidget(), data_length=1000)
+    ship_widget.set_trail(plot.ring, seconds=10.0, bins=50)
+    timestamps = 1000.0 + np.arange(500) * 0.1
+    plot.extend(timestamps, np.arange(500) % 360.0, np.zeros(500))
+    assert ship_widget.refresh()
+    assert not ship_widget.refresh()
+    sin_a, _ = ship_widget._trails['heading'].directions()
+    assert len(sin_a) == 50
+    ship_widget.resize(300, 300)
+    ship_widget.grab()
+
+    ship_widget.set_trail(None)
+    assert ship_widget._trails == {}
+
+def test_attitude_plot_filtered_curve(attitude_plot):
+    """测试滤波曲线与原始曲线叠加显示，可以删除"""
+    timestamps = 1000.0 + np.arange(50) * 0.1
+    attitude_plot.extend(timestamps, np.full(50, 10.0), np.full(50, 20.0))
+    attitude_plot.extend_filtered(timestamps, np.full(50, 11.0), np.full(50, 21.0))
+    assert attitude_plot.update_plot()
+    x, heading, ir = attitude_plot.filtered_data()
+    assert len(x) == 50 and x[0] == 0
+    assert heading[-1] == 11 and ir[-1] == 21
+
+    attitude_plot.clear_filtered()
+    assert attitude_plot.filtered is None
+    assert attitude_plot.update_plot()
+
+def test_spectrogram_updates_only_on_new_frames(qapp):
+    """测试时频图只在出现新帧或切换通道时更新"""
+    from spectrum import SlidingSpectrum
+    from visualization import SpectrogramPlot
+
+    spectrum = SlidingSpectrum(fft_size=64, hop=16, columns=50)
+    plot = SpectrogramPlot(pg.PlotWidget(), spectrum)
+    assert not plot.update_plot()
+    t = np.arange(500) / 20.0
+    spectrum.extend(t, np.sin(t) * 10 % 360.0, np.zeros(500))
+    assert plot.update_plot()
+    assert not plot.update_plot()
+    plot.set_channel('ir')
+    assert plot.update_plot()
+    assert plot.image_item.image.shape == (len(spectrum), spectrum.bins)
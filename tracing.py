@@ -0,0 +1,187 @@
+"""
+样本级延迟追踪
+
+按 1/N 抽样记录单个样本在各处理阶段（读取、解析、信号发送、缓冲、绘图、显示）
+的时间跨度，并导出为 Chrome Trace Event JSON，可直接在 Perfetto 或
+chrome://tracing 中打开。
+
+本模块不依赖 Qt，无界面采集模式同样可以使用。
+
+启用方式：设置环境变量 NAVE_TRACE=<输出文件路径>，
+可选 NAVE_TRACE_EVERY=<N>（默认每 100 个样本抽样 1 个）。
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class SampleTracer:
+    """抽样追踪器：记录被抽中样本在各阶段的耗时"""
+
+    def __init__(self, every=100, max_events=200000):
+        self.enabled = False
+        self.every = max(1, int(every))
+        self.output_path = None
+        # 事件数量有上限，长时间运行时内存保持恒定
+        self._events = deque(maxlen=max_events)
+        self._produced = 0
+        self._delivered = 0
+        # 等待后续阶段（绘图、显示）处理的样本编号
+        self._pending = {'plot': [], 'paint': []}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._thread_names = {}
+
+    def configure(self, enabled=True, every=None, output_path=None):
+        """配置追踪器"""
+        if every is not None:
+            self.every = max(1, int(every))
+        if output_path is not None:
+            self.output_path = output_path
+        self.enabled = enabled
+
+    def configure_from_env(self):
+        """根据环境变量 NAVE_TRACE / NAVE_TRACE_EVERY 启用追踪"""
+        path = os.environ.get('NAVE_TRACE')
+        if not path:
+            return False
+        every = os.environ.get('NAVE_TRACE_EVERY')
+        try:
+            every = int(every) if every else None
+        except ValueError:
+            print(f"NAVE_TRACE_EVERY 无效: {every}")
+            every = None
+        self.configure(True, every, path)
+        print(f"样本追踪已启用: 每 {self.every} 个样本抽样 1 个, 输出到 {path}")
+        return True
+
+    def name_thread(self, name):
+        """为当前线程登记一个在追踪视图中显示的名称"""
+        self._thread_names[threading.get_ident()] = name
+
+    @staticmethod
+    def now():
+        """当前时间（纳秒，进程内各线程一致）"""
+        return time.perf_counter_ns()
+
+    def next_sample(self):
+        """生产端（串口线程）为即将发送的样本分配编号，未抽中时返回 None"""
+        if not self.enabled:
+            return None
+        sid = self._produced
+        self._produced += 1
+        return sid if sid % self.every == 0 else None
+
+    def next_delivery(self):
+        """消费端（界面线程）按相同顺序为收到的样本分配编号，未抽中时返回 None"""
+        if not self.enabled:
+            return None
+        sid = self._delivered
+        self._delivered += 1
+        return sid if sid % self.every == 0 else None
+
+    def next_samples(self, count):
+        """生产端为一批 count 个样本分配连续编号，返回第一个编号（未启用时返回 None）"""
+        if not self.enabled:
+            return None
+        first = self._produced
+        self._produced += count
+        return first
+
+    def next_deliveries(self, count):
+        """消费端为收到的一批 count 个样本分配连续编号，返回第一个编号（未启用时返回 None）"""
+        if not self.enabled:
+            return None
+        first = self._delivered
+        self._delivered += count
+        return first
+
+    def sampled_ids(self, first_sid, count):
+        """返回批量样本 [first_sid, first_sid + count) 中被抽中的编号"""
+        if not self.enabled or count <= 0:
+            return range(0)
+        start = -(-first_sid // self.every) * self.every
+        return range(start, first_sid + count, self.every)
+
+    def span(self, name, sid, start_ns, end_ns, **args):
+        """记录一个完整的阶段跨度"""
+        args['sample'] = sid
+        self._events.append({
+            'name': name,
+            'cat': 'sample',
+            'ph': 'X',
+            'ts': start_ns / 1000.0,
+            'dur': max(0, end_ns - start_ns) / 1000.0,
+            'pid': self._pid,
+            'tid': threading.get_ident(),
+            'args': args,
+        })
+
+    def flow(self, sid, phase, ts_ns):
+        """记录跨线程的流事件（s 开始 / t 中间 / f 结束），把同一样本的各阶段连起来"""
+        event = {
+            'name': 'sample',
+            'cat': 'sample',
+            'ph': phase,
+            'id': sid,
+            'ts': ts_ns / 1000.0,
+            'pid': self._pid,
+            'tid': threading.get_ident(),
+        }
+        if phase == 'f':
+            event['bp'] = 'e'
+        self._events.append(event)
+
+    def mark_pending(self, stage, sid):
+        """把样本登记为等待某个后续阶段"""
+        with self._lock:
+            self._pending[stage].append(sid)
+
+    def take_pending(self, stage):
+        """取出等待某个阶段的全部样本编号"""
+        with self._lock:
+            sids = self._pending[stage]
+            if not sids:
+                return sids
+            self._pending[stage] = []
+            return sids
+
+    def events(self):
+        """返回当前缓存的事件副本"""
+        return list(self._events)
+
+    def clear(self):
+        """清空事件与计数器"""
+        self._events.clear()
+        self._produced = 0
+        self._delivered = 0
+        with self._lock:
+            for stage in self._pending:
+                self._pending[stage] = []
+
+    def export(self, path=None):
+        """导出为 Chrome Trace Event JSON"""
+        path = path or self.output_path
+        if not path:
+            return None
+        thread_names = [{
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': self._pid,
+            'tid': tid,
+            'args': {'name': name},
+        } for tid, name in self._thread_names.items()]
+        trace = {
+            'traceEvents': thread_names + self.events(),
+            'displayTimeUnit': 'ms',
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False)
+        print(f"追踪数据已导出: {path} ({len(trace['traceEvents'])} 个事件)")
+        return path
+
+
+# 进程内共享的追踪器，默认关闭
+tracer = SampleTracer()
@@ -0,0 +1,67 @@
+"""
+航向/红外方位角轨迹（不依赖 Qt）
+
+把最近 duration 秒的历史按固定时间宽度分成 bins 个时间桶，每个桶取桶内最后一个样本的角度，
+保存其方向向量 (sin, cos)。桶按绝对时间对齐，已经结束的桶不会再变化，
+因此每次只需要为新增的桶计算三角函数；绘制的点数恒为 bins，与历史样本数无关。
+"""
+import math
+
+import numpy as np
+
+
+class TrailGeometry:
+    """固定点数的角度轨迹，方向向量按时间桶增量计算"""
+
+    def __init__(self, duration=30.0, bins=240):
+        self.duration = float(duration)
+        self.bins = int(bins)
+        self.bin_width = self.duration / self.bins
+        # 以桶序号对 bins 取模存放，NaN 表示该桶内没有样本
+        self._sin = np.full(self.bins, np.nan)
+        self._cos = np.full(self.bins, np.nan)
+        # 最新的桶序号；它可能尚未结束，下次更新时重新计算
+        self._last_bin = None
+
+    def clear(self):
+        self._sin.fill(np.nan)
+        self._cos.fill(np.nan)
+        self._last_bin = None
+
+    def update(self, t, values):
+        """
+        用按时间排序的历史 (t, values) 更新轨迹，没有数据时返回 False
+
+        只处理上次最新的桶及之后的桶，历史再长也只在末尾做二分查找。
+        """
+        if len(t) == 0:
+            return False
+        newest = int(math.floor(t[-1] / self.bin_width))
+        first = newest - self.bins + 1
+        if self._last_bin is not None:
+            # 窗口内的每个桶都会被重新写入，中间没有数据的桶自然变为 NaN
+            first = max(first, self._last_bin)
+        bins = np.arange(first, newest + 1)
+
+        # 每个桶的最后一个样本：结束时刻之前最后一个样本，且必须落在桶内
+        starts = bins * self.bin_width
+        begin = min(int(np.searchsorted(t, starts[0], side='left')), len(t) - 1)
+        tail_t = t[begin:]
+        last = np.searchsorted(tail_t, starts + self.bin_width, side='left') - 1
+        valid = last >= 0
+        last = np.maximum(last, 0)
+        valid &= tail_t[last] >= starts
+        angles = np.radians(np.asarray(values[begin:])[last])
+
+        slots = bins % self.bins
+        self._sin[slots] = np.where(valid, np.sin(angles), np.nan)
+        self._cos[slots] = np.where(valid, np.cos(angles), np.nan)
+        self._last_bin = newest
+        return True
+
+    def directions(self):
+        """按时间从旧到新排列的方向向量 (sin, cos)，长度为 bins，空桶为 NaN"""
+        if self._last_bin is None:
+            return self._sin[:0], self._cos[:0]
+        order = (np.arange(self._last_bin - self.bins + 1, self._last_bin + 1)) % self.bins
+        return self._sin[order], self._cos[order]
@@ -1,31 +1,77 @@
-from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QPolygon
-from PyQt5.QtCore import QPoint
+from PyQt5.QtWidgets import QWidget, QGroupBox, QGridLayout, QLabel
+from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QPolygon, QPolygonF, QPixmap
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRectF, QObject, QEvent
 import math
+import time
 import numpy as np
 import pyqtgraph as pg
 
+from decimation import minmax_decimate
+from interpolation import AngleInterpolator
+from sample_store import SampleRing, HistoryStore
+from rolling_stats import WINDOWS
+from schema import BASIC
+from trail import TrailGeometry
+from tracing import tracer
+
+
+# 表盘刻度方向 (角度, sin, cos)，每 10 度一个
+_TICKS = [(i, math.sin(math.radians(i)), math.cos(math.radians(i))) for i in range(0, 360, 10)]
+# 红外箭头两翼相对指向的偏角（180° ± 30°）
+_ARROW_SIN1, _ARROW_COS1 = math.sin(math.pi - math.pi / 6), math.cos(math.pi - math.pi / 6)
+_ARROW_SIN2, _ARROW_COS2 = math.sin(math.pi + math.pi / 6), math.cos(math.pi + math.pi / 6)
+
 
 class ShipAttitudeWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.heading_angle = 0
         self.ir_angle = 0
+        # 静态表盘（背景圆、刻度和数字）预先绘制到 QPixmap，尺寸或 DPI 变化时重建
+        self._dial = None
+        self._dial_key = None
+        # 实际绘制的角度：批量数据按时间戳插值，每帧由 refresh() 更新
+        self._shown = (0, 0)
+        self._heading_interp = AngleInterpolator()
+        self._ir_interp = AngleInterpolator()
+        self._animating = False
+        # 动态部分的 sin/cos 只在绘制角度变化时计算
+        self._heading_sc = (0.0, 1.0)
+        self._ir_sc = (0.0, 1.0)
+        # 角度已更新但尚未重绘
+        self._dirty = False
+        # 轨迹：从共享的样本历史（SampleRing）读取，未设置时不绘制
+        self._trail_source = None
+        self._trail_count = 0
+        self._trails = {}
         self.initUI()
 
     def initUI(self):
         self.setMinimumSize(300, 300)
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        # 设置坐标系中心
+    def _geometry(self):
+        """坐标系中心与表盘半径"""
         width = self.width()
         height = self.height()
-        center_x = width // 2
-        center_y = height // 2
-        radius = min(width, height) // 2 - 20
+        return width // 2, height // 2, min(width, height) // 2 - 20
+
+    def dial_pixmap(self):
+        """返回静态表盘图层，尺寸或设备像素比变化时重新绘制"""
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio)
+        if self._dial is None or self._dial_key != key:
+            self._dial = self._render_dial(ratio)
+            self._dial_key = key
+        return self._dial
+
+    def _render_dial(self, ratio):
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(self.font())
+        center_x, center_y, radius = self._geometry()
 
         # 绘制圆形背景
         painter.setPen(QPen(QColor(100, 100, 100), 2))
@@ -34,35 +80,46 @@ class ShipAttitudeWidget(QWidget):
 
         # 绘制刻度
         painter.setPen(QPen(QColor(100, 100, 100), 1))
-        for i in range(0, 360, 10):
-            angle = math.radians(i)
-            start_x = center_x + int((radius - 10) * math.sin(angle))
-            start_y = center_y - int((radius - 10) * math.cos(angle))
-            end_x = center_x + int(radius * math.sin(angle))
-            end_y = center_y - int(radius * math.cos(angle))
+        for i, sin_a, cos_a in _TICKS:
+            start_x = center_x + int((radius - 10) * sin_a)
+            start_y = center_y - int((radius - 10) * cos_a)
+            end_x = center_x + int(radius * sin_a)
+            end_y = center_y - int(radius * cos_a)
             painter.drawLine(start_x, start_y, end_x, end_y)
 
             # 每30度绘制数字
             if i % 30 == 0:
-                text_x = center_x + int((radius - 30) * math.sin(angle)) - 10
-                text_y = center_y - int((radius - 30) * math.cos(angle)) + 5
+                text_x = center_x + int((radius - 30) * sin_a) - 10
+                text_y = center_y - int((radius - 30) * cos_a) + 5
                 painter.drawText(text_x, text_y, str(i))
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.dial_pixmap())
+        painter.setRenderHint(QPainter.Antialiasing)
+        center_x, center_y, radius = self._geometry()
+
+        if self._trail_source is not None:
+            self._paint_trails(painter, center_x, center_y, radius)
 
-        # 绘制船体（航向角）
+        # 绘制船体（航向角）；船体两侧的方向为航向 ±90°，即 (cos, -sin) 与 (-cos, sin)
         painter.setPen(QPen(QColor(0, 0, 255), 3))
-        heading_rad = math.radians(self.heading_angle)
+        sin_h, cos_h = self._heading_sc
         ship_length = radius * 0.8
+        side = 0.3 * ship_length
 
         # 船体多边形
         ship_points = QPolygon([
-            QPoint(center_x + int(ship_length * math.sin(heading_rad)),
-                   center_y - int(ship_length * math.cos(heading_rad))),
-            QPoint(center_x + int(0.3 * ship_length * math.sin(heading_rad + math.pi / 2)),
-                   center_y - int(0.3 * ship_length * math.cos(heading_rad + math.pi / 2))),
-            QPoint(center_x - int(0.5 * ship_length * math.sin(heading_rad)),
-                   center_y + int(0.5 * ship_length * math.cos(heading_rad))),
-            QPoint(center_x + int(0.3 * ship_length * math.sin(heading_rad - math.pi / 2)),
-                   center_y - int(0.3 * ship_length * math.cos(heading_rad - math.pi / 2)))
+            QPoint(center_x + int(ship_length * sin_h),
+                   center_y - int(ship_length * cos_h)),
+            QPoint(center_x + int(side * cos_h),
+                   center_y - int(side * -sin_h)),
+            QPoint(center_x - int(0.5 * ship_length * sin_h),
+                   center_y + int(0.5 * ship_length * cos_h)),
+            QPoint(center_x + int(side * -cos_h),
+                   center_y - int(side * sin_h))
         ])
 
         painter.setBrush(QBrush(QColor(200, 200, 255)))
@@ -70,22 +127,19 @@ class ShipAttitudeWidget(QWidget):
 
         # 绘制红外信号方位角
         painter.setPen(QPen(QColor(255, 0, 0), 2))
-        ir_rad = math.radians(self.ir_angle)
+        sin_ir, cos_ir = self._ir_sc
         ir_length = radius * 0.7
-        ir_x = center_x + int(ir_length * math.sin(ir_rad))
-        ir_y = center_y - int(ir_length * math.cos(ir_rad))
+        ir_x = center_x + int(ir_length * sin_ir)
+        ir_y = center_y - int(ir_length * cos_ir)
 
         painter.drawLine(center_x, center_y, ir_x, ir_y)
 
-        # 绘制箭头
+        # 绘制箭头：两翼方向由和角公式得到，不再逐帧调用三角函数
         arrow_size = 10
-        arrow_angle1 = ir_rad + math.pi - math.pi / 6
-        arrow_angle2 = ir_rad + math.pi + math.pi / 6
-
-        arrow_x1 = ir_x + int(arrow_size * math.sin(arrow_angle1))
-        arrow_y1 = ir_y - int(arrow_size * math.cos(arrow_angle1))
-        arrow_x2 = ir_x + int(arrow_size * math.sin(arrow_angle2))
-        arrow_y2 = ir_y - int(arrow_size * math.cos(arrow_angle2))
+        arrow_x1 = ir_x + int(arrow_size * (sin_ir * _ARROW_COS1 + cos_ir * _ARROW_SIN1))
+        arrow_y1 = ir_y - int(arrow_size * (cos_ir * _ARROW_COS1 - sin_ir * _ARROW_SIN1))
+        arrow_x2 = ir_x + int(arrow_size * (sin_ir * _ARROW_COS2 + cos_ir * _ARROW_SIN2))
+        arrow_y2 = ir_y - int(arrow_size * (cos_ir * _ARROW_COS2 - sin_ir * _ARROW_SIN2))
 
         painter.drawLine(ir_x, ir_y, arrow_x1, arrow_y1)
         painter.drawLine(ir_x, ir_y, arrow_x2, arrow_y2)
@@ -95,22 +149,247 @@ class ShipAttitudeWidget(QWidget):
         painter.drawText(10, 20, f"航向角: {self.heading_angle:.1f}°")
         painter.drawText(10, 40, f"红外方位角: {self.ir_angle:.1f}°")
 
+    # 轨迹样式：通道 -> (颜色, 最旧点的半径比例, 最新点的半径比例)
+    TRAIL_STYLES = {
+        'heading': ((0, 0, 255), 0.45, 0.95),
+        'ir': ((255, 0, 0), 0.2, 0.7),
+    }
+    # 轨迹按新旧分为若干段，每段一种透明度，绘制调用次数固定
+    TRAIL_FADE_STEPS = 8
+
+    def set_trail(self, source, seconds=30.0, bins=240):
+        """
+        在表盘上显示最近 seconds 秒的航向角和红外方位角轨迹（越旧越靠近圆心、越淡）
+
+        source 为包含 't'、'heading'、'ir' 通道的 SampleRing；为 None 时关闭轨迹。
+        """
+        self._trail_source = source
+        self._trail_count = 0
+        self._trails = {channel: TrailGeometry(seconds, bins) for channel in self.TRAIL_STYLES} \
+            if source is not None else {}
+        self._dirty = True
+
+    def _update_trails(self):
+        """样本历史有新数据时增量更新轨迹，返回是否有变化"""
+        source = self._trail_source
+        if source is None or source.count == self._trail_count:
+            return False
+        self._trail_count = source.count
+        n = len(source)
+        t = source.view('t', n)
+        for channel, trail in self._trails.items():
+            trail.update(t, source.view(channel, n))
+        return True
+
+    def _paint_trails(self, painter, center_x, center_y, radius):
+        steps = self.TRAIL_FADE_STEPS
+        painter.setBrush(Qt.NoBrush)
+        for channel, trail in self._trails.items():
+            sin_a, cos_a = trail.directions()
+            n = len(sin_a)
+            if n < 2:
+                continue
+            color, inner, outer = self.TRAIL_STYLES[channel]
+            r = radius * np.linspace(inner, outer, n)
+            xs = center_x + r * sin_a
+            ys = center_y - r * cos_a
+            bounds = np.linspace(0, n - 1, steps + 1).astype(int)
+            for step in range(steps):
+                pen_color = QColor(*color)
+                pen_color.setAlpha(int(200 * (step + 1) / steps))
+                painter.setPen(QPen(pen_color, 2))
+                # 相邻两段共用端点，保证轨迹连续；空桶处断开
+                start, end = bounds[step], bounds[step + 1] + 1
+                points = []
+                for x, y in zip(xs[start:end].tolist(), ys[start:end].tolist()):
+                    if x != x:
+                        if len(points) > 1:
+                            painter.drawPolyline(QPolygonF(points))
+                        points = []
+                    else:
+                        points.append(QPointF(x, y))
+                if len(points) > 1:
+                    painter.drawPolyline(QPolygonF(points))
+
     def update_angles(self, heading, ir):
+        """设置角度并立即请求重绘"""
+        self.set_angles(heading, ir)
+        self.refresh()
+
+    def set_angles(self, heading, ir):
+        """直接设置角度（不做插值动画），重绘推迟到下一帧的 refresh()"""
         self.heading_angle = heading
         self.ir_angle = ir
+        self._heading_interp.reset(heading)
+        self._ir_interp.reset(ir)
+        self._animating = False
+        self._show(heading, ir)
+
+    def _show(self, heading, ir):
+        """设置实际绘制的角度"""
+        shown_heading, shown_ir = self._shown
+        if heading == shown_heading and ir == shown_ir:
+            return
+        if heading != shown_heading:
+            heading_rad = math.radians(heading)
+            self._heading_sc = (math.sin(heading_rad), math.cos(heading_rad))
+        if ir != shown_ir:
+            ir_rad = math.radians(ir)
+            self._ir_sc = (math.sin(ir_rad), math.cos(ir_rad))
+        self._shown = (heading, ir)
+        self._dirty = True
+
+    def refresh(self, now=None):
+        """
+        每帧调用一次：计算本帧的插值角度，有变化时请求一次重绘，返回是否请求了重绘
+
+        now 为 Unix 时间，与样本时间戳同一时间基准。
+        """
+        if self._animating:
+            if now is None:
+                now = time.time()
+            self._show(self._heading_interp.value_at(now), self._ir_interp.value_at(now))
+            if self._heading_interp.settled(now) and self._ir_interp.settled(now):
+                self._animating = False
+        if self._update_trails():
+            self._dirty = True
+        if not self._dirty:
+            return False
+        self._dirty = False
         self.update()
+        return True
+
+    def extend(self, timestamps, headings, irs):
+        """批量更新：读数取最新值，指针由帧时钟调用 refresh() 在最近的样本间插值绘制"""
+        if len(headings):
+            self.heading_angle = float(headings[-1])
+            self.ir_angle = float(irs[-1])
+            self._heading_interp.extend(timestamps, headings)
+            self._ir_interp.extend(timestamps, irs)
+            self._animating = True
+
+
+class _PaintProbe(QObject):
+    """事件过滤器：在曲线图实际重绘时记录被追踪样本的显示阶段"""
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            sids = tracer.take_pending('paint')
+            if sids:
+                t_paint = tracer.now()
+                for sid in sids:
+                    tracer.span('paint', sid, t_paint, t_paint)
+                    tracer.flow(sid, 'f', t_paint)
+        return False
+
+
+class Crosshair:
+    """
+    曲线图的十字光标：显示光标处最近样本的时间和各曲线的值
+
+    鼠标移动时只记录位置，查找样本和更新读数由 update() 完成，
+    帧时钟每帧调用一次，因此鼠标事件再多也不会与实时数据的刷新争抢时间。
+    """
+
+    def __init__(self, plot):
+        self.plot = plot
+        widget = plot.plot_widget
+        pen = pg.mkPen(color=(120, 120, 120), style=Qt.DashLine)
+        self.v_line = pg.InfiniteLine(angle=90, movable=False, pen=pen)
+        self.h_line = pg.InfiniteLine(angle=0, movable=False, pen=pen)
+        self.label = pg.TextItem(color=(0, 0, 0), fill=pg.mkBrush(255, 255, 255, 220),
+                                 border=pg.mkPen(color=(160, 160, 160)))
+        for item in (self.v_line, self.h_line, self.label):
+            item.setZValue(100)
+            item.hide()
+            widget.addItem(item, ignoreBounds=True)
+        # 最近一次鼠标位置（场景坐标），_pending 表示尚未处理
+        self._pos = None
+        self._pending = False
+        widget.scene().sigMouseMoved.connect(self._on_mouse_moved)
+
+    def _on_mouse_moved(self, pos):
+        self._pos = pos
+        self._pending = True
+
+    def invalidate(self):
+        """数据或视图变化后，下一帧按当前鼠标位置重新查找"""
+        if self._pos is not None:
+            self._pending = True
+
+    def remove(self):
+        widget = self.plot.plot_widget
+        widget.scene().sigMouseMoved.disconnect(self._on_mouse_moved)
+        for item in (self.v_line, self.h_line, self.label):
+            widget.removeItem(item)
+
+    def update(self):
+        """处理最近一次鼠标移动，返回显示是否变化"""
+        if not self._pending:
+            return False
+        self._pending = False
+        view_box = self.plot.plot_widget.getViewBox()
+        if not view_box.sceneBoundingRect().contains(self._pos):
+            self._pos = None
+            return self._hide()
+        point = view_box.mapSceneToView(self._pos)
+        return self.show_at(point.x(), point.y())
+
+    def _hide(self):
+        if not self.label.isVisible():
+            return False
+        for item in (self.v_line, self.h_line, self.label):
+            item.hide()
+        return True
+
+    def show_at(self, x, y):
+        """在横坐标 x 处显示最近样本的读数（y 为光标的纵坐标）"""
+        plot = self.plot
+        channels = plot.shown_channels()
+        found = plot.store.nearest(x, channels)
+        if found is None:
+            # 没有原始样本（无数据，或样本已移出内存且没有磁盘记录）
+            if plot.t0 is None:
+                return self._hide()
+            sample_x, values = x, {}
+        else:
+            sample_x, values = found
+        lines = [time.strftime("%H:%M:%S", time.localtime(plot.t0 + sample_x))
+                 + f".{int((plot.t0 + sample_x) % 1 * 1000):03d}  ({sample_x:.3f} s)"]
+        for name in channels:
+            if name in values:
+                channel = plot.schema[name]
+                lines.append(f"{channel.label}: {channel.format(values[name])}{channel.unit}")
+        self.label.setText('\n'.join(lines))
+        self.v_line.setPos(sample_x)
+        self.h_line.setPos(y)
+        # 光标在右半边时读数显示在左侧，避免超出视图
+        (x_min, x_max), (y_min, y_max) = plot.plot_widget.getViewBox().viewRange()
+        self.label.setAnchor((1 if x > (x_min + x_max) / 2 else 0,
+                              0 if y > (y_min + y_max) / 2 else 1))
+        self.label.setPos(x, y)
+        for item in (self.v_line, self.h_line, self.label):
+            item.show()
+        return True
 
 
 class AttitudePlot:
-    def __init__(self, plot_widget, data_length=1000):  # 增加默认数据长度
+    def __init__(self, plot_widget, data_length=1000, schema=BASIC):  # 增加默认数据长度
         self.plot_widget = plot_widget
         self.data_length = data_length
+        # 数据格式（schema.Schema）决定保存哪些通道，显示的曲线是其中任意子集
+        self.schema = schema
         self.display_length = 10000  # 默认显示最近100个数据点
         
-        # 初始化数据
-        self.heading_data = np.zeros(data_length)
-        self.ir_data = np.zeros(data_length)
-        self.time_data = np.linspace(-data_length, 0, data_length)
+        # 样本历史：最近的原始样本在预分配的环形缓冲中，绘图直接使用连续视图；
+        # 全部历史的最小/最大值金字塔用于长历史或缩小视图时按像素数降采样显示；
+        # 平移到环形缓冲之前的范围时从磁盘历史按需读取。
+        # 时间为相对 t0（第一个样本的 Unix 时间）的秒数，即曲线的横坐标
+        self.store = HistoryStore(data_length, channels=schema.names, pyramid_base=64)
+        self.ring = self.store.ring
+        self.pyramid = self.store.pyramid
+        # 滤波后的数据（启用滤波时由 extend_filtered 写入），只保留环形缓冲范围内的历史
+        self.filtered = None
         
         # 设置图表
         self.plot_widget.setBackground('w')
@@ -119,61 +398,350 @@ class AttitudePlot:
         self.plot_widget.addLegend()
         self.plot_widget.showGrid(x=True, y=True)
         
-        # 设置显示范围
-        self.plot_widget.setXRange(-self.display_length, 0)
+        # 设置显示范围：横轴随数据自动调整
         self.plot_widget.setYRange(-10, 370)  # 设置Y轴范围略大于0-360度
+        self.plot_widget.enableAutoRange(axis='x')
         
-        # 创建曲线
-        self.heading_curve = self.plot_widget.plot(
-            self.time_data, 
-            self.heading_data,
-            pen=pg.mkPen(color=(0, 0, 255), width=2),
-            name="航向角"
-        )
-        
-        self.ir_curve = self.plot_widget.plot(
-            self.time_data, 
-            self.ir_data,
-            pen=pg.mkPen(color=(255, 0, 0), width=2),
-            name="红外方位角"
-        )
+        # 创建曲线：默认显示航向角和红外方位角
+        self.curves = {}
+        self.set_channels(('heading', 'ir'))
+
+        # 滤波曲线在第一次写入滤波数据时创建
+        self.heading_filtered_curve = None
+        self.ir_filtered_curve = None
         
         # 数据计数器
         self.data_counter = 0
+
+        # 有新数据或可见范围变化时才需要重绘
+        self._dirty = True
+        self._view_key = None
+
+        # 十字光标（set_crosshair 启用）
+        self.crosshair = None
+
+        # 启用追踪时监听视图重绘，用于记录显示阶段
+        self._paint_probe = None
+        if tracer.enabled:
+            self._paint_probe = _PaintProbe()
+            self.plot_widget.viewport().installEventFilter(self._paint_probe)
     
-    def update_data(self, heading, ir):
+    @property
+    def heading_curve(self):
+        return self.curves.get('heading')
+
+    @property
+    def ir_curve(self):
+        return self.curves.get('ir')
+
+    def set_channels(self, names):
+        """设置显示曲线的通道（数据格式中的任意子集，按数据格式的顺序显示）"""
+        names = [name for name in self.schema.names if name in names]
+        for name in list(self.curves):
+            if name not in names:
+                self.plot_widget.removeItem(self.curves.pop(name))
+        for name in names:
+            if name not in self.curves:
+                channel = self.schema[name]
+                # 可选通道可能有缺失值（NaN），在缺失处断开
+                connect = 'all' if self.schema.index(name) < self.schema.required else 'finite'
+                self.curves[name] = self.plot_widget.plot(
+                    pen=pg.mkPen(color=channel.color, width=2),
+                    name=channel.label,
+                    connect=connect
+                )
+        self._dirty = True
+
+    def shown_channels(self):
+        """显示曲线的通道"""
+        return tuple(self.curves)
+
+    @property
+    def t0(self):
+        """第一个样本的 Unix 时间"""
+        return self.store.t0
+
+    @property
+    def history(self):
+        """磁盘历史（recording.RecordingHistory）"""
+        return self.store.disk
+
+    def query(self, t_start, t_end, max_points=None, channels=None):
+        """取横坐标在 [t_start, t_end] 内的样本，见 HistoryStore.query"""
+        return self.store.query(t_start, t_end, max_points, channels)
+
+    @property
+    def time_data(self):
+        """最近 data_length 个样本的时间（相对 t0 的秒数，只读视图）"""
+        return self.ring.view('t')
+
+    @property
+    def heading_data(self):
+        """最近 data_length 个航向角（按时间顺序的只读视图）"""
+        return self.ring.view('heading')
+
+    @property
+    def ir_data(self):
+        """最近 data_length 个红外方位角（按时间顺序的只读视图）"""
+        return self.ring.view('ir')
+
+    def update_data(self, heading, ir, timestamp=None):
         """更新数据"""
-        self.heading_data = np.roll(self.heading_data, -1)
-        self.heading_data[-1] = heading
-        
-        self.ir_data = np.roll(self.ir_data, -1)
-        self.ir_data[-1] = ir
-        
+        if timestamp is None:
+            timestamp = time.time()
+        # 数据格式中的其他通道记为缺失
+        self.store.append(timestamp, heading, ir, *([np.nan] * (len(self.schema) - 2)))
         self.data_counter += 1
-        
-        # 更新时间数据
-        if self.data_counter > self.data_length:
-            self.time_data = np.linspace(-self.data_length, 0, self.data_length)
+        self._dirty = True
+
+    def extend(self, timestamps, *columns):
+        """
+        批量更新数据：timestamps 为 Unix 时间，columns 按数据格式的通道顺序给出等长数组
+
+        只给出前几个通道（例如航向角、红外方位角）时其余通道记为缺失。
+        """
+        if len(timestamps) == 0:
+            return
+        missing = len(self.schema) - len(columns)
+        if missing > 0:
+            columns += (np.full(len(timestamps), np.nan),) * missing
+        self.store.extend(timestamps, *columns)
+        self.data_counter += len(timestamps)
+        self._dirty = True
     
+    def _current_view_key(self):
+        """决定可见数据的视图状态：自动范围时只取决于宽度，否则还取决于横轴范围"""
+        view_box = self.plot_widget.getViewBox()
+        width = int(view_box.width())
+        if view_box.autoRangeEnabled()[0]:
+            return width, None
+        return width, tuple(view_box.viewRange()[0])
+
+    def extend_filtered(self, timestamps, headings, irs):
+        """
+        写入一批滤波后的数据，与原始曲线叠加显示
+
+        应在同一批原始数据的 extend() 之后调用（使用相同的时间基准 t0）。
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(timestamps) == 0 or self.t0 is None:
+            return
+        if self.filtered is None:
+            self.filtered = SampleRing(self.data_length, channels=('t', 'heading', 'ir'))
+            self.heading_filtered_curve = self.plot_widget.plot(
+                pen=pg.mkPen(color=(0, 0, 120), width=2, style=Qt.DashLine),
+                name="航向角（滤波）"
+            )
+            self.ir_filtered_curve = self.plot_widget.plot(
+                pen=pg.mkPen(color=(120, 0, 0), width=2, style=Qt.DashLine),
+                name="红外方位角（滤波）"
+            )
+        self.filtered.extend(timestamps - self.t0, headings, irs)
+        self._dirty = True
+
+    def clear_filtered(self):
+        """删除滤波数据和滤波曲线"""
+        if self.filtered is None:
+            return
+        self.plot_widget.removeItem(self.heading_filtered_curve)
+        self.plot_widget.removeItem(self.ir_filtered_curve)
+        self.filtered = None
+        self.heading_filtered_curve = None
+        self.ir_filtered_curve = None
+        self._dirty = True
+
+    def filtered_data(self):
+        """当前可见范围内的滤波数据 (时间, 航向角, 红外方位角)，点数多时降采样"""
+        n = len(self.filtered)
+        x = self.filtered.view('t', n)
+        ys = {'heading': self.filtered.view('heading', n), 'ir': self.filtered.view('ir', n)}
+        if n:
+            x_start, x_end, max_points = self._visible_range()
+            first = int(np.searchsorted(x, x_start, side='left'))
+            last = int(np.searchsorted(x, x_end, side='right'))
+            x = x[first:last]
+            ys = {channel: y[first:last] for channel, y in ys.items()}
+            x, ys = minmax_decimate(x, ys, max_points)
+        return x, ys['heading'], ys['ir']
+
     def update_plot(self):
-        """更新图表显示"""
-        # 只显示实际有数据的部分
-        valid_length = min(self.data_counter, self.data_length)
-        display_start = max(-valid_length, -self.data_length)
-        
-        self.heading_curve.setData(
-            self.time_data[display_start:],
-            self.heading_data[display_start:]
-        )
-        self.ir_curve.setData(
-            self.time_data[display_start:],
-            self.ir_data[display_start:]
-        )
+        """
+        更新图表显示，返回本帧是否重绘
+
+        没有新数据、可见范围也没有变化时直接跳过，不再把数据交给 pyqtgraph。
+        十字光标也在这里每帧至多更新一次。
+        """
+        view_key = self._current_view_key()
+        if not self._dirty and view_key == self._view_key:
+            return self.crosshair is not None and self.crosshair.update()
+        self._dirty = False
+        self._view_key = view_key
+        if self.crosshair is not None:
+            self.crosshair.invalidate()
+            self.crosshair.update()
+
+        sids = tracer.take_pending('plot') if tracer.enabled else None
+        if sids:
+            t_plot = tracer.now()
+
+        x, ys = self.visible_columns()
+        for name, curve in self.curves.items():
+            curve.setData(x, ys[name])
+        if self.filtered is not None:
+            x, heading, ir = self.filtered_data()
+            self.heading_filtered_curve.setData(x, heading)
+            self.ir_filtered_curve.setData(x, ir)
+
+        if sids:
+            t_done = tracer.now()
+            for sid in sids:
+                tracer.span('plot', sid, t_plot, t_done, batch=len(sids))
+                tracer.flow(sid, 't', t_plot)
+                tracer.mark_pending('paint', sid)
+        return True
     
+    def set_crosshair(self, enabled):
+        """启用/关闭十字光标"""
+        if enabled and self.crosshair is None:
+            self.crosshair = Crosshair(self)
+        elif not enabled and self.crosshair is not None:
+            self.crosshair.remove()
+            self.crosshair = None
+
+    def set_history(self, history):
+        """设置磁盘历史层，其时间戳为 Unix 时间"""
+        self.store.set_disk(history)
+        self._dirty = True
+
+    def _visible_range(self):
+        """需要取数据的横轴范围和点数上限 (x_start, x_end, max_points)"""
+        view_box = self.plot_widget.getViewBox()
+        max_points = 2 * max(int(view_box.width()), 500)
+        if view_box.autoRangeEnabled()[0]:
+            x_start, x_end = self.pyramid.x_range()
+        else:
+            # 两侧各多取一屏，小幅平移时边缘不会出现空白
+            x_start, x_end = view_box.viewRange()[0]
+            width = x_end - x_start
+            x_start, x_end = x_start - width, x_end + width
+            max_points *= 3
+        return x_start, x_end, max_points
+
+    def visible_columns(self, channels=None):
+        """
+        取当前可见范围的数据 (时间, {通道: 数组})，channels 默认为显示曲线的通道
+
+        横轴自动范围开启时可见范围是全部历史。样本很多时从金字塔中选择每像素约
+        一个桶的层级；否则使用原始数据：在环形缓冲内时直接返回连续视图，
+        更早的部分从磁盘历史按需读取，点数偏多时临时降采样。
+        只处理需要的通道，其余通道不复制。
+        """
+        channels = self.shown_channels() if channels is None else tuple(channels)
+        if len(self.ring) == 0:
+            return self.ring.view('t', 0), {name: self.ring.view(name, 0) for name in channels}
+        return self.store.query(*self._visible_range(), channels=channels)
+
+    def visible_data(self):
+        """取当前可见范围的数据 (时间, 航向角, 红外方位角)"""
+        x, ys = self.visible_columns(('heading', 'ir'))
+        return x, ys['heading'], ys['ir']
+
     def set_display_range(self, start, end):
         """设置显示范围"""
         self.plot_widget.setXRange(start, end)
     
     def get_data_range(self):
-        """获取当前数据范围"""
-        return (-min(self.data_counter, self.data_length), 0)
\ No newline at end of file
+        """全部历史的时间范围 (最早, 最新)，为曲线横坐标（相对 t0 的秒数）；没有样本时返回 None"""
+        return self.store.time_range()
+
+
+class SpectrogramPlot:
+    """
+    时频图：横轴为时间，纵轴为频率，颜色为幅度（dB）
+
+    数据来自 spectrum.SlidingSpectrum，只有出现新帧或切换通道时才更新图像。
+    """
+
+    # 显示的动态范围（dB）
+    DYNAMIC_RANGE = 60.0
+
+    def __init__(self, plot_widget, spectrum, channel='heading'):
+        self.plot_widget = plot_widget
+        self.spectrum = spectrum
+        self.channel = channel
+        self.t0 = None
+        self._shown_count = None
+
+        self.plot_widget.setBackground('w')
+        self.plot_widget.setLabel('left', '频率', units='Hz')
+        self.plot_widget.setLabel('bottom', '时间', units='s')
+        self.image_item = pg.ImageItem()
+        self.image_item.setLookupTable(pg.colormap.get('viridis').getLookupTable())
+        self.plot_widget.addItem(self.image_item)
+
+    def set_channel(self, channel):
+        """切换显示的通道"""
+        self.channel = channel
+        self._shown_count = None
+
+    def update_plot(self):
+        """有新帧时更新图像，返回是否更新"""
+        spectrum = self.spectrum
+        if spectrum.count == self._shown_count or len(spectrum) < 2:
+            return False
+        self._shown_count = spectrum.count
+
+        image = spectrum.image(self.channel)
+        times = spectrum.times()
+        if self.t0 is None:
+            self.t0 = float(times[0])
+        top = float(image.max())
+        self.image_item.setImage(image, autoLevels=False,
+                                 levels=(top - self.DYNAMIC_RANGE, top))
+        # 每帧占一列；频率轴按最新一帧的实际采样率换算
+        step = (times[-1] - times[0]) / (len(times) - 1)
+        nyquist = spectrum.sample_rate() / 2
+        self.image_item.setRect(QRectF(times[0] - self.t0 - step / 2, 0,
+                                       step * len(times), nyquist))
+        return True
+
+
+def _format_stat(value, fmt, unit):
+    return '-' if value is None else format(value, fmt) + unit
+
+
+class StatsPanel(QGroupBox):
+    """统计面板：每个窗口一行，显示航向/红外的圆周均值和标准差以及转向速率"""
+
+    COLUMNS = ("窗口", "航向均值", "航向标准差", "红外均值", "红外标准差", "转向速率")
+
+    def __init__(self, windows=WINDOWS, parent=None):
+        super().__init__("滚动统计", parent)
+        layout = QGridLayout(self)
+        for column, title in enumerate(self.COLUMNS):
+            layout.addWidget(QLabel(title), 0, column)
+        self._rows = {}
+        for row, (seconds, name) in enumerate(windows, start=1):
+            layout.addWidget(QLabel(name), row, 0)
+            labels = []
+            for column in range(1, len(self.COLUMNS)):
+                label = QLabel('-')
+                layout.addWidget(label, row, column)
+                labels.append(label)
+            self._rows[seconds] = labels
+
+    def set_stats(self, stats):
+        """从 StreamStats 刷新显示"""
+        for seconds, labels in self._rows.items():
+            heading = stats.heading.windows[seconds]
+            ir = stats.ir.windows[seconds]
+            texts = (
+                _format_stat(heading.mean(), '.1f', '°'),
+                _format_stat(heading.std(), '.2f', '°'),
+                _format_stat(ir.mean(), '.1f', '°'),
+                _format_stat(ir.std(), '.2f', '°'),
+                _format_stat(heading.rate(), '+.2f', '°/s'),
+            )
+            for label, text in zip(labels, texts):
+                label.setText(text)
+        stats.changed = False